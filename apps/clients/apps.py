@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ClientsConfig(AppConfig):
     name = 'apps.clients'
+
+    def ready(self):
+        from apps.clients import signals  # noqa: F401
@@ -1,11 +1,14 @@
 import django_filters
 
 from apps.clients.models import Client
+from apps.constants import CLIENT_SAP_DIGITS
+from apps.filter_state import StatefulFilterSet
+from apps.sap_filters import SapIdPrefixFilter
 
 
-class ClientFilter(django_filters.FilterSet):
+class ClientFilter(StatefulFilterSet):
     client_name = django_filters.CharFilter(lookup_expr='icontains')
-    client_sap_id = django_filters.CharFilter(lookup_expr='icontains')
+    client_sap_id = SapIdPrefixFilter(digits=CLIENT_SAP_DIGITS)
 
     class Meta:
         model = Client
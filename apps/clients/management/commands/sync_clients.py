@@ -0,0 +1,9 @@
+from apps.clients.models import Client
+from apps.master_data_sync import MasterDataSyncCommand
+
+
+class Command(MasterDataSyncCommand):
+    help = "Synchronize clients with SAP clients extract (CSV or JSON lines with client_sap_id & client_name)."
+    model = Client
+    key_field = 'client_sap_id'
+    fields = ('client_name', )
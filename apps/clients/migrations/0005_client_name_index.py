@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_auto_20201022_1949'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['client_name', 'id'], name='client_name_id_idx'),
+        ),
+    ]
@@ -10,5 +10,8 @@ class Client(models.Model):
     client_sap_id = models.IntegerField(unique=True, validators=[validate_sap_id(), ])
     client_name = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [models.Index(fields=['client_name', 'id'], name='client_name_id_idx'), ]
+
     def __str__(self):
         return self.client_name
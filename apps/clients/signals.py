@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.clients.models import Client
+from apps.paginators import invalidate_pagination_counts
+
+
+@receiver([post_save, post_delete], sender=Client)
+def invalidate_client_counts(sender, **kwargs):
+    """Invalidate cached paginated list counts after client data change."""
+    invalidate_pagination_counts(sender)
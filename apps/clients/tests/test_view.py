@@ -1,12 +1,15 @@
 from math import ceil
 
-from django.test import TestCase, Client as ViewClient
+from django.test import TestCase, Client as ViewClient, override_settings
+from django.urls import reverse
 
 from .factories import ClientFactory
 
 from apps.clients.forms import ClientForm
 from apps.clients.models import Client
-from apps.unittest_helpers import assert_response_get, assert_response_post
+from apps.clients.views import ClientListView, ClientDetailView
+from apps.products.tests.factories import SpecificationIssuedFactory
+from apps.unittest_helpers import assert_response_get, assert_response_post, assert_query_budget
 from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
 from ...users.tests import PASSWORD
 from ...users.tests.factories import CxUserFactory
@@ -19,6 +22,7 @@ class ClientsViewTest(TestCase):
         cls.clients = ClientFactory.create_batch(size=36)
         cls.client_to_be_deleted = cls.clients[0]
         cls.client_to_be_updated = cls.clients[1]
+        cls.issued_specifications = SpecificationIssuedFactory.create_batch(size=6, client=cls.clients[2])
         cls.user = CxUserFactory.create()
 
     def test_list(self):
@@ -28,6 +32,49 @@ class ClientsViewTest(TestCase):
         self.assertEqual(response.context['page_obj'].paginator.num_pages,
                          ceil(len(self.clients) / PAGINATION_OBJ_COUNT_PER_PAGE))
 
+    def test_list_keyset_pagination(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = self.view_client.get(reverse('clients:clients-list'), data={'pagination': 'keyset'})
+        seen = list(response.context['page_obj'])
+        while response.context['page_obj'].has_next():
+            response = self.view_client.get(reverse('clients:clients-list'),
+                                            data={'cursor': response.context['page_obj'].next_cursor})
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.context['page_obj'])
+        self.assertIsNone(response.context['paginator'].num_pages)
+        self.assertEqual(response.context['page_obj'].number, ceil(len(self.clients) / PAGINATION_OBJ_COUNT_PER_PAGE))
+        self.assertEqual(seen, list(Client.objects.order_by('id')))
+
+    @override_settings(FILTER_STATE_MODE='token')
+    def test_list_filter_state_token(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        session = self.view_client.session
+        session['client_name'] = self.clients[5].client_name
+        session.save()
+        response = self.view_client.get(reverse('clients:clients-list'))
+        self.assertEqual(list(response.context['page_obj']), [self.clients[5]])
+        response = self.view_client.get(reverse('clients:clients-list'),
+                                        data={'client_name': '', 'ordering': '-client_name'})
+        token = response.context['filter_state_token']
+        response = self.view_client.get(reverse('clients:clients-list'), data={'page': 2, 'state': token})
+        second_page = Client.objects.order_by('-client_name', 'id')[PAGINATION_OBJ_COUNT_PER_PAGE:
+                                                                    2 * PAGINATION_OBJ_COUNT_PER_PAGE]
+        self.assertEqual(list(response.context['page_obj']), list(second_page))
+        self.assertContains(response, f'name="state" value="{token}"')
+        self.assertEqual(self.view_client.session['client_name'], self.clients[5].client_name)
+        self.assertNotIn('ordering', self.view_client.session)
+
+    def test_list_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        assert_query_budget(test_case=self, url_name='clients:clients-list', view_class=ClientListView)
+
+    def test_detail_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = assert_query_budget(test_case=self, url_name='clients:client-detail',
+                                       view_class=ClientDetailView, id=self.clients[2].id)
+        for specification in self.issued_specifications:
+            self.assertContains(response, specification.product.description)
+
     def test_new_get(self):
         self.view_client.login(username=self.user.username, password=PASSWORD)
         response = assert_response_get(test_case=self, url_name='clients:client-new', exp_status_code=200,
@@ -1,4 +1,5 @@
 from django.contrib import messages
+from django.db.models import Prefetch
 from django.views.generic import DetailView, CreateView, UpdateView, DeleteView, ListView
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
@@ -8,37 +9,23 @@ from apps.clients.filters import ClientFilter
 from apps.clients.forms import ClientForm
 from apps.clients.models import Client
 from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
+from apps.paginators import ListPaginationMixin
+from apps.products.models import SpecificationIssued
 from apps.user_texts import VIEW_MSG
-from apps.view_helpers import add_error_messages, update_filter_params, update_ordering
+from apps.view_helpers import add_error_messages, FilterStateMixin
 
 
-class ClientListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class ClientListView(LoginRequiredMixin, PermissionRequiredMixin, FilterStateMixin, ListPaginationMixin, ListView):
     """List clients, provide client filtering and sorting."""
     model = Client
+    queryset = Client.objects.only('id', 'client_sap_id', 'client_name')
     template_name = 'clients_list.html'
     login_url = 'users:user-login'
     permission_required = ('clients.view_client', )
     paginate_by = PAGINATION_OBJ_COUNT_PER_PAGE
     ordering = ('id', )
-
-    def get_queryset(self):
-        """Update session for request GET parameters.
-        Filter & sort clients by parameters values stored in session.
-        """
-        self.request.session = update_filter_params(params=self.request.GET,
-                                                    session=self.request.session,
-                                                    filter_class=ClientFilter)
-        client_filter = ClientFilter(self.request.session, queryset=self.model.objects.all())
-        qs = client_filter.qs.order_by(self.get_ordering())
-        return qs
-
-    def get_ordering(self):
-        """Update session for ordering parameter from request.
-        Return ordering value stored in session or id as a default.
-        """
-        self.request.session = update_ordering(params=self.request.GET,
-                                               session=self.request.session)
-        return self.request.session.get('ordering', 'id')
+    filterset_class = ClientFilter
+    query_budget = 4
 
 
 class ClientCreateView(SuccessMessageMixin, LoginRequiredMixin,
@@ -58,11 +45,17 @@ class ClientCreateView(SuccessMessageMixin, LoginRequiredMixin,
 
 
 class ClientDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
-    """Provide information about client."""
+    """Provide information about client with issued specifications."""
     model = Client
+    queryset = Client.objects.prefetch_related(
+        Prefetch('issued_specifications',
+                 queryset=SpecificationIssued.objects.select_related('product').only(
+                     'id', 'client', 'date_of_issue', 'product__id', 'product__product_sap_id',
+                     'product__description')))
     template_name = 'client_detail.html'
     login_url = 'users:user-login'
     permission_required = ('clients.view_client', )
+    query_budget = 4
 
 
 class ClientUpdateView(SuccessMessageMixin, LoginRequiredMixin,
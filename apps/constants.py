@@ -1,11 +1,53 @@
 PRODUCT_SAP_DIGITS = 7
 ORDER_SAP_DIGITS = 8
 CLIENT_SAP_DIGITS = 7
+SAP_ID_SUBSTRING_SEARCH_MARK = '*'
 
 FLOAT_DEFAULT = 1.0
 INT_DEFAULT = 1
 
 PAGINATION_LINKS_MAX_COUNT = 20
 PAGINATION_OBJ_COUNT_PER_PAGE = 10
+PAGINATION_MODES = ('offset', 'keyset', )
+PAGINATION_MODE_DEFAULT = 'offset'
+PAGINATION_COUNT_CACHE_TIMEOUT = 15 * 60
+FILTER_STATE_MODES = ('session', 'token', )
+FILTER_STATE_MODE_DEFAULT = 'session'
+APPROXIMATE_COUNT_THRESHOLD = 100000
+
+EXPORT_FORMATS = ('csv', 'xlsx', )
+EXPORT_ORDERS_PAGE_SIZE = 500
+EXPORT_FETCH_CHUNK_SIZE = 2000
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_BATCH_SIZE = 500
+IMPORT_ERRORS_SHOWN_COUNT = 20
+SYNC_BATCH_SIZE = 500
+MEASUREMENTS_BATCH_SIZE = 500
+SUBGROUPS_REBUILD_CHUNK_SIZE = 500
+VERDICTS_CHUNK_SIZE = 500
+# absolute slack of tolerance limits comparison, absorbs floating point error of target -/+ tolerance
+TOLERANCE_EPSILON = 1e-9
+ARCHIVE_CHUNK_SIZE = 500
+ARCHIVE_OPEN_COLUMNS_COUNT = 1024
+# device readings ingestion: buffered measurements written by batched insert, flush interval in seconds
+INGEST_BUFFER_SIZE = 500
+INGEST_FLUSH_INTERVAL = 1.0
+INGEST_MAX_READINGS = 1000
+# device tokens expire after 30 days (in seconds), devices get new token issued by issue_device_token command
+DEVICE_TOKEN_MAX_AGE = 30 * 24 * 60 * 60
+# measurement reports with more pallets are edited in virtualized grid by default
+MEASUREMENT_EDITING_MODES = ('forms', 'grid', )
+MEASUREMENT_GRID_EDITING_THRESHOLD = 50
+MEASUREMENT_UNITS = {'pallet_number': '-----', 'flat_crush_resistance_target': 'N/mm', 'moisture_content_target': '%',
+                     'weight': 'kg', 'remarks': '', }
+MEASUREMENT_UNIT_DEFAULT = 'mm'
+# specification dimensions with tolerances given in percent of target (see specification PDF)
+PERCENT_TOLERANCE_DIMENSIONS = ('flat_crush_resistance', 'moisture_content', )
+# disk cache of rendered PDF documents, size limit in bytes
+PDF_CACHE_SIZE_LIMIT = 256 * 1024 * 1024
+# background PDF rendering: concurrent rendering processes, timeout of rendering attempt in seconds
+PDF_RENDER_POOL_SIZE = 2
+PDF_RENDER_TIMEOUT = 60
+PDF_RENDER_RETRIES = 2
 
 STRFTIME_DATE = '%Y-%m-%d'
@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+import django_filters
+from django.contrib.sessions.backends.base import SessionBase
+from django.core import signing
+from django.http import QueryDict
+
+FILTER_STATE_PARAM = 'state'
+FILTER_STATE_SALT = 'apps.filter_state'
+
+
+def encode_filter_state(state: dict) -> str:
+    """Sign non empty filter state values into compact url safe token."""
+    return signing.dumps({name: value for name, value in state.items() if value not in ('', None)},
+                         salt=FILTER_STATE_SALT, compress=True)
+
+
+def decode_filter_state(token: Optional[str]) -> Optional[dict]:
+    """Return filter state or None for missing or tampered token."""
+    if not token:
+        return None
+    try:
+        state = signing.loads(token, salt=FILTER_STATE_SALT)
+    except signing.BadSignature:
+        return None
+    return state if isinstance(state, dict) else None
+
+
+class StatefulFilterSet(django_filters.FilterSet):
+    """Filter set able to restore its data & ordering from signed filter state token
+    instead of session, so listing does not write session.
+    """
+    @classmethod
+    def get_state_fields(cls) -> List[str]:
+        """Names of request parameters kept in filter state."""
+        return list(cls.base_filters) + ['ordering']
+
+    @classmethod
+    def get_initial_state(cls) -> dict:
+        """Filter state set by clear filters parameter."""
+        return {}
+
+    @classmethod
+    def get_state(cls, params: "QueryDict", session: "SessionBase") -> dict:
+        """
+        Resolve filter state from signed token or legacy session values (read only).
+        Request parameters take precedence over resolved state.
+        :param params:      request query parameters
+        :param session:     Django session reference
+        :return:            filter state
+        """
+        state = decode_filter_state(params.get(FILTER_STATE_PARAM))
+        if state is None:
+            state = {name: session[name] for name in cls.get_state_fields() if session.get(name) not in ('', None)}
+        if 'clear_filters' in params:
+            state = cls.get_initial_state()
+        state.update({name: params[name] for name in cls.get_state_fields() if name in params})
+        return state
+
+    @classmethod
+    def from_state(cls, params: "QueryDict", session: "SessionBase", queryset=None) -> "StatefulFilterSet":
+        """Create filter set for resolved filter state. Encoded state is available in state_token attribute."""
+        state = cls.get_state(params, session)
+        filterset = cls(state, queryset=queryset)
+        filterset.state = state
+        filterset.state_token = encode_filter_state(state)
+        return filterset
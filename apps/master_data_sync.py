@@ -0,0 +1,145 @@
+import hashlib
+from timeit import default_timer
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Type
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Model
+
+from apps.constants import SYNC_BATCH_SIZE
+from apps.paginators import invalidate_pagination_counts
+from apps.sap_extracts import read_extract_rows, get_extract_format, EXTRACT_FORMATS
+from apps.user_texts import IMPORT_MSG
+
+
+class SyncResult:
+    """SAP ids of created & updated records, counts of unchanged records & records
+    missing in extract, errors of rejected rows as (row number, message) pairs.
+    """
+    def __init__(self):
+        self.created: List[int] = []
+        self.updated: List[int] = []
+        self.unchanged = 0
+        self.missing = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def rejected(self) -> int:
+        return len({row_number for row_number, _ in self.errors})
+
+
+class MasterDataSync:
+    """Synchronize model with SAP master data extract keyed on SAP id.
+    Records are compared by hashes of their values, so only new & changed rows are written:
+    inserts with bulk create & updates with bulk update (upsert split in two statements).
+    Records missing in extract are reported only, they may be referenced by orders.
+    """
+    def __init__(self, model: Type["Model"], key_field: str, fields: Sequence[str], batch_size: int = SYNC_BATCH_SIZE):
+        self.model = model
+        self.key_field = key_field
+        self.fields = tuple(fields)
+        self.batch_size = batch_size
+
+    @staticmethod
+    def get_digest(values: Sequence) -> str:
+        return hashlib.sha1(repr(tuple(values)).encode('utf-8')).hexdigest()
+
+    def clean_record(self, record: Any) -> Tuple[Optional[dict], List[str]]:
+        """Validate record with model fields validators, blank values of nullable fields become None."""
+        if not isinstance(record, dict):
+            return None, [IMPORT_MSG['invalid_row']]
+        record = {str(key).strip(): value for key, value in record.items()}
+        values, errors = {}, []
+        for name in (self.key_field, ) + self.fields:
+            field = self.model._meta.get_field(name)
+            value = record.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in ('', None) and field.null:
+                values[name] = None
+                continue
+            try:
+                values[name] = field.clean(value, None)
+            except ValidationError as error:
+                errors.extend(f"{field.verbose_name}: {message}" for message in error.messages)
+        return (None if errors else values), errors
+
+    def sync(self, rows: Iterable[Tuple[int, Any]]) -> SyncResult:
+        """
+        Apply extract rows in single transaction, report what changed.
+        Bulk operations do not send model signals, so cached list counts are invalidated explicitly.
+        :param rows:    (row number, record) pairs, e.g. from read_extract_rows
+        """
+        existing = {key: (pk, self.get_digest(values)) for pk, key, *values in
+                    self.model.objects.values_list('pk', self.key_field, *self.fields).iterator()}
+        result, seen, to_create, to_update = SyncResult(), set(), [], []
+        with transaction.atomic():
+            for row_number, record in rows:
+                values, errors = self.clean_record(record)
+                if values is not None and values[self.key_field] in seen:
+                    errors = [IMPORT_MSG['duplicated_record']]
+                if errors:
+                    result.errors.extend((row_number, message) for message in errors)
+                    continue
+                key = values[self.key_field]
+                seen.add(key)
+                if key not in existing:
+                    to_create.append(self.model(**values))
+                    result.created.append(key)
+                elif existing[key][1] != self.get_digest(values[name] for name in self.fields):
+                    to_update.append(self.model(pk=existing[key][0], **values))
+                    result.updated.append(key)
+                else:
+                    result.unchanged += 1
+                if len(to_create) + len(to_update) >= self.batch_size:
+                    self.flush(to_create, to_update)
+            self.flush(to_create, to_update)
+        result.missing = len(existing.keys() - seen)
+        if result.created or result.updated:
+            invalidate_pagination_counts(self.model)
+        return result
+
+    def flush(self, to_create: List["Model"], to_update: List["Model"]) -> None:
+        self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+        self.model.objects.bulk_update(to_update, fields=self.fields, batch_size=self.batch_size)
+        to_create.clear()
+        to_update.clear()
+
+
+class MasterDataSyncCommand(BaseCommand):
+    """Base of SAP master data sync commands, subclasses set model, key field & synchronized fields."""
+    model: Type["Model"] = None
+    key_field: str = None
+    fields: Sequence[str] = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="SAP master data extract file.")
+        parser.add_argument('--format', choices=sorted(set(EXTRACT_FORMATS.values())),
+                            help="File format, detected from file extension by default.")
+        parser.add_argument('--dry-run', action='store_true', help="Report changes without saving them.")
+
+    def handle(self, *args, **options):
+        extract_format = options['format'] or get_extract_format(options['path'])
+        if extract_format is None:
+            raise CommandError(f"Unknown format of {options['path']}, use --format option.")
+        start = default_timer()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as file, transaction.atomic():
+                result = MasterDataSync(self.model, self.key_field, self.fields).sync(
+                    read_extract_rows(file, extract_format))
+                transaction.set_rollback(options['dry_run'])
+        except OSError as error:
+            raise CommandError(error)
+        for row_number, message in result.errors:
+            self.stdout.write(self.style.WARNING(f"row {row_number}: {message}"))
+        if options['verbosity'] > 1:
+            for label, keys in (('created', result.created), ('updated', result.updated)):
+                for key in keys:
+                    self.stdout.write(f"{label}: {key}")
+        summary = f"{self.model._meta.verbose_name_plural}: created {len(result.created)}, " \
+                  f"updated {len(result.updated)}, unchanged {result.unchanged}, " \
+                  f"missing in extract {result.missing}, rejected {result.rejected} rows " \
+                  f"in {default_timer() - start:.2f} s"
+        self.stdout.write(self.style.SUCCESS(f"{summary} (dry run, nothing saved)." if options['dry_run']
+                                             else f"{summary}."))
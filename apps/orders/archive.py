@@ -0,0 +1,210 @@
+import functools
+import itertools
+import logging
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+
+from apps.constants import ARCHIVE_CHUNK_SIZE, ARCHIVE_OPEN_COLUMNS_COUNT, MEASUREMENTS_BATCH_SIZE
+from apps.orders.models import Measurement, MeasurementArchive, MeasurementReport, Order
+
+logger = logging.getLogger(__name__)
+
+# report reference kept in archive files, so pointers can be rebuilt from them
+REPORT_COLUMN = 'measurement_report_id'
+STRFTIME_PARTITION = '%Y-%m'
+# published segment directory or temporary directory reserving segment number
+SEGMENT_NAME = re.compile(r'^\.?(\d+)(?:-|$)')
+
+
+def get_archive_columns() -> Dict[str, str]:
+    """Archived measurement columns & their array dtype. Nullable integers are kept as floats with NaN,
+    text columns as fixed width unicode sized by segment content.
+    """
+    columns = {REPORT_COLUMN: 'int64'}
+    for field in Measurement._meta.concrete_fields:
+        if field.is_relation:
+            continue
+        if field.get_internal_type() in ('CharField', 'TextField'):
+            columns[field.attname] = 'U'
+        elif field.get_internal_type() == 'FloatField' or field.null:
+            columns[field.attname] = 'float64'
+        else:
+            columns[field.attname] = 'int64'
+    return columns
+
+
+def get_partition(date_of_production) -> str:
+    return date_of_production.strftime(STRFTIME_PARTITION)
+
+
+def get_segment_path(partition: str, segment: int) -> str:
+    return os.path.join(settings.MEASUREMENTS_ARCHIVE_ROOT, partition, f'{segment:06}')
+
+
+def to_array(values: Iterable, dtype: str) -> np.ndarray:
+    if dtype == 'U':
+        return np.array(['' if value is None else value for value in values], dtype=str).reshape(-1)
+    return np.array([np.nan if value is None else value for value in values], dtype=dtype).reshape(-1)
+
+
+def write_segment(partition: str, columns: Dict[str, np.ndarray]) -> (int, str):
+    """
+    Write columns as new immutable segment of monthly partition to temporary directory, published
+    by publish_segment, so readers never see incomplete segment. Segment number is reserved
+    by temporary directory name until segment is published or discarded.
+    Archiving is expected to run in single process.
+    :return:    segment number & temporary directory of segment
+    """
+    partition_path = os.path.join(settings.MEASUREMENTS_ARCHIVE_ROOT, partition)
+    os.makedirs(partition_path, exist_ok=True)
+    segments = [SEGMENT_NAME.match(name) for name in os.listdir(partition_path)]
+    segment = max([int(match.group(1)) for match in segments if match is not None], default=0) + 1
+    temporary_path = tempfile.mkdtemp(prefix=f'.{segment:06}-', dir=partition_path)
+    for name, values in columns.items():
+        np.save(os.path.join(temporary_path, f'{name}.npy'), values)
+    return segment, temporary_path
+
+
+def publish_segment(partition: str, segment: int, temporary_path: str) -> None:
+    os.rename(temporary_path, get_segment_path(partition, segment))
+
+
+@functools.lru_cache(maxsize=ARCHIVE_OPEN_COLUMNS_COUNT)
+def open_column(path: str) -> np.ndarray:
+    """Memory-map column file, segments never change, so mapped files are reused."""
+    return np.load(path, mmap_mode='r')
+
+
+def read_pointer_columns(pointer: MeasurementArchive, columns: List[str]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Read columns of archived report measurements, only requested rows of mapped files are loaded.
+    :return:    columns, None if segment is missing or has not all rows of pointer (measurements are in database)
+    """
+    path = get_segment_path(pointer.partition, pointer.segment)
+    try:
+        data = {column: np.asarray(open_column(os.path.join(path, f'{column}.npy'))
+                                   [pointer.offset:pointer.offset + pointer.count]) for column in columns}
+    except FileNotFoundError:
+        data = None
+    if data is None or any(len(values) != pointer.count for values in data.values()):
+        logger.warning("Segment %s of partition %s has not archived measurements of report %s, "
+                       "database rows are read", pointer.segment, pointer.partition, pointer.measurement_report_id)
+        return None
+    return data
+
+
+def read_columns(pointers: Iterable[MeasurementArchive], columns: List[str]) -> Dict[str, np.ndarray]:
+    """Read columns of archived reports measurements, reports of unreadable segments are skipped."""
+    slices = {column: [] for column in columns}
+    for data in filter(None, (read_pointer_columns(pointer, columns) for pointer in pointers)):
+        for column in columns:
+            slices[column].append(data[column])
+    return {column: np.concatenate(values) if values else np.array([]) for column, values in slices.items()}
+
+
+def load_archived_readings(report_ids: Iterable[int], columns: List[str]) -> (np.ndarray, np.ndarray):
+    """
+    Read numeric columns of archived measurements of reports.
+    :return:    report id of each row & readings array shaped (rows, columns)
+    """
+    pointers = MeasurementArchive.objects.filter(measurement_report_id__in=list(report_ids))
+    data = read_columns(pointers, [REPORT_COLUMN] + columns)
+    readings = np.column_stack([data[column].astype(float) for column in columns]).reshape(-1, len(columns))
+    return data[REPORT_COLUMN].astype(int), readings
+
+
+def get_archived_measurements(pointer: MeasurementArchive) -> Optional[List[Measurement]]:
+    """
+    Restore archived measurements of report as unsaved model instances, in original order.
+    :return:    measurements, None if archive segment is not readable
+    """
+    columns = get_archive_columns()
+    data = read_pointer_columns(pointer, list(columns))
+    if data is None:
+        return None
+    measurements = []
+    for row in zip(*(data[column].tolist() for column in columns)):
+        values = {}
+        for (column, dtype), value in zip(columns.items(), row):
+            field = Measurement._meta.get_field(column) if column != REPORT_COLUMN else None
+            if dtype == 'U':
+                value = value or (None if field.null else '')
+            elif dtype == 'float64' and field.get_internal_type() != 'FloatField':
+                value = None if np.isnan(value) else int(value)
+            values[column] = value
+        measurements.append(Measurement(**values))
+    return measurements
+
+
+def get_closed_order_ids(order_ids: Iterable[int]) -> Set[int]:
+    """Orders of ids not accepting measurements: closed or with archived measurement report."""
+    return set(Order.objects.filter(Q(status='Done') | Q(measurement_report__archive__isnull=False),
+                                    id__in=list(order_ids)).values_list('id', flat=True))
+
+
+def get_report_measurements(measurement_report: MeasurementReport) -> List[Measurement]:
+    """Measurements of report read from archive or database (not archived or unreadable segment)."""
+    try:
+        measurements = get_archived_measurements(measurement_report.archive)
+    except MeasurementArchive.DoesNotExist:
+        measurements = None
+    return list(measurement_report.measurements.all()) if measurements is None else measurements
+
+
+def archive_reports(partition: str, report_ids: List[int]) -> int:
+    """
+    Move measurements of reports to new segment of partition & replace them with pointers.
+    Archived rows are locked until transaction ends & only they are deleted, so rows inserted meanwhile
+    are kept in database. Segment is published when transaction is committed & discarded when it fails.
+    Segment of transaction rolled back by outer atomic block stays unpublished, its pointers are rolled back too.
+    :return:    number of archived measurements
+    """
+    columns = get_archive_columns()
+    temporary_path = None
+    try:
+        with transaction.atomic():
+            rows = list(Measurement.objects.select_for_update().filter(measurement_report_id__in=report_ids)
+                        .order_by(REPORT_COLUMN, 'id').values_list(*columns))
+            data = {column: to_array((row[index] for row in rows), dtype)
+                    for index, (column, dtype) in enumerate(columns.items())}
+            segment, temporary_path = write_segment(partition, data)
+            transaction.on_commit(functools.partial(publish_segment, partition, segment, temporary_path))
+            sorted_report_ids = np.array(sorted(report_ids))
+            offsets = np.searchsorted(data[REPORT_COLUMN], sorted_report_ids, side='left')
+            ends = np.searchsorted(data[REPORT_COLUMN], sorted_report_ids, side='right')
+            pointers = [MeasurementArchive(measurement_report_id=report_id, partition=partition, segment=segment,
+                                           offset=offset, count=end - offset)
+                        for report_id, offset, end in zip(sorted_report_ids.tolist(), offsets.tolist(), ends.tolist())]
+            MeasurementArchive.objects.bulk_create(pointers, batch_size=MEASUREMENTS_BATCH_SIZE)
+            archived_ids = data['id'].astype(int).tolist()
+            for index in range(0, len(archived_ids), MEASUREMENTS_BATCH_SIZE):
+                Measurement.objects.filter(id__in=archived_ids[index:index + MEASUREMENTS_BATCH_SIZE]).delete()
+    except Exception:
+        if temporary_path is not None:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+        raise
+    return len(rows)
+
+
+def archive_orders(orders: QuerySet, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> (int, int):
+    """
+    Archive measurements of closed, not archived orders of queryset, partitioned by month of production.
+    :return:    number of archived reports & measurements
+    """
+    reports = MeasurementReport.objects.filter(order__in=orders, order__status='Done', archive__isnull=True).order_by(
+        'order__date_of_production', 'id').values_list('id', 'order__date_of_production')
+    reports_count = measurements_count = 0
+    for partition, partition_reports in itertools.groupby(reports, key=lambda report: get_partition(report[1])):
+        report_ids = [report_id for report_id, _ in partition_reports]
+        for index in range(0, len(report_ids), chunk_size):
+            measurements_count += archive_reports(partition, report_ids[index:index + chunk_size])
+        reports_count += len(report_ids)
+    return reports_count, measurements_count
@@ -0,0 +1,113 @@
+import logging
+from collections import namedtuple
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.db.models import QuerySet
+
+from apps.orders.archive import get_report_measurements
+from apps.orders.models import Measurement, Order
+from apps.orders.pivot import get_measurements_pivot
+from apps.orders.spc import to_number
+from apps.orders.verdicts import VERDICT_DIMENSIONS, find_failing_dimensions, get_specification_limits, \
+    get_verdict_columns
+from apps.pdf_cache import get_model_values, get_pdf_key
+from apps.pdf_jobs import render_pdfs
+from apps.products.models import Specification
+from apps.user_texts import LABELS
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATE_TEMPLATE = 'certificate_to_pdf.html'
+# measurement attributes not listed in pallets table of certificate
+CERTIFICATE_EXCLUDED_COLUMNS = ('remarks', )
+
+CertificateResult = namedtuple('CertificateResult', ['label', 'lsl', 'usl', 'n', 'min', 'max', 'mean',
+                                                     'failing_count'])
+
+
+def get_closed_orders() -> QuerySet:
+    """Closed orders with measurement report & all data of their certificates fetched in two queries."""
+    return Order.objects.filter(status='Done', measurement_report__isnull=False) \
+        .select_related('client', 'product', 'product__specification', 'measurement_report',
+                        'measurement_report__archive') \
+        .prefetch_related('measurement_report__measurements')
+
+
+def get_order_specification(order: Order) -> Optional[Specification]:
+    try:
+        return order.product.specification
+    except Specification.DoesNotExist:
+        return None
+
+
+def get_certificate_results(measurements: List[Measurement],
+                            specification: Optional[Specification]) -> List[CertificateResult]:
+    """Readings summary of each verdict dimension against specification limits, all dimensions in one pass."""
+    columns = get_verdict_columns()
+    readings = np.array([[np.nan if getattr(measurement, column) is None else getattr(measurement, column)
+                          for column in columns] for measurement in measurements],
+                        dtype=float).reshape(len(measurements), len(columns))
+    limits = get_specification_limits(specification)
+    failing_counts = find_failing_dimensions(readings, limits[np.newaxis]).sum(axis=0)
+    results, start = [], 0
+    for index, (dimension, dimension_columns) in enumerate(VERDICT_DIMENSIONS.items()):
+        values = readings[:, start:start + len(dimension_columns)]
+        values = values[~np.isnan(values)]
+        start += len(dimension_columns)
+        results.append(CertificateResult(
+            label=LABELS['verdict'][dimension], lsl=to_number(limits[index, 0]), usl=to_number(limits[index, 1]),
+            n=len(values), min=to_number(values.min()) if len(values) else None,
+            max=to_number(values.max()) if len(values) else None,
+            mean=to_number(values.mean()) if len(values) else None, failing_count=int(failing_counts[index])))
+    return results
+
+
+def get_certificate_key(order: Order) -> str:
+    """Content key of certificate of closed order. Measurements are represented by measurements version
+    of report, so key is built without reading them (from database or archive).
+    """
+    specification = get_order_specification(order)
+    return get_pdf_key(CERTIFICATE_TEMPLATE, {
+        'order': get_model_values(order), 'client': get_model_values(order.client),
+        'product': get_model_values(order.product),
+        'specification': get_model_values(specification) if specification else None,
+        'measurement_report': get_model_values(order.measurement_report)})
+
+
+def get_certificate_context(order: Order) -> dict:
+    """
+    Certificate of analysis of closed order: order & product specification data, readings summary
+    of each dimension & measurements table (row per pallet) with tolerance flags.
+    """
+    measurement_report = order.measurement_report
+    measurements = get_report_measurements(measurement_report)
+    specification = get_order_specification(order)
+    columns = [row for row in get_measurements_pivot(measurements, specification)
+               if row.name not in CERTIFICATE_EXCLUDED_COLUMNS]
+    return {'order': order, 'measurement_report': measurement_report, 'specification': specification,
+            'results': get_certificate_results(measurements, specification),
+            'columns': columns, 'pallets': list(zip(*(row.cells for row in columns)))}
+
+
+def get_certificate_data(order: Order) -> Tuple[str, dict]:
+    """:return:    certificate content key & rendering context"""
+    return get_certificate_key(order), get_certificate_context(order)
+
+
+def get_certificate_filename(order: Order) -> str:
+    return f'swiadectwo_jakosci_{order.order_sap_id or order.id}.pdf'
+
+
+def iter_certificates(orders: QuerySet, processes: Optional[int] = None) \
+        -> Iterator[Tuple[Order, Optional[bytes]]]:
+    """
+    Certificates of orders (see get_closed_orders) taken from PDF cache or rendered in parallel processes.
+    Certificates not rendered are logged & given as None.
+    """
+    orders = list(orders)
+    documents = [(key, CERTIFICATE_TEMPLATE, context) for key, context in map(get_certificate_data, orders)]
+    for order, content in zip(orders, render_pdfs(documents, processes=processes)):
+        if content is None:
+            logger.error("Certificate of order %s not rendered", order.order_sap_id or order.id)
+        yield order, content
@@ -0,0 +1,59 @@
+import datetime
+from typing import Optional, Tuple, Union
+
+from django.core.cache import cache
+from django.db.models import Min, Max
+
+from apps.orders.models import Order
+
+DATE_BOUNDS_CACHE_KEY = 'orders:date_of_production_bounds'
+
+DateBounds = Tuple[Optional[datetime.date], Optional[datetime.date]]
+
+
+def to_date(value: Union[str, datetime.date, None]) -> Optional[datetime.date]:
+    return Order._meta.get_field('date_of_production').to_python(value)
+
+
+def get_date_of_production_bounds() -> DateBounds:
+    """Return min & max production date of all orders.
+    Bounds are aggregated once and kept in cache, order signals keep them up to date.
+    Bulk queryset updates do not send signals and have to invalidate bounds explicitly.
+    """
+    bounds = cache.get(DATE_BOUNDS_CACHE_KEY)
+    if bounds is None:
+        aggregated = Order.objects.aggregate(Min('date_of_production'), Max('date_of_production'))
+        bounds = (aggregated['date_of_production__min'], aggregated['date_of_production__max'])
+        cache.set(DATE_BOUNDS_CACHE_KEY, bounds, timeout=None)
+    return bounds
+
+
+def invalidate_date_of_production_bounds() -> None:
+    cache.delete(DATE_BOUNDS_CACHE_KEY)
+
+
+def extend_date_of_production_bounds(date: Union[str, datetime.date]) -> None:
+    """Widen cached bounds for new production date. Missing bounds are aggregated lazily."""
+    bounds = cache.get(DATE_BOUNDS_CACHE_KEY)
+    if bounds is None:
+        return
+    date, (date_min, date_max) = to_date(date), bounds
+    cache.set(DATE_BOUNDS_CACHE_KEY, (min(date, date_min or date), max(date, date_max or date)), timeout=None)
+
+
+def update_date_of_production_bounds(previous_date: Union[str, datetime.date, None],
+                                     date: Union[str, datetime.date, None]) -> None:
+    """
+    Update cached bounds incrementally for changed order production date.
+    Bounds are invalidated only when order holding min or max date moved or disappeared.
+    :param previous_date:   production date stored in db before change, None for new orders
+    :param date:            production date stored in db after change, None for deleted orders
+    """
+    bounds = cache.get(DATE_BOUNDS_CACHE_KEY)
+    if bounds is None:
+        return
+    previous_date, date = to_date(previous_date), to_date(date)
+    if previous_date is not None and previous_date != date and previous_date in bounds:
+        invalidate_date_of_production_bounds()
+    elif date is not None:
+        extend_date_of_production_bounds(date)
@@ -0,0 +1,57 @@
+from typing import Iterator
+
+from django.db.models import QuerySet
+
+from apps.constants import EXPORT_ORDERS_PAGE_SIZE, EXPORT_FETCH_CHUNK_SIZE
+from apps.orders.archive import get_archived_measurements
+from apps.orders.models import Order, MeasurementArchive
+from apps.paginators import KeysetPaginator
+from apps.user_texts import EXPORT_HEADERS
+
+ORDER_COLUMNS = ('order_sap_id', 'client__client_sap_id', 'client__client_name', 'product__product_sap_id',
+                 'product__index', 'product__description', 'date_of_production', 'status',
+                 'measurement_report__author', 'measurement_report__date_of_control', )
+MEASUREMENT_COLUMNS = ('pallet_number',
+                       'internal_diameter_tolerance_top', 'internal_diameter_target',
+                       'internal_diameter_tolerance_bottom',
+                       'external_diameter_tolerance_top', 'external_diameter_target',
+                       'external_diameter_tolerance_bottom',
+                       'length_tolerance_top', 'length_target', 'length_tolerance_bottom',
+                       'flat_crush_resistance_target', 'moisture_content_target', 'weight', 'remarks', )
+EXPORT_COLUMNS = ORDER_COLUMNS + tuple(f'measurement_report__measurements__{column}'
+                                       for column in MEASUREMENT_COLUMNS)
+EXPORT_HEADER = tuple(EXPORT_HEADERS['order'][column] for column in ORDER_COLUMNS + MEASUREMENT_COLUMNS)
+
+
+def iter_order_export_rows(orders: "QuerySet", ordering: str = 'id') -> Iterator[tuple]:
+    """
+    Yield filtered orders joined with measurement report & measurements, one row per measurement.
+    Orders without measurements give single row. Orders are walked in keyset pages and rows
+    of each page are fetched in chunks, so memory use does not depend on exported period
+    (also on MySQL drivers which buffer whole result of single query).
+    Archived measurements are read from archive in place of single row of archived order,
+    database rows are used when archive segment is not readable.
+    :param orders:      filtered orders queryset
+    :param ordering:    order list ordering
+    """
+    status_display = dict(Order.STATUS_CHOICES)
+    status_index = ORDER_COLUMNS.index('status')
+    paginator = KeysetPaginator(orders, EXPORT_ORDERS_PAGE_SIZE, ordering=ordering)
+    descending = '-' if ordering.startswith('-') else ''
+    row_ordering = [f'{descending}id', 'measurement_report__measurements__id']
+    if paginator.field_name not in ('id', 'pk'):
+        row_ordering.insert(0, ordering)
+    for page in paginator.pages():
+        order_ids = [order.pk for order in page]
+        archived = {pointer.measurement_report.order_id: pointer for pointer in MeasurementArchive.objects.filter(
+            measurement_report__order_id__in=order_ids).select_related('measurement_report')}
+        rows = Order.objects.filter(pk__in=order_ids).order_by(*row_ordering)
+        for order_id, *row in rows.values_list('id', *EXPORT_COLUMNS).iterator(chunk_size=EXPORT_FETCH_CHUNK_SIZE):
+            order_row = tuple(row[:status_index]) + (status_display.get(row[status_index]), ) + \
+                tuple(row[status_index + 1:len(ORDER_COLUMNS)])
+            measurements = get_archived_measurements(archived[order_id]) if order_id in archived else None
+            if measurements is None:
+                yield order_row + tuple(row[len(ORDER_COLUMNS):])
+                continue
+            for measurement in measurements or [None]:
+                yield order_row + tuple(getattr(measurement, column, None) for column in MEASUREMENT_COLUMNS)
@@ -1,17 +1,32 @@
 import django_filters
 
+from apps.constants import ORDER_SAP_DIGITS, PRODUCT_SAP_DIGITS
+from apps.filter_state import StatefulFilterSet
 from apps.orders.models import Order
+from apps.sap_filters import SapIdPrefixFilter
 
 
-class OrderFilter(django_filters.FilterSet):
+class OrderFilter(StatefulFilterSet):
     client_name = django_filters.CharFilter(field_name='client__client_name', lookup_expr='icontains')
-    order_sap_id = django_filters.CharFilter(lookup_expr='icontains')
-    product_sap_id = django_filters.CharFilter(field_name='product__product_sap_id', lookup_expr='icontains')
+    order_sap_id = SapIdPrefixFilter(digits=ORDER_SAP_DIGITS)
+    product_sap_id = SapIdPrefixFilter(field_name='product__product_sap_id', digits=PRODUCT_SAP_DIGITS)
     date_of_production = django_filters.DateTimeFromToRangeFilter(lookup_expr='range')
     description = django_filters.CharFilter(field_name='product__description', lookup_expr='icontains')
-    status = django_filters.ChoiceFilter(choices=Order.STATUS_CHOICES, lookup_expr='iexact')
+    status = django_filters.ChoiceFilter(choices=Order.STATUS_CHOICES, lookup_expr='exact')
+    verdict = django_filters.ChoiceFilter(choices=Order.VERDICT_CHOICES, lookup_expr='exact')
 
     class Meta:
         model = Order
         fields = ('client_name', 'order_sap_id', 'product_sap_id',
-                  'date_of_production', 'description', 'status', )
+                  'date_of_production', 'description', 'status', 'verdict', )
+
+    @classmethod
+    def get_state_fields(cls):
+        date_range_fields = ['date_of_production_after', 'date_of_production_before']
+        return [name for name in super().get_state_fields() if name != 'date_of_production'] + date_range_fields
+
+    @classmethod
+    def get_initial_state(cls):
+        """Show orders from current date when filters are cleared."""
+        return {'date_of_production_after': Order.get_date_of_production('today'),
+                'date_of_production_before': Order.get_date_of_production('max')}
@@ -1,14 +1,20 @@
+import codecs
+from typing import List, Optional
+
 from django import forms
 from django.forms import ModelForm
 from django.forms.models import inlineformset_factory, BaseInlineFormSet
+from django.utils.functional import cached_property
 
 from bootstrap_datepicker_plus import DatePickerInput
 
 from apps.form_styles import SAP_STYLE, NUM_STYLE_NO_REQ, BASIC_NO_HINTS_STYLE, INPUT_MEASUREMENT_FORM_STYLE_50px, \
     INPUT_MEASUREMENT_FORM_STYLE_70px, INPUT_MEASUREMENT_FORM_STYLE_71px, ORDER_SAP_STYLE, NUM_STYLE, BASIC_REQ_STYLE, \
     INT_STYLE, PALLET_NUMBER_STYLE
+from apps.orders.grid_validation import MeasurementGrid
 from apps.orders.models import Order, MeasurementReport, Measurement
-from apps.user_texts import HINTS, LABELS, ERROR_MSG, FORMSET_MSG
+from apps.sap_extracts import get_extract_format
+from apps.user_texts import HINTS, LABELS, ERROR_MSG, FORMSET_MSG, IMPORT_MSG
 from cx_quality_control.settings import LANGUAGE_CODE
 
 
@@ -93,11 +99,24 @@ class MeasurementForm(ModelForm):
 
 
 class MeasurementInlineFormSet(BaseInlineFormSet):
-    """Measurement inline formset customization."""
+    """Measurement inline formset customization.
+    Submitted grid is validated in batch (see MeasurementGrid), measurement forms are built
+    & validated one by one only to report errors or for data which is not a grid of measurement cells.
+    """
+    batch_validation = True
+
+    @cached_property
+    def grid(self) -> Optional[MeasurementGrid]:
+        if not (self.is_bound and self.batch_validation):
+            return None
+        return MeasurementGrid.from_formset(self)
+
     def is_valid(self) -> bool:
         """Extend all measurement form validation for
         pallet number uniqueness check.
         """
+        if self.grid is not None and self.grid.is_valid():
+            return True
         if not self.check_pallet_uniqueness():
             for form in self.forms[:1]:
                 form.add_error(field='pallet_number',
@@ -110,6 +129,27 @@ class MeasurementInlineFormSet(BaseInlineFormSet):
         pallet_nums = [form['pallet_number'].value() for form in self.forms]
         return len(set(pallet_nums)) == len(pallet_nums)
 
+    def get_changes(self) -> (List[Measurement], List[Measurement], set, set):
+        """Split valid formset into measurements to insert & to update.
+        :return:    new measurements, changed measurements, ids of kept measurements & names of changed fields
+        """
+        if self.grid is not None and self.grid.is_valid():
+            return self.grid.get_changes()
+        added, changed, kept_ids, changed_fields = [], [], set(), set()
+        deleted_forms = self.deleted_forms if self.can_delete else []
+        for form in self.forms:
+            if form in deleted_forms:
+                continue
+            measurement = form.save(commit=False)
+            if measurement.pk is None:
+                added.append(measurement)
+                continue
+            kept_ids.add(measurement.pk)
+            if form.has_changed():
+                changed.append(measurement)
+                changed_fields.update(form.changed_data)
+        return added, changed, kept_ids, changed_fields
+
 
 MeasurementFormSet = inlineformset_factory(parent_model=MeasurementReport, model=Measurement,
                                            form=MeasurementForm, extra=0, min_num=1, formset=MeasurementInlineFormSet)
@@ -128,3 +168,29 @@ class DateFilteringForm(forms.Form):
                                attrs={**BASIC_NO_HINTS_STYLE, **{'name': 'date_of_production_before',
                                                                  'id': 'id_date_of_production_1'}},
                                format='%Y-%m-%d'), label='Do')
+
+
+class ControlChartForm(forms.Form):
+    """Optional production date range of control chart."""
+    date_of_production_after = forms.DateField(required=False)
+    date_of_production_before = forms.DateField(required=False)
+
+
+class OrderImportForm(forms.Form):
+    """Upload form for SAP orders export file."""
+    file = forms.FileField(label=LABELS['order_import']['file'], widget=forms.FileInput(attrs=BASIC_REQ_STYLE))
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if get_extract_format(file.name) is None:
+            raise forms.ValidationError(IMPORT_MSG['invalid_format'])
+        # checked before import, so import is not stopped by encoding error after some rows were saved
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for chunk in file.chunks():
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise forms.ValidationError(IMPORT_MSG['invalid_encoding'])
+        file.seek(0)
+        return file
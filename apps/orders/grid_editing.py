@@ -0,0 +1,58 @@
+from typing import List
+
+from django.core.exceptions import ValidationError
+from django.forms.formsets import DELETION_FIELD_NAME, TOTAL_FORM_COUNT
+
+from apps.constants import MEASUREMENT_UNITS, MEASUREMENT_UNIT_DEFAULT
+from apps.orders.grid_validation import is_checked
+from apps.user_texts import LABELS
+
+
+def get_grid_columns(formset) -> List[dict]:
+    """Columns of measurement grid: form field name, widget attributes (client side validation) & unit."""
+    return [{'name': name, 'attrs': field.widget.attrs, 'unit': MEASUREMENT_UNITS.get(name, MEASUREMENT_UNIT_DEFAULT)}
+            for name, field in formset.form.base_fields.items()]
+
+
+def get_submitted_rows(formset) -> (list, list, list, dict):
+    """Submitted formset rows, raw values are sent back to grid with deletion marks & errors of each form."""
+    try:
+        total_count = formset.management_form.cleaned_data[TOTAL_FORM_COUNT]
+    except ValidationError:
+        return [], [], [], {}
+    names = list(formset.form.base_fields)
+    # ids of initial forms only, grid submits rows after them as new measurements
+    initial_count = formset.initial_form_count()
+    ids, rows, deleted = [], [], []
+    for index in range(min(total_count, formset.absolute_max)):
+        prefix = formset.add_prefix(index)
+        if index < initial_count:
+            ids.append(formset.data.get(f'{prefix}-{formset.model._meta.pk.name}') or None)
+        rows.append([formset.data.get(f'{prefix}-{name}') for name in names])
+        if formset.can_delete and is_checked(formset.data.get(f'{prefix}-{DELETION_FIELD_NAME}', '')):
+            deleted.append(index)
+    errors = {index: {name: list(messages) for name, messages in form.errors.items()}
+              for index, form in enumerate(formset.forms) if form.errors}
+    return ids, rows, deleted, errors
+
+
+def get_grid_data(formset) -> dict:
+    """
+    Compact grid of measurements rendered by measurementGrid.js instead of measurement forms.
+    Grid of bound formset contains submitted values & cell errors, measurements of formset instance otherwise.
+    Rows are submitted back as formset data with management form counts, any row can be marked as deleted
+    (formset deletion field) when formset allows deletion.
+    """
+    if formset.is_bound:
+        ids, rows, deleted, errors = get_submitted_rows(formset)
+    else:
+        names = list(formset.form.base_fields)
+        measurements = formset.queryset.order_by(formset.model._meta.pk.name).values_list('id', *names)
+        ids, rows, deleted, errors = [], [], [], {}
+        for measurement_id, *values in measurements:
+            ids.append(measurement_id)
+            rows.append(values)
+    return {'prefix': formset.prefix, 'columns': get_grid_columns(formset), 'ids': ids, 'rows': rows,
+            'errors': errors, 'minNum': formset.min_num, 'maxNum': formset.max_num,
+            'deletionField': DELETION_FIELD_NAME if formset.can_delete else None, 'deleted': deleted,
+            'labels': LABELS['measurement_grid']}
@@ -0,0 +1,204 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.core.validators import EMPTY_VALUES
+from django.db import connection
+from django.forms import CharField, FloatField, IntegerField
+from django.forms.formsets import DELETION_FIELD_NAME, TOTAL_FORM_COUNT
+
+from apps.orders.models import Measurement
+
+# num_field validator matches str-converted floats, repr of floats out of this range uses exponent notation
+FLOAT_PLAIN_REPR_RANGE = (1e-4, 1e16)
+# integers parsed by vectorized pass, longer ones (and localized digits) are cleaned cell by cell
+PLAIN_INTEGER = re.compile(r'[0-9]{1,18}')
+
+
+def is_checked(value) -> bool:
+    """Deletion checkbox value, as read by CheckboxInput widget."""
+    if isinstance(value, str):
+        return value != '' and value.lower() != 'false'
+    return bool(value)
+
+
+def is_blank(value, form_field) -> bool:
+    if isinstance(form_field, CharField) and isinstance(value, str):
+        return value.strip() == ''
+    return value in EMPTY_VALUES
+
+
+def is_same(initial, value) -> bool:
+    """Compare values like form field has_changed, missing value equals empty one."""
+    return (initial if initial is not None else '') == (value if value is not None else '')
+
+
+def check_float_column(values: list, required: bool) -> (np.ndarray, list):
+    """
+    Parse float column in one pass & find cells certainly accepted by float form field & num_field validator.
+    :return:    mask of valid cells & parsed values
+    """
+    empty = np.array([value in EMPTY_VALUES for value in values], dtype=bool).reshape(-1)
+    try:
+        numbers = np.array([0.0 if is_empty else value for value, is_empty in zip(values, empty)],
+                           dtype=object).astype(float)
+    except (ValueError, TypeError):
+        return np.zeros(len(values), dtype=bool), [None] * len(values)
+    low, high = FLOAT_PLAIN_REPR_RANGE
+    with np.errstate(invalid='ignore'):
+        valid = ~empty & np.isfinite(numbers) & ~np.signbit(numbers) & (
+            (numbers == 0) | ((numbers >= low) & (numbers < high)))
+    if not required:
+        valid |= empty
+    return valid, [None if is_empty else number for number, is_empty in zip(numbers.tolist(), empty)]
+
+
+def check_integer_column(values: list, required: bool, min_value: Optional[int],
+                         max_value: Optional[int]) -> (np.ndarray, list):
+    """
+    Parse integer column in one pass & find cells certainly accepted by integer form field,
+    int_field validator & database range validators.
+    :return:    mask of valid cells & parsed values
+    """
+    empty = np.array([value in EMPTY_VALUES for value in values], dtype=bool).reshape(-1)
+    texts = np.array(['0' if is_empty else str(value) for value, is_empty in zip(values, empty)], dtype=str)
+    plain = np.array([PLAIN_INTEGER.fullmatch(text) is not None for text in texts.tolist()], dtype=bool)
+    numbers = np.zeros(len(values), dtype=np.int64)
+    numbers[plain] = texts[plain].astype(np.int64)
+    valid = ~empty & plain
+    if min_value is not None:
+        valid &= numbers >= min_value
+    if max_value is not None:
+        valid &= numbers <= max_value
+    if not required:
+        valid |= empty
+    return valid, [None if is_empty else number for number, is_empty in zip(numbers.tolist(), empty)]
+
+
+def clean_cell(form_field, model_field, value):
+    """Clean cell as measurement form does: form field cleaning followed by model field validation,
+    messages of model errors are overridden by form field ones of the same code.
+    """
+    value = form_field.clean(value)
+    if model_field.blank and value in model_field.empty_values:
+        return value
+    try:
+        return model_field.clean(value, None)
+    except ValidationError as e:
+        for error in e.error_list:
+            if error.code in form_field.error_messages:
+                error.message = form_field.error_messages[error.code]
+        raise
+
+
+class MeasurementGrid:
+    """
+    Batch validation of measurement formset data, measurement forms are not built.
+    Grid is validated column by column: numeric columns are parsed & checked in vectorized passes,
+    cells not passing them (and text cells) are cleaned by the same form & model fields as cells of measurement
+    form, so cleaned values & error messages are the same as of formset validation.
+    Unchanged extra rows & rows marked as deleted are not validated, as in formset.
+    """
+    def __init__(self, formset, indexes: List[int], instances: List[Optional[Measurement]],
+                 columns: Dict[str, list], pallet_numbers: list):
+        self.formset = formset
+        self.indexes = indexes
+        self.instances = instances
+        self.columns = columns
+        self.pallet_numbers = pallet_numbers
+        self.cleaned_data: Dict[str, list] = {}
+        self.errors: Dict[int, Dict[str, List[str]]] = {}
+        self._is_valid = None
+
+    @classmethod
+    def from_formset(cls, formset) -> Optional["MeasurementGrid"]:
+        """
+        Read submitted grid of bound formset.
+        :return:    grid or None for data which is not a grid of measurement cells
+                    (tampered management form, unknown or repeated measurement ids)
+        """
+        try:
+            total_count = formset.management_form.cleaned_data[TOTAL_FORM_COUNT]
+        except ValidationError:
+            return None
+        if total_count > formset.absolute_max:
+            return None
+        initial_count = formset.initial_form_count()
+        existing = {str(measurement.pk): measurement for measurement in formset.get_queryset()} \
+            if initial_count else {}
+        form_fields = formset.form.base_fields
+        data, pk_name, fk_name = formset.data, formset.model._meta.pk.name, formset.fk.name
+        indexes, instances, pallet_numbers, seen_ids = [], [], [], set()
+        columns = {name: [] for name in form_fields}
+        for index in range(total_count):
+            prefix = formset.add_prefix(index)
+            values = {name: data.get(f'{prefix}-{name}') for name in form_fields}
+            pallet_numbers.append(values['pallet_number'])
+            fk_value, pk = data.get(f'{prefix}-{fk_name}'), data.get(f'{prefix}-{pk_name}')
+            if fk_value not in EMPTY_VALUES and str(fk_value) != str(formset.instance.pk):
+                return None
+            instance = None
+            if index < initial_count:
+                instance = existing.get(str(pk))
+                if instance is None or instance.pk in seen_ids:
+                    return None
+                seen_ids.add(instance.pk)
+            elif pk not in EMPTY_VALUES:
+                return None
+            if formset.can_delete and is_checked(data.get(f'{prefix}-{DELETION_FIELD_NAME}', '')):
+                continue
+            if index >= initial_count and index >= formset.min_num and \
+                    all(is_blank(value, form_fields[name]) for name, value in values.items()):
+                continue
+            indexes.append(index)
+            instances.append(instance)
+            for name, value in values.items():
+                columns[name].append(value)
+        return cls(formset, indexes, instances, columns, pallet_numbers)
+
+    def is_valid(self) -> bool:
+        """Validate all columns & pallet numbers uniqueness (checked for every submitted row as in formset)."""
+        if self._is_valid is None:
+            for name, values in self.columns.items():
+                self.cleaned_data[name] = self.clean_column(name, values)
+            self._is_valid = not self.errors and len(set(self.pallet_numbers)) == len(self.pallet_numbers)
+        return self._is_valid
+
+    def clean_column(self, name: str, values: list) -> list:
+        form_field = self.formset.form.base_fields[name]
+        model_field = Measurement._meta.get_field(name)
+        if isinstance(form_field, FloatField):
+            valid, cleaned = check_float_column(values, form_field.required)
+        elif isinstance(form_field, IntegerField):
+            min_value, max_value = connection.ops.integer_field_range(model_field.get_internal_type())
+            valid, cleaned = check_integer_column(values, form_field.required, min_value, max_value)
+        else:
+            valid, cleaned = np.zeros(len(values), dtype=bool), [None] * len(values)
+        for position in np.flatnonzero(~valid).tolist():
+            try:
+                cleaned[position] = clean_cell(form_field, model_field, values[position])
+            except ValidationError as e:
+                self.errors.setdefault(self.indexes[position], {})[name] = e.messages
+                cleaned[position] = None
+        return cleaned
+
+    def get_changes(self) -> (List[Measurement], List[Measurement], set, set):
+        """
+        Compare valid grid with measurements of formset instance.
+        :return:    new measurements, changed measurements, ids of kept measurements & names of changed fields
+        """
+        added, changed, kept_ids, changed_fields = [], [], set(), set()
+        for position, instance in enumerate(self.instances):
+            values = {name: column[position] for name, column in self.cleaned_data.items()}
+            if instance is None:
+                added.append(self.formset.model(**values))
+                continue
+            kept_ids.add(instance.pk)
+            changed_names = [name for name, value in values.items() if not is_same(getattr(instance, name), value)]
+            if changed_names:
+                for name in changed_names:
+                    setattr(instance, name, values[name])
+                changed.append(instance)
+                changed_fields.update(changed_names)
+        return added, changed, kept_ids, changed_fields
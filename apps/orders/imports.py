@@ -0,0 +1,115 @@
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.clients.models import Client
+from apps.constants import IMPORT_CHUNK_SIZE, IMPORT_BATCH_SIZE
+from apps.orders.date_bounds import extend_date_of_production_bounds
+from apps.orders.models import Order
+from apps.paginators import invalidate_pagination_counts
+from apps.products.models import Product
+from apps.streaming import iter_blocks
+from apps.user_texts import ERROR_MSG, IMPORT_MSG, LABELS
+
+ORDER_IMPORT_FIELDS = ('order_sap_id', 'client', 'product', 'date_of_production', 'status', 'quantity',
+                       'internal_diameter_reference', 'external_diameter_reference', 'length', )
+# SAP export column names accepted besides model field names
+ORDER_IMPORT_ALIASES = {'client_sap_id': 'client', 'product_sap_id': 'product', }
+
+
+class OrderImportResult:
+    """Count of created orders & errors of rejected rows as (row number, message) pairs."""
+    def __init__(self):
+        self.created = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def rejected(self) -> int:
+        return len({row_number for row_number, _ in self.errors})
+
+    def add_errors(self, row_number: int, messages: Iterable[str]) -> None:
+        self.errors.extend((row_number, message) for message in messages)
+
+
+def clean_order_row(row: Any, client_sap_ids: Set[int], product_sap_ids: Set[int]) -> Tuple[Optional[Order], List[str]]:
+    """
+    Validate row with order model fields validators. Client & product references
+    are checked against pre-fetched SAP ids instead of querying database.
+    :return:    unsaved order or None & validation error messages
+    """
+    if not isinstance(row, dict):
+        return None, [IMPORT_MSG['invalid_row']]
+    data = {ORDER_IMPORT_ALIASES.get(str(key).strip(), str(key).strip()): value for key, value in row.items()}
+    values, errors = {}, []
+    for name in ORDER_IMPORT_FIELDS:
+        field = Order._meta.get_field(name)
+        label = LABELS['order'].get(name, name)
+        value = data.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ('', None):
+            if not field.has_default() and not field.null:
+                errors.append(f"{label}: {IMPORT_MSG['required']}")
+            elif not field.has_default():
+                values[field.attname] = None
+            continue
+        try:
+            if field.is_relation:
+                value = field.target_field.to_python(value)
+                field.target_field.run_validators(value)
+                if value not in (client_sap_ids if name == 'client' else product_sap_ids):
+                    raise ValidationError(ERROR_MSG['order'][name]['invalid_choice'])
+                values[field.attname] = value
+            else:
+                values[name] = field.clean(value, None)
+        except ValidationError as error:
+            errors.extend(f"{label}: {message}" for message in error.messages)
+    return (None if errors else Order(**values)), errors
+
+
+def import_orders(rows: Iterable[Tuple[int, Any]], chunk_size: int = IMPORT_CHUNK_SIZE) -> OrderImportResult:
+    """
+    Validate & insert orders in chunks, each chunk inserted with bulk create in its own transaction.
+    Rejected rows do not stop import. Bulk create does not send model signals, so cached list counts
+    & production date bounds are updated explicitly.
+    :param rows:        (row number, row) pairs, e.g. from read_extract_rows
+    :param chunk_size:  count of rows validated & inserted together
+    """
+    client_sap_ids = set(Client.objects.values_list('client_sap_id', flat=True))
+    product_sap_ids = set(Product.objects.values_list('product_sap_id', flat=True))
+    result, imported_sap_ids, dates = OrderImportResult(), set(), set()
+    for chunk in iter_blocks(rows, chunk_size):
+        cleaned = []
+        for row_number, row in chunk:
+            order, errors = clean_order_row(row, client_sap_ids, product_sap_ids)
+            result.add_errors(row_number, errors)
+            if order is not None:
+                cleaned.append((row_number, order))
+        chunk_sap_ids = [order.order_sap_id for _, order in cleaned if order.order_sap_id is not None]
+        existing_sap_ids = set(Order.objects.filter(order_sap_id__in=chunk_sap_ids).values_list('order_sap_id',
+                                                                                                flat=True))
+        orders = []
+        for row_number, order in cleaned:
+            if order.order_sap_id in existing_sap_ids:
+                result.add_errors(row_number, [ERROR_MSG['order']['order_sap_id']['unique']])
+            elif order.order_sap_id in imported_sap_ids:
+                result.add_errors(row_number, [IMPORT_MSG['duplicated_row']])
+            else:
+                if order.order_sap_id is not None:
+                    imported_sap_ids.add(order.order_sap_id)
+                orders.append((row_number, order))
+        try:
+            with transaction.atomic():
+                Order.objects.bulk_create([order for _, order in orders], batch_size=IMPORT_BATCH_SIZE)
+        except IntegrityError:
+            for row_number, _ in orders:
+                result.add_errors(row_number, [IMPORT_MSG['chunk_error']])
+        else:
+            result.created += len(orders)
+            dates.update(order.date_of_production for _, order in orders)
+    if result.created:
+        invalidate_pagination_counts(Order)
+        extend_date_of_production_bounds(min(dates))
+        extend_date_of_production_bounds(max(dates))
+    return result
@@ -0,0 +1,208 @@
+import atexit
+import logging
+import threading
+from typing import List, Optional
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import DatabaseError, connection, transaction
+
+from apps.constants import INGEST_BUFFER_SIZE, INGEST_FLUSH_INTERVAL, MEASUREMENTS_BATCH_SIZE, DEVICE_TOKEN_MAX_AGE
+from apps.orders.archive import get_closed_order_ids
+from apps.orders.forms import MeasurementForm
+from apps.orders.models import Measurement, MeasurementReport, Order
+from apps.orders.spc import refresh_subgroups
+from apps.orders.verdicts import evaluate_verdicts
+from apps.user_texts import FORMSET_MSG
+
+logger = logging.getLogger(__name__)
+DEVICE_TOKEN_SALT = 'apps.orders.ingestion.device'
+
+
+def issue_device_token(user) -> str:
+    """Signed token of device account, verified without password hashing cost on every request.
+    Tokens expire after DEVICE_TOKEN_MAX_AGE and are revoked by deactivating device account.
+    """
+    return signing.dumps({'u': user.pk}, salt=DEVICE_TOKEN_SALT)
+
+
+def get_device_user(token: str):
+    """Return active device account of valid, unexpired token or None.
+    Account is loaded on every request, so deactivation & permission changes apply immediately.
+    """
+    try:
+        user_id = signing.loads(token, salt=DEVICE_TOKEN_SALT, max_age=DEVICE_TOKEN_MAX_AGE)['u']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+
+def clean_readings(readings: List[dict]) -> (List[Measurement], dict):
+    """
+    Validate device readings with measurement form rules (apps.validators) used by measurement report form.
+    :return:    unsaved measurements & form errors by reading index
+    """
+    measurements, errors = [], {}
+    for index, reading in enumerate(readings):
+        form = MeasurementForm(data=reading if isinstance(reading, dict) else {})
+        if form.is_valid():
+            measurements.append(form.save(commit=False))
+        else:
+            errors[index] = form.errors.get_json_data()
+    pallet_numbers = [measurement.pallet_number for measurement in measurements]
+    if not errors and len(set(pallet_numbers)) != len(pallet_numbers):
+        errors['pallet_number'] = FORMSET_MSG['pallet_number']
+    return measurements, errors
+
+
+class PalletNumberClash(ValueError):
+    """Pallet numbers of readings already measured in report or buffered for it."""
+    def __init__(self, pallet_numbers: List[int]):
+        super().__init__(f"Pallet numbers already in measurement report: {pallet_numbers}")
+        self.pallet_numbers = pallet_numbers
+
+
+def get_ingestion_report(order: Order, station: str) -> MeasurementReport:
+    """Return measurement report of order, started by first reading of device station if not created yet."""
+    try:
+        return order.measurement_report
+    except MeasurementReport.DoesNotExist:
+        with transaction.atomic():
+            report, created = MeasurementReport.objects.get_or_create(order=order, defaults={'author': station})
+            if created and order.status == 'Started':
+                order.status = 'Open'
+                order.save()
+        return report
+
+
+class MeasurementBuffer:
+    """
+    Process-wide buffer of ingested measurements. Readings of many requests are written with batched
+    inserts when buffer gets full or flush interval elapses (timer thread), followed by refresh of
+    control chart subgroups & verdicts of affected orders.
+    Buffered measurements are lost if process is killed, devices get accepted response only.
+    Order state is checked again when buffer is written, measurements of orders closed meanwhile are dropped.
+    """
+    def __init__(self, size: int = INGEST_BUFFER_SIZE, interval: Optional[float] = INGEST_FLUSH_INTERVAL):
+        self.size = size
+        self.interval = interval
+        self.measurements: List[Measurement] = []
+        self.order_ids = set()
+        self.lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+
+    def add(self, order_id: int, measurements: List[Measurement]) -> int:
+        """Buffer measurements of order (all of single measurement report), write buffer when full.
+        Pallet numbers are checked against report measurements written & buffered by this process,
+        report would fail measurements formset validation otherwise.
+        :raise PalletNumberClash:   if any pallet number is already in report
+        :return:    number of written measurements
+        """
+        with self.lock:
+            self.check_pallet_numbers(measurements)
+            self.measurements.extend(measurements)
+            self.order_ids.add(order_id)
+            if len(self.measurements) < self.size:
+                if self.timer is None and self.interval is not None:
+                    self.timer = threading.Timer(self.interval, self.flush_from_timer)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return 0
+            batch, order_ids = self.take()
+        return self.write(batch, order_ids)
+
+    def check_pallet_numbers(self, measurements: List[Measurement]):
+        """Expected to be called with lock acquired."""
+        if not measurements:
+            return
+        report_id = measurements[0].measurement_report_id
+        pallet_numbers = {measurement.pallet_number for measurement in measurements}
+        clashes = {measurement.pallet_number for measurement in self.measurements
+                   if measurement.measurement_report_id == report_id} & pallet_numbers
+        clashes.update(Measurement.objects.filter(measurement_report_id=report_id,
+                                                  pallet_number__in=pallet_numbers)
+                       .values_list('pallet_number', flat=True))
+        if clashes:
+            raise PalletNumberClash(sorted(clashes))
+
+    def take(self) -> (List[Measurement], set):
+        """Empty buffer, expected to be called with lock acquired."""
+        batch, order_ids = self.measurements, self.order_ids
+        self.measurements, self.order_ids = [], set()
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return batch, order_ids
+
+    def flush(self) -> int:
+        with self.lock:
+            batch, order_ids = self.take()
+        return self.write(batch, order_ids)
+
+    def flush_from_timer(self):
+        """Flush in timer thread, its own database connection is closed afterwards."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Buffered measurements flush failed")
+        finally:
+            connection.close()
+
+    @classmethod
+    def write(cls, batch: List[Measurement], order_ids: set) -> int:
+        """Write measurements of all orders in one transaction. When it fails, orders are written
+        in separate transactions, so failing order does not take measurements of other orders with it.
+        """
+        if not batch:
+            return 0
+        try:
+            return cls.write_orders(batch, order_ids)
+        except DatabaseError:
+            logger.warning("Buffered measurements of orders %s not written in one transaction, "
+                           "writing orders separately", sorted(order_ids), exc_info=True)
+        written = 0
+        for order_id in sorted(order_ids):
+            measurements = [measurement for measurement in batch
+                            if measurement.measurement_report.order_id == order_id]
+            try:
+                written += cls.write_orders(measurements, {order_id})
+            except DatabaseError:
+                logger.exception("%d buffered measurements of order %s not written", len(measurements), order_id)
+        return written
+
+    @staticmethod
+    def write_orders(measurements: List[Measurement], order_ids: set) -> int:
+        """Write measurements of orders still accepting them. Orders are locked, so they are not closed
+        (and archived) until measurements are written. Measurements of closed or deleted orders are dropped.
+        Buffers of other worker processes write orders under the same lock, so pallets they have written
+        meanwhile are found and dropped here. Unique pallet number constraint guards against other writers.
+        """
+        with transaction.atomic():
+            open_order_ids = set(Order.objects.select_for_update().filter(id__in=order_ids)
+                                 .values_list('id', flat=True)) - get_closed_order_ids(order_ids)
+            dropped = [measurement for measurement in measurements
+                       if measurement.measurement_report.order_id not in open_order_ids]
+            if dropped:
+                logger.error("%d buffered measurements of closed or deleted orders %s not written", len(dropped),
+                             sorted(order_ids - open_order_ids))
+                measurements = [measurement for measurement in measurements
+                                if measurement.measurement_report.order_id in open_order_ids]
+            written_pallets = set(Measurement.objects.filter(measurement_report__order_id__in=open_order_ids)
+                                  .values_list('measurement_report_id', 'pallet_number'))
+            clashing = [measurement for measurement in measurements
+                        if (measurement.measurement_report_id, measurement.pallet_number) in written_pallets]
+            if clashing:
+                logger.error("Buffered measurements of pallets %s already written by other worker not written",
+                             sorted((measurement.measurement_report_id, measurement.pallet_number)
+                                    for measurement in clashing))
+                measurements = [measurement for measurement in measurements
+                                if (measurement.measurement_report_id, measurement.pallet_number) not in written_pallets]
+            Measurement.objects.bulk_create(measurements, batch_size=MEASUREMENTS_BATCH_SIZE)
+            MeasurementReport.touch_measurements(open_order_ids)
+            refresh_subgroups(open_order_ids)
+            evaluate_verdicts(open_order_ids)
+        return len(measurements)
+
+
+measurement_buffer = MeasurementBuffer()
+atexit.register(measurement_buffer.flush)
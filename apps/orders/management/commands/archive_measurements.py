@@ -0,0 +1,30 @@
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.constants import ARCHIVE_CHUNK_SIZE
+from apps.orders.archive import archive_orders
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Move measurements of closed orders to columnar archive partitioned by month of production " \
+           "and replace them in database with archive pointers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Archive orders produced before date (YYYY-MM-DD) only.")
+        parser.add_argument('--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE,
+                            help="Reports archived in single segment & transaction.")
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        if options['before']:
+            before = parse_date(options['before'])
+            if before is None:
+                raise CommandError(f"Invalid date: {options['before']}, expected YYYY-MM-DD.")
+            orders = orders.filter(date_of_production__lt=before)
+        start = default_timer()
+        reports_count, measurements_count = archive_orders(orders, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {measurements_count} measurements of {reports_count} "
+                                             f"reports in {default_timer() - start:.2f} s."))
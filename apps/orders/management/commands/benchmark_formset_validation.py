@@ -0,0 +1,46 @@
+import random
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.forms import MeasurementFormSet
+from apps.orders.spc import READING_POSITIONS, SPC_DIMENSIONS
+
+
+class Command(BaseCommand):
+    help = "Compare validation of measurement report formset form by form with batch grid validation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pallets', type=int, default=300, help="Measurements (pallets) in report.")
+        parser.add_argument('--repeat', type=int, default=5, help="Validations per mode.")
+
+    def handle(self, *args, **options):
+        data = self.build_data(options['pallets'])
+        timings = {}
+        for mode, batch_validation in (('form by form', False), ('batch grid', True)):
+            start = default_timer()
+            for _ in range(options['repeat']):
+                formset = MeasurementFormSet(data=data)
+                formset.batch_validation = batch_validation
+                valid = formset.is_valid()
+                added, *_ = formset.get_changes()
+            timings[mode] = (default_timer() - start) * 1000 / options['repeat']
+            self.stdout.write(f"  {mode}: valid={valid}, {len(added)} measurements, {timings[mode]:.1f} ms per POST")
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {timings['form by form'] / timings['batch grid']:.1f}x"))
+
+    @staticmethod
+    def build_data(pallets):
+        data = {'measurements-TOTAL_FORMS': str(pallets), 'measurements-INITIAL_FORMS': '0',
+                'measurements-MIN_NUM_FORMS': '1', 'measurements-MAX_NUM_FORMS': '1000'}
+        for index in range(pallets):
+            prefix = f'measurements-{index}'
+            data[f'{prefix}-pallet_number'] = str(index + 1)
+            for dimension in SPC_DIMENSIONS:
+                for position in READING_POSITIONS:
+                    data[f'{prefix}-{dimension}_{position}'] = f'{random.uniform(70, 80):.2f}'
+            data[f'{prefix}-flat_crush_resistance_target'] = str(random.randint(3000, 4000))
+            data[f'{prefix}-moisture_content_target'] = str(random.randint(5, 9))
+            data[f'{prefix}-weight'] = str(random.randint(100, 200))
+            data[f'{prefix}-remarks'] = ''
+        return data
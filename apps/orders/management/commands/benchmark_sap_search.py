@@ -0,0 +1,66 @@
+import datetime
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.clients.filters import ClientFilter
+from apps.clients.models import Client
+from apps.constants import CLIENT_SAP_DIGITS, PRODUCT_SAP_DIGITS, ORDER_SAP_DIGITS
+from apps.orders.filters import OrderFilter
+from apps.orders.models import Order
+from apps.products.filters import ProductFilter
+from apps.products.models import Product
+
+# label, filter class, model, filter field, model lookup
+SEARCH_CASES = (
+    ('ClientFilter.client_sap_id', ClientFilter, Client, 'client_sap_id', 'client_sap_id'),
+    ('ProductFilter.product_sap_id', ProductFilter, Product, 'product_sap_id', 'product_sap_id'),
+    ('OrderFilter.order_sap_id', OrderFilter, Order, 'order_sap_id', 'order_sap_id'),
+    ('OrderFilter.product_sap_id', OrderFilter, Order, 'product_sap_id', 'product__product_sap_id'),
+)
+
+
+class Command(BaseCommand):
+    help = "Compare legacy icontains SAP id search with prefix range search: query plans & timings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='100', help="Typed SAP id prefix.")
+        parser.add_argument('--repeat', type=int, default=20, help="Query executions per search mode.")
+        parser.add_argument('--populate', type=int, default=0,
+                            help="Insert given number of synthetic clients, products & orders "
+                                 "for the benchmark time only (rolled back afterwards).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['populate']:
+                self.populate(options['populate'])
+            for label, filter_class, model, filter_field, lookup in SEARCH_CASES:
+                legacy_qs = model.objects.filter(**{f'{lookup}__icontains': options['prefix']})
+                prefix_qs = filter_class({filter_field: options['prefix']}, queryset=model.objects.all()).qs
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                for mode, qs in (('icontains', legacy_qs), ('prefix range', prefix_qs)):
+                    self.report(mode, qs, options['repeat'])
+            transaction.set_rollback(True)
+
+    def report(self, mode, qs, repeat):
+        start = default_timer()
+        for _ in range(repeat):
+            count = qs.count()
+        elapsed_ms = (default_timer() - start) * 1000 / repeat
+        self.stdout.write(f"  {mode}: {count} rows, {elapsed_ms:.2f} ms per query")
+        for line in qs.explain().splitlines():
+            self.stdout.write(f"    {line}")
+
+    @staticmethod
+    def populate(size):
+        clients = Client.objects.bulk_create(
+            [Client(client_sap_id=10 ** (CLIENT_SAP_DIGITS - 1) + i, client_name=f"benchmark client {i}")
+             for i in range(size)], batch_size=500)
+        products = Product.objects.bulk_create(
+            [Product(product_sap_id=10 ** (PRODUCT_SAP_DIGITS - 1) + i, description=f"benchmark product {i}")
+             for i in range(size)], batch_size=500)
+        Order.objects.bulk_create(
+            [Order(order_sap_id=10 ** (ORDER_SAP_DIGITS - 1) + i, client=client, product=product,
+                   date_of_production=datetime.date.today())
+             for i, (client, product) in enumerate(zip(clients, products))], batch_size=500)
@@ -0,0 +1,26 @@
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+from apps.constants import VERDICTS_CHUNK_SIZE
+from apps.orders.models import Order
+from apps.orders.verdicts import evaluate_orders_verdicts
+
+
+class Command(BaseCommand):
+    help = "Check measurements of all measured orders (or orders of single product) " \
+           "against product specification and store verdicts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, help="Product SAP id.")
+        parser.add_argument('--chunk-size', type=int, default=VERDICTS_CHUNK_SIZE,
+                            help="Orders evaluated in single transaction.")
+
+    def handle(self, *args, **options):
+        start = default_timer()
+        orders = Order.objects.all()
+        if options['product'] is not None:
+            orders = orders.filter(product_id=options['product'])
+        evaluated_count, failing_count = evaluate_orders_verdicts(orders, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Evaluated {evaluated_count} orders in {default_timer() - start:.2f} s, "
+                                             f"{failing_count} out of tolerance."))
@@ -0,0 +1,99 @@
+import itertools
+import json
+import re
+from importlib import import_module
+from typing import Iterator, List, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory
+
+from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
+from apps.orders.models import Order
+from apps.orders.views import OrderListView
+
+# sortable columns of orders_list.html
+ORDERINGS = ('id', 'client__client_name', 'order_sap_id', 'product__product_sap_id',
+             'date_of_production', 'product__description', 'status', )
+
+
+def get_filter_combinations() -> dict:
+    """Order list filter states: the one set by clear filters (date range) and its variants."""
+    date_range = {'date_of_production_after': Order.get_date_of_production('today'),
+                  'date_of_production_before': Order.get_date_of_production('max')}
+    return {'no filters': {},
+            'date range': date_range,
+            'status': {'status': 'Open'},
+            'status & date range': {'status': 'Open', **date_range},
+            'verdict': {'verdict': 'Fail'},
+            'order sap id prefix & date range': {'order_sap_id': '1000', **date_range},
+            'product sap id prefix & date range': {'product_sap_id': '100', **date_range}, }
+
+
+def get_list_queryset(data: dict, ordering: str) -> "QuerySet":
+    """Order list queryset built by OrderListView itself for filter state & ordering request."""
+    request = RequestFactory().get('/', {**data, 'ordering': ordering})
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    view = OrderListView()
+    view.setup(request)
+    return view.get_queryset()
+
+
+def iter_page_querysets(queryset: "QuerySet", ordering: str) -> Iterator[Tuple[str, "QuerySet"]]:
+    """Querysets of order list pages as fetched by offset & keyset pagination modes.
+    Keyset seek is explained only when there is a row to seek from.
+    """
+    yield 'offset', queryset[:PAGINATION_OBJ_COUNT_PER_PAGE]
+    paginator = OrderListView.keyset_paginator_class(queryset, PAGINATION_OBJ_COUNT_PER_PAGE, ordering=ordering)
+    first_page = paginator.get_page_queryset()
+    yield 'keyset', first_page
+    row = first_page.first()
+    if row is not None:
+        position = paginator.decode_cursor(paginator.encode_cursor(row, 'next', 2))
+        yield 'keyset seek', paginator.get_page_queryset(position)
+
+
+def find_plan_issues(plan: str) -> List[str]:
+    """Look for full table scans & filesorts in MySQL (json format) or SQLite query plan."""
+    issues = []
+    if connection.vendor == 'mysql':
+        for table in re.findall(r'"table_name":\s*"(\w+)",\s*"access_type":\s*"ALL"', plan):
+            issues.append(f"full scan of {table}")
+        if re.search(r'"using_filesort":\s*true', plan):
+            issues.append("filesort")
+    elif connection.vendor == 'sqlite' and 'USE TEMP B-TREE FOR ORDER BY' in plan:
+        # plain scan in rowid order stops at page limit unless its rows are sorted afterwards
+        for table in re.findall(r'SCAN (?:TABLE )?(\w+)\b(?! USING)', plan):
+            issues.append(f"full scan of {table}")
+        issues.append("filesort")
+    return issues
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on order list page queries for each filter, sort & pagination mode combination " \
+           "and report full table scans or filesorts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print whole query plans.")
+        parser.add_argument('--fail-on-issues', action='store_true',
+                            help="Exit with error when any combination scans table or uses filesort.")
+
+    def handle(self, *args, **options):
+        explain_options = {'format': 'json'} if connection.vendor == 'mysql' else {}
+        issues_count = 0
+        for (label, data), ordering in itertools.product(get_filter_combinations().items(), ORDERINGS):
+            for mode, qs in iter_page_querysets(get_list_queryset(data, ordering), ordering):
+                plan = qs.explain(**explain_options)
+                if explain_options:
+                    plan = json.dumps(json.loads(plan), indent=1)
+                issues = find_plan_issues(plan)
+                issues_count += bool(issues)
+                style = self.style.WARNING if issues else self.style.SUCCESS
+                self.stdout.write(style(f"{label} | ordering: {ordering} | {mode} | {', '.join(issues) or 'ok'}"))
+                if options['verbose_plans']:
+                    self.stdout.write(plan)
+        if issues_count and options['fail_on_issues']:
+            raise CommandError(f"{issues_count} filter, sort & pagination combinations "
+                               f"fall back to scan or filesort.")
@@ -0,0 +1,37 @@
+import os
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.orders.certificates import get_certificate_filename, get_closed_orders, iter_certificates
+
+
+class Command(BaseCommand):
+    help = "Write certificates of analysis of orders closed in date of production range to directory. " \
+           "Certificates are rendered in parallel processes, unchanged ones are taken from PDF cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('date_from', help="First date of production (YYYY-MM-DD).")
+        parser.add_argument('date_to', help="Last date of production (YYYY-MM-DD).")
+        parser.add_argument('--output', default='.', help="Output directory.")
+        parser.add_argument('--processes', type=int, help="Rendering processes, all cores by default.")
+
+    def handle(self, *args, **options):
+        date_range = [parse_date(options[name]) for name in ('date_from', 'date_to')]
+        if None in date_range:
+            raise CommandError(f"Invalid date range: {options['date_from']} - {options['date_to']}, "
+                               f"expected YYYY-MM-DD.")
+        orders = get_closed_orders().filter(date_of_production__range=date_range).order_by('date_of_production', 'id')
+        os.makedirs(options['output'], exist_ok=True)
+        start = default_timer()
+        count = 0
+        for order, content in iter_certificates(orders, processes=options['processes']):
+            if content is None:
+                self.stderr.write(f"Certificate of order {order.order_sap_id or order.id} not rendered.")
+                continue
+            with open(os.path.join(options['output'], get_certificate_filename(order)), 'wb') as certificate_file:
+                certificate_file.write(content)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Written {count} certificates of {len(orders)} orders "
+                                             f"in {default_timer() - start:.2f} s."))
@@ -0,0 +1,35 @@
+import csv
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.constants import IMPORT_CHUNK_SIZE
+from apps.orders.imports import import_orders
+from apps.sap_extracts import read_extract_rows, get_extract_format, EXTRACT_FORMATS
+
+
+class Command(BaseCommand):
+    help = "Import production orders from SAP orders export file (CSV or JSON lines) " \
+           "and report rejected rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="SAP orders export file.")
+        parser.add_argument('--format', choices=sorted(set(EXTRACT_FORMATS.values())),
+                            help="File format, detected from file extension by default.")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help="Rows validated & inserted in single transaction.")
+
+    def handle(self, *args, **options):
+        import_format = options['format'] or get_extract_format(options['path'])
+        if import_format is None:
+            raise CommandError(f"Unknown format of {options['path']}, use --format option.")
+        start = default_timer()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                result = import_orders(read_extract_rows(file, import_format), chunk_size=options['chunk_size'])
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(error)
+        for row_number, message in result.errors:
+            self.stdout.write(self.style.WARNING(f"row {row_number}: {message}"))
+        self.stdout.write(self.style.SUCCESS(f"Created {result.created} orders in {default_timer() - start:.2f} s, "
+                                             f"rejected {result.rejected} rows."))
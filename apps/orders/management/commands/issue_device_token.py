@@ -0,0 +1,25 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.constants import DEVICE_TOKEN_MAX_AGE
+from apps.orders.ingestion import issue_device_token
+
+
+class Command(BaseCommand):
+    help = "Issue measurement ingestion token of device account (account needs orders.add_measurement " \
+           f"permission). Token expires after {DEVICE_TOKEN_MAX_AGE // 86400} days."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="Device account username.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options['username'], is_active=True).first()
+        if user is None:
+            raise CommandError(f"Active user {options['username']} does not exist.")
+        if not user.has_perm('orders.add_measurement'):
+            self.stderr.write(self.style.WARNING(f"{user.username} has no orders.add_measurement permission."))
+        self.stdout.write(issue_device_token(user))
+        expiry = datetime.datetime.now() + datetime.timedelta(seconds=DEVICE_TOKEN_MAX_AGE)
+        self.stderr.write(f"Token expires at {expiry:%Y-%m-%d %H:%M}.")
@@ -0,0 +1,24 @@
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+from apps.constants import SUBGROUPS_REBUILD_CHUNK_SIZE
+from apps.orders.models import MeasurementReport
+from apps.orders.spc import refresh_subgroups
+
+
+class Command(BaseCommand):
+    help = "Rebuild control chart subgroups of all orders with measurement report, " \
+           "e.g. to fill rollups for measurements saved before they were introduced."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=SUBGROUPS_REBUILD_CHUNK_SIZE,
+                            help="Orders summarized in single transaction.")
+
+    def handle(self, *args, **options):
+        start, subgroups_count = default_timer(), 0
+        order_ids = list(MeasurementReport.objects.order_by('order_id').values_list('order_id', flat=True))
+        for index in range(0, len(order_ids), options['chunk_size']):
+            subgroups_count += refresh_subgroups(order_ids[index:index + options['chunk_size']])
+        self.stdout.write(self.style.SUCCESS(f"Stored {subgroups_count} subgroups of {len(order_ids)} orders "
+                                             f"in {default_timer() - start:.2f} s."))
@@ -0,0 +1,83 @@
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.spc import SPC_DIMENSIONS, READING_POSITIONS
+
+# nominal sizes of simulated tubes by dimension
+NOMINAL_SIZES = {'internal_diameter': 76.0, 'external_diameter': 82.0, 'length': 1000.0, }
+
+
+class Command(BaseCommand):
+    help = "Simulate gauge stations posting pallet readings to measurement ingestion endpoint " \
+           "and report throughput & latency (load test)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Ingestion endpoint base url, e.g. http://localhost:8000/orders/ingest/")
+        parser.add_argument('--token', required=True, help="Device token (issue_device_token command).")
+        parser.add_argument('--orders', type=int, nargs='+', required=True, help="Order SAP ids measured by stations.")
+        parser.add_argument('--stations', type=int, default=8, help="Concurrent device stations.")
+        parser.add_argument('--rate', type=float, default=100, help="Readings per second of all stations.")
+        parser.add_argument('--batch', type=int, default=1, help="Readings posted in single request.")
+        parser.add_argument('--duration', type=float, default=10, help="Simulation time in seconds.")
+
+    def handle(self, *args, **options):
+        pallet_numbers = {order_sap_id: itertools.count(1) for order_sap_id in options['orders']}
+        lock = threading.Lock()
+        results = {'latencies': [], 'accepted': 0, 'errors': 0}
+        # each station keeps its share of readings rate
+        request_interval = options['batch'] * options['stations'] / options['rate']
+        deadline = default_timer() + options['duration']
+
+        def station(station_number):
+            next_request = default_timer()
+            while next_request < deadline:
+                order_sap_id = random.choice(options['orders'])
+                with lock:
+                    pallets = [next(pallet_numbers[order_sap_id]) for _ in range(options['batch'])]
+                body = json.dumps({'station': f'simulator-{station_number}',
+                                   'readings': [self.get_reading(pallet) for pallet in pallets]}).encode('utf-8')
+                request = urllib.request.Request(f"{options['url'].rstrip('/')}/{order_sap_id}", data=body, headers={
+                    'Content-Type': 'application/json', 'Authorization': f"Token {options['token']}"})
+                start = default_timer()
+                try:
+                    with urllib.request.urlopen(request) as response:
+                        accepted = json.loads(response.read())['accepted']
+                except (urllib.error.URLError, ValueError, KeyError) as error:
+                    with lock:
+                        results['errors'] += 1
+                    self.stderr.write(f"station {station_number}: {error}")
+                else:
+                    with lock:
+                        results['accepted'] += accepted
+                        results['latencies'].append(default_timer() - start)
+                next_request += request_interval
+                time.sleep(max(next_request - default_timer(), 0))
+
+        start = default_timer()
+        threads = [threading.Thread(target=station, args=(number, )) for number in range(options['stations'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = default_timer() - start
+        latencies = sorted(results['latencies']) or [0]
+        self.stdout.write(self.style.SUCCESS(
+            f"Accepted {results['accepted']} readings in {elapsed:.1f} s ({results['accepted'] / elapsed:.0f}/s), "
+            f"{len(results['latencies'])} requests, {results['errors']} errors, "
+            f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms."))
+
+    @staticmethod
+    def get_reading(pallet_number: int) -> dict:
+        reading = {f'{dimension}_{position}': round(random.gauss(NOMINAL_SIZES[dimension], 0.1), 2)
+                   for dimension in SPC_DIMENSIONS for position in READING_POSITIONS}
+        return {'pallet_number': pallet_number, **reading}
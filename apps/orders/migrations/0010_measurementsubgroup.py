@@ -0,0 +1,38 @@
+# Generated by Django 2.2.10 on 2026-10-18 12:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_description_index'),
+        ('orders', '0009_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementSubgroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_of_production', models.DateField()),
+                ('dimension', models.CharField(choices=[('internal_diameter', 'Średnica wewnętrzna'), ('external_diameter', 'Średnica zewnętrzna'), ('length', 'Długość')], max_length=30)),
+                ('n', models.IntegerField()),
+                ('sum', models.FloatField()),
+                ('sum_of_squares', models.FloatField()),
+                ('min', models.FloatField()),
+                ('max', models.FloatField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='measurement_subgroups', to='orders.Order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='measurement_subgroups', to='products.Product', to_field='product_sap_id')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='measurementsubgroup',
+            index=models.Index(fields=['product', 'dimension', 'date_of_production'], name='subgroup_product_chart_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='measurementsubgroup',
+            unique_together={('order', 'dimension')},
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.10 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_measurementsubgroup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='measurement',
+            name='failing_dimensions',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='failing_dimensions',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='failing_pallets_count',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='verdict',
+            field=models.CharField(blank=True, choices=[('Pass', 'Zgodny'), ('Fail', 'Niezgodny')], editable=False, max_length=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['verdict', 'id'], name='order_verdict_id_idx'),
+        ),
+    ]
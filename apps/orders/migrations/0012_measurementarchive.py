@@ -0,0 +1,27 @@
+# Generated by Django 2.2.10 on 2026-10-18 12:15
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_order_verdicts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partition', models.CharField(max_length=7)),
+                ('segment', models.IntegerField()),
+                ('offset', models.IntegerField()),
+                ('count', models.IntegerField()),
+                ('date_of_archive', models.DateField(default=datetime.date.today)),
+                ('measurement_report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='orders.MeasurementReport')),
+            ],
+        ),
+    ]
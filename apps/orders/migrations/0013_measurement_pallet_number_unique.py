@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_measurementarchive'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='measurement',
+            unique_together={('measurement_report', 'pallet_number')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_measurement_pallet_number_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='measurementreport',
+            name='measurements_version',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
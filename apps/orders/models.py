@@ -1,11 +1,13 @@
 import datetime
+from typing import Iterable
+
 from django.db import models
-from django.db.models import Min, Max
+from django.db.models import F
 
 from apps.clients.models import Client
 from apps.constants import STRFTIME_DATE
 from apps.products.models import Product
-from apps.user_texts import MODEL_MSG
+from apps.user_texts import MODEL_MSG, LABELS
 from apps.validators import validate_num_field, validate_int_field, validate_order_sap_id
 
 
@@ -16,6 +18,7 @@ class Order(models.Model):
     measurements models.
     """
     STATUS_CHOICES = list(zip(['Started', 'Open', 'Done'], MODEL_MSG['order_status_choices']))
+    VERDICT_CHOICES = list(zip(['Pass', 'Fail'], MODEL_MSG['order_verdict_choices']))
     order_sap_id = models.IntegerField(unique=True, validators=[validate_order_sap_id(), ], null=True, blank=True)
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='orders', to_field='client_sap_id')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='orders', to_field='product_sap_id')
@@ -26,23 +29,47 @@ class Order(models.Model):
     internal_diameter_reference = models.FloatField(validators=[validate_num_field(), ], null=True, blank=True)
     external_diameter_reference = models.FloatField(validators=[validate_num_field(), ], null=True, blank=True)
     length = models.FloatField(validators=[validate_num_field(), ], null=True, blank=True)
+    # measurements verdict against product specification, empty until measured product with specification
+    verdict = models.CharField(choices=VERDICT_CHOICES, max_length=10, null=True, blank=True, editable=False)
+    failing_pallets_count = models.IntegerField(null=True, blank=True, editable=False)
+    failing_dimensions = models.CharField(max_length=100, blank=True, default='', editable=False)
+
+    class Meta:
+        # designed for order list filters (status, date of production range, verdict) & sortable columns,
+        # id is a tiebreaker for keyset pagination
+        indexes = [
+            models.Index(fields=['verdict', 'id'], name='order_verdict_id_idx'),
+            models.Index(fields=['status', 'date_of_production'], name='order_status_date_idx'),
+            models.Index(fields=['date_of_production', 'id'], name='order_date_id_idx'),
+            models.Index(fields=['status', 'id'], name='order_status_id_idx'),
+        ]
 
     def __str__(self):
         return f"Production order: {self.order_sap_id} " \
                f"product: {self.product.product_sap_id} client: {self.client.client_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember production date loaded from db for incremental date bounds update."""
+        instance = super().from_db(db, field_names, values)
+        if 'date_of_production' in instance.__dict__:
+            instance.loaded_date_of_production = instance.date_of_production
+        return instance
+
     @staticmethod
     def get_date_of_production(value: str) -> str:
         """
-        Aggregate min/max production date from all production order
-        records or return current date.
+        Return min/max production date from all production order
+        records or current date. Min/max dates are served by cached date bounds,
+        current date is returned when there are no orders.
         :param value:   One of min, max, today
         :return:        str formatted date
         """
-        dates = {'min': Order.objects.aggregate(Min('date_of_production'))['date_of_production__min'],
-                 'max': Order.objects.aggregate(Max('date_of_production'))['date_of_production__max'],
-                 'today': datetime.date.today()}
-        return dates.get(value).strftime(STRFTIME_DATE)
+        # date bounds service depends on order model
+        from apps.orders.date_bounds import get_date_of_production_bounds
+
+        dates = dict(zip(('min', 'max'), get_date_of_production_bounds())) if value != 'today' else {}
+        return (dates.get(value) or datetime.date.today()).strftime(STRFTIME_DATE)
 
 
 class MeasurementReport(models.Model):
@@ -52,10 +79,17 @@ class MeasurementReport(models.Model):
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='measurement_report')
     author = models.CharField(max_length=100)
     date_of_control = models.DateField(default=datetime.date.today)
+    # bumped on every change of report measurements, documents of report are keyed by it instead of measurements
+    measurements_version = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"Measurement report of production order: {self.order.order_sap_id}"
 
+    @classmethod
+    def touch_measurements(cls, order_ids: Iterable[int]) -> None:
+        """Bump measurements version of reports of orders, expected to be called with measurements written."""
+        cls.objects.filter(order_id__in=order_ids).update(measurements_version=F('measurements_version') + 1)
+
 
 class Measurement(models.Model):
     """Abstraction layer which stores single measurement of specific pallet."""
@@ -79,7 +113,56 @@ class Measurement(models.Model):
     weight = models.IntegerField(validators=[validate_int_field(), ], null=True, blank=True)
 
     remarks = models.TextField(null=True, blank=True)
+    # comma separated dimensions out of product specification tolerance
+    failing_dimensions = models.CharField(max_length=100, blank=True, default='', editable=False)
+
+    class Meta:
+        # pallets measured concurrently by devices served by different workers are not duplicated
+        unique_together = [('measurement_report', 'pallet_number')]
 
     def __str__(self):
         return f"Measurement of pallet nr {self.pallet_number}. " \
                f"production order: {self.measurement_report.order.order_sap_id}"
+
+
+class MeasurementSubgroup(models.Model):
+    """Rollup of order measurements of single dimension used as a subgroup of product control charts.
+    Kept in sync with measurement report, so charts never scan measurements.
+    Product & production date are denormalized from order for chart queries.
+    """
+    DIMENSION_CHOICES = list(LABELS['spc'].items())
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='measurement_subgroups')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='measurement_subgroups',
+                                to_field='product_sap_id')
+    date_of_production = models.DateField()
+    dimension = models.CharField(choices=DIMENSION_CHOICES, max_length=30)
+    n = models.IntegerField()
+    sum = models.FloatField()
+    sum_of_squares = models.FloatField()
+    min = models.FloatField()
+    max = models.FloatField()
+
+    class Meta:
+        unique_together = [('order', 'dimension')]
+        indexes = [
+            models.Index(fields=['product', 'dimension', 'date_of_production'], name='subgroup_product_chart_idx'),
+        ]
+
+    def __str__(self):
+        return f"Measurement subgroup of {self.dimension}, production order id: {self.order_id}"
+
+
+class MeasurementArchive(models.Model):
+    """Pointer to measurements of closed order moved from database to columnar archive files.
+    Measurements of report are rows [offset, offset + count) of segment in monthly partition.
+    """
+    measurement_report = models.OneToOneField(MeasurementReport, on_delete=models.CASCADE, related_name='archive')
+    partition = models.CharField(max_length=7)
+    segment = models.IntegerField()
+    offset = models.IntegerField()
+    count = models.IntegerField()
+    date_of_archive = models.DateField(default=datetime.date.today)
+
+    def __str__(self):
+        return f"Archived measurements of report id: {self.measurement_report_id}, " \
+               f"partition: {self.partition}, segment: {self.segment}"
@@ -0,0 +1,48 @@
+from collections import namedtuple
+from typing import List, Optional
+
+import numpy as np
+
+from apps.constants import MEASUREMENT_UNITS, MEASUREMENT_UNIT_DEFAULT
+from apps.orders.forms import MeasurementForm
+from apps.orders.models import Measurement
+from apps.orders.spc import SPC_DIMENSIONS
+from apps.orders.verdicts import find_failing_readings, get_specification_limits, get_verdict_columns
+from apps.products.models import Specification
+from apps.user_texts import LABELS
+
+# row per measurement attribute: readings of dimension are grouped, group size is set on first row of group only
+PivotRow = namedtuple('PivotRow', ['name', 'label', 'group', 'group_size', 'unit', 'cells'])
+
+
+def get_measurement_group(name: str) -> Optional[str]:
+    return next((dimension for dimension in SPC_DIMENSIONS if name.startswith(f'{dimension}_')), None)
+
+
+def get_measurements_pivot(measurements: List[Measurement],
+                           specification: Optional[Specification] = None) -> List[PivotRow]:
+    """
+    Pivot measurements into rows of attributes with value of each pallet & its tolerance flag.
+    Readings of all pallets are checked against specification tolerance limits in one vectorized pass.
+    :return:    attribute rows, cells are (value, out of tolerance) tuples in measurements order
+    """
+    verdict_columns = get_verdict_columns()
+    readings = np.array([[np.nan if getattr(measurement, column) is None else getattr(measurement, column)
+                          for column in verdict_columns] for measurement in measurements],
+                        dtype=float).reshape(len(measurements), len(verdict_columns))
+    failing = find_failing_readings(readings, get_specification_limits(specification)[np.newaxis])
+    failing_columns = dict(zip(verdict_columns, failing.T.tolist()))
+
+    names = list(MeasurementForm.base_fields)
+    groups = [get_measurement_group(name) for name in names]
+    rows = []
+    for index, (name, group) in enumerate(zip(names, groups)):
+        first_of_group = group is not None and (index == 0 or groups[index - 1] != group)
+        values = [getattr(measurement, name) for measurement in measurements]
+        flags = failing_columns.get(name, [False] * len(measurements))
+        rows.append(PivotRow(name=name, label=LABELS['measurement'][name],
+                             group=LABELS['measurement_groups'][group] if group else '',
+                             group_size=groups.count(group) if first_of_group else 0,
+                             unit=MEASUREMENT_UNITS.get(name, MEASUREMENT_UNIT_DEFAULT),
+                             cells=list(zip(values, flags))))
+    return rows
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.orders.date_bounds import update_date_of_production_bounds, \
+    invalidate_date_of_production_bounds
+from apps.orders.models import Order, MeasurementSubgroup
+from apps.orders.verdicts import evaluate_orders_verdicts
+from apps.paginators import invalidate_pagination_counts
+from apps.products.models import Specification
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_order_counts(sender, **kwargs):
+    """Invalidate cached paginated list counts after order data change."""
+    invalidate_pagination_counts(sender)
+
+
+@receiver(post_save, sender=Order)
+def update_date_bounds_on_save(sender, instance, created, **kwargs):
+    """Update cached production date bounds for saved order.
+    Previous date of orders not loaded from db is unknown, so bounds are invalidated.
+    """
+    if created or hasattr(instance, 'loaded_date_of_production'):
+        update_date_of_production_bounds(previous_date=getattr(instance, 'loaded_date_of_production', None),
+                                         date=instance.date_of_production)
+    else:
+        invalidate_date_of_production_bounds()
+    instance.loaded_date_of_production = instance.date_of_production
+
+
+@receiver(post_delete, sender=Order)
+def update_date_bounds_on_delete(sender, instance, **kwargs):
+    update_date_of_production_bounds(previous_date=instance.date_of_production, date=None)
+
+
+@receiver(post_save, sender=Order)
+def update_subgroups_on_save(sender, instance, created, **kwargs):
+    """Keep product & production date denormalized in control chart subgroups of order."""
+    if not created:
+        MeasurementSubgroup.objects.filter(order_id=instance.id).update(
+            product_id=instance.product_id, date_of_production=instance.date_of_production)
+
+
+@receiver([post_save, post_delete], sender=Specification)
+def update_verdicts_on_specification_change(sender, instance, **kwargs):
+    """Check measured orders of product still in production against changed tolerances, so specification
+    edit does not evaluate whole order history. Closed orders keep their verdicts, they are re-evaluated
+    by evaluate_verdicts command (--product).
+    """
+    evaluate_orders_verdicts(Order.objects.filter(product__pk=instance.product_id).exclude(status='Done'))
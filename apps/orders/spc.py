@@ -0,0 +1,216 @@
+import datetime
+import functools
+import itertools
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+
+from apps.constants import MEASUREMENTS_BATCH_SIZE, PERCENT_TOLERANCE_DIMENSIONS
+from apps.orders.archive import load_archived_readings
+from apps.orders.models import Measurement, MeasurementReport, MeasurementSubgroup
+
+SPC_DIMENSIONS = ('internal_diameter', 'external_diameter', 'length', )
+# each dimension is read at top, middle & bottom of a tube
+READING_POSITIONS = ('tolerance_top', 'target', 'tolerance_bottom', )
+# specification values of each dimension tolerance limits are derived from
+SPECIFICATION_LIMIT_VALUES = ('target', 'tolerance_bottom', 'tolerance_top', )
+SPC_STATISTICS = ('n', 'mean', 'std', 'min', 'max', 'lsl', 'usl', 'cp', 'cpk', )
+SUBGROUP_SUMS = ('n', 'sum', 'sum_of_squares', 'min', 'max', )
+# standard normal distribution grid used for range constants integration
+RANGE_INTEGRATION_GRID = np.linspace(-8, 8, 801)
+
+
+def get_measurement_columns() -> List[str]:
+    return [f'{dimension}_{position}' for dimension in SPC_DIMENSIONS for position in READING_POSITIONS]
+
+
+def load_measurements(report_ids: Iterable[int]) -> (np.ndarray, np.ndarray):
+    """
+    Read measurement columns of reports straight into arrays, without model instances.
+    Measurements of archived reports are read from memory-mapped archive files.
+    :return:    report id of each row (sorted) & readings array shaped (rows, dimensions, positions)
+    """
+    report_ids = list(report_ids)
+    rows = Measurement.objects.filter(measurement_report_id__in=report_ids).order_by(
+        'measurement_report_id').values_list('measurement_report_id', *get_measurement_columns())
+    columns_count = 1 + len(SPC_DIMENSIONS) * len(READING_POSITIONS)
+    data = np.fromiter(itertools.chain.from_iterable(rows.iterator()), dtype=float).reshape(-1, columns_count)
+    archived_groups, archived_readings = load_archived_readings(report_ids, get_measurement_columns())
+    groups = np.concatenate((data[:, 0].astype(int), archived_groups))
+    readings = np.concatenate((data[:, 1:], archived_readings))
+    if len(archived_groups):
+        order = np.argsort(groups, kind='stable')
+        groups, readings = groups[order], readings[order]
+    return groups, readings.reshape(-1, len(SPC_DIMENSIONS), len(READING_POSITIONS))
+
+
+def get_specification_columns(dimensions: Iterable[str], prefix: str = '') -> List[str]:
+    """Specification columns of dimensions tolerance limits, in order expected by get_tolerance_limits."""
+    return [f'{prefix}{dimension}_{value}' for dimension in dimensions for value in SPECIFICATION_LIMIT_VALUES]
+
+
+def get_tolerance_limits(spec_values: list, dimensions: Iterable[str]) -> np.ndarray:
+    """Tolerance limits shaped (dimensions, 2) of specification target, bottom & top tolerance of each dimension.
+    Limits are target -/+ tolerance, tolerances of PERCENT_TOLERANCE_DIMENSIONS are percent of target,
+    missing specification gives NaN limits.
+    """
+    spec = np.array([np.nan if value is None else value for value in spec_values], dtype=float).reshape(-1, 3)
+    tolerances = np.abs(spec[:, 1:])
+    percent = np.array([dimension in PERCENT_TOLERANCE_DIMENSIONS for dimension in dimensions], dtype=bool)
+    tolerances[percent] *= np.abs(spec[percent, :1]) / 100
+    return np.column_stack((spec[:, 0] - tolerances[:, 0], spec[:, 0] + tolerances[:, 1]))
+
+
+def load_specification_limits(report_ids: Iterable[int]) -> Dict[int, np.ndarray]:
+    """Return lower & upper specification limits shaped (dimensions, 2) of each report product."""
+    columns = get_specification_columns(SPC_DIMENSIONS, prefix='order__product__specification__')
+    return {report_id: get_tolerance_limits(values, SPC_DIMENSIONS) for report_id, *values
+            in MeasurementReport.objects.filter(id__in=list(report_ids)).values_list('id', *columns)}
+
+
+def to_number(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def compute_statistics(groups: np.ndarray, readings: np.ndarray, limits: Dict[int, np.ndarray]) -> Dict[int, dict]:
+    """
+    Compute statistics of all groups (reports) & dimensions in one vectorized pass.
+    :param groups:      sorted group key of each readings row
+    :param readings:    array shaped (rows, dimensions, positions)
+    :param limits:      specification limits shaped (dimensions, 2) by group key
+    :return:            statistics of each dimension by group key
+    """
+    if not len(groups):
+        return {}
+    keys, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    n = counts * readings.shape[2]
+    means = np.add.reduceat(readings.sum(axis=2), starts, axis=0) / n[:, None]
+    deviations = readings - np.repeat(means, counts, axis=0)[:, :, None]
+    squares = np.add.reduceat((deviations ** 2).sum(axis=2), starts, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.sqrt(squares / (n[:, None] - 1))
+        lsl, usl = (np.array([limits.get(key, np.full((len(SPC_DIMENSIONS), 2), np.nan))[:, i] for key in keys])
+                    for i in (0, 1))
+        cp = (usl - lsl) / (6 * std)
+        cpk = np.minimum(usl - means, means - lsl) / (3 * std)
+    columns = {'mean': means, 'std': std,
+               'min': np.minimum.reduceat(readings.min(axis=2), starts, axis=0),
+               'max': np.maximum.reduceat(readings.max(axis=2), starts, axis=0),
+               'lsl': lsl, 'usl': usl, 'cp': cp, 'cpk': cpk}
+    return {int(key): {dimension: {'n': int(n[row]),
+                                   **{name: to_number(values[row, column]) for name, values in columns.items()}}
+                       for column, dimension in enumerate(SPC_DIMENSIONS)}
+            for row, key in enumerate(keys)}
+
+
+def get_reports_statistics(report_ids: Iterable[int]) -> Dict[int, dict]:
+    """Mean, standard deviation, min/max, Cp & Cpk of each dimension by measurement report id.
+    Reports without measurements are omitted. Whole batch costs three queries.
+    """
+    report_ids = list(report_ids)
+    groups, readings = load_measurements(report_ids)
+    return compute_statistics(groups, readings, load_specification_limits(report_ids))
+
+
+def get_report_statistics(report_id: int) -> dict:
+    return get_reports_statistics([report_id]).get(report_id, {})
+
+
+def get_measurements_statistics(measurements: List[Measurement], limits: np.ndarray) -> dict:
+    """Statistics of each dimension of already loaded measurements of single report.
+    :param limits:  specification limits shaped (dimensions, 2)
+    """
+    readings = np.array([[getattr(measurement, column) for column in get_measurement_columns()]
+                         for measurement in measurements], dtype=float)
+    readings = readings.reshape(-1, len(SPC_DIMENSIONS), len(READING_POSITIONS))
+    return compute_statistics(np.zeros(len(measurements), dtype=int), readings, {0: limits}).get(0, {})
+
+
+def compute_subgroup_sums(groups: np.ndarray, readings: np.ndarray) -> Dict[int, np.ndarray]:
+    """Reduce readings of each group (report) to subgroup sums shaped (dimensions, SUBGROUP_SUMS)."""
+    if not len(groups):
+        return {}
+    keys, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    n = np.repeat(counts[:, None] * readings.shape[2], len(SPC_DIMENSIONS), axis=1)
+    sums = np.stack((n,
+                     np.add.reduceat(readings.sum(axis=2), starts, axis=0),
+                     np.add.reduceat((readings ** 2).sum(axis=2), starts, axis=0),
+                     np.minimum.reduceat(readings.min(axis=2), starts, axis=0),
+                     np.maximum.reduceat(readings.max(axis=2), starts, axis=0)), axis=2)
+    return dict(zip(keys.tolist(), sums))
+
+
+def refresh_subgroups(order_ids: Iterable[int]) -> int:
+    """
+    Recompute control chart subgroups of given orders from their own measurements,
+    so product rollups are updated incrementally, without scanning other orders.
+    :return:    number of stored subgroups
+    """
+    reports = list(MeasurementReport.objects.filter(order_id__in=list(order_ids)).values_list(
+        'id', 'order_id', 'order__product_id', 'order__date_of_production'))
+    sums = compute_subgroup_sums(*load_measurements([report[0] for report in reports]))
+    subgroups = [MeasurementSubgroup(order_id=order_id, product_id=product_id, date_of_production=date_of_production,
+                                     dimension=dimension, n=int(values[0]),
+                                     **dict(zip(SUBGROUP_SUMS[1:], values[1:])))
+                 for report_id, order_id, product_id, date_of_production in reports if report_id in sums
+                 for dimension, values in zip(SPC_DIMENSIONS, sums[report_id].tolist())]
+    with transaction.atomic():
+        MeasurementSubgroup.objects.filter(order_id__in=[report[1] for report in reports]).delete()
+        MeasurementSubgroup.objects.bulk_create(subgroups, batch_size=MEASUREMENTS_BATCH_SIZE)
+    return len(subgroups)
+
+
+@functools.lru_cache(maxsize=None)
+def get_range_constants(n: int) -> (float, float):
+    """
+    Return d2 & d3 control chart constants: mean & standard deviation of range of n standard normal values.
+    Constants are integrated numerically, as subgroups are much bigger than tabulated ones.
+    E[R] = integral of P(min < x < max), E[R^2] = 2 * integral over x < y of P(min < x, max > y).
+    """
+    x = RANGE_INTEGRATION_GRID
+    step = x[1] - x[0]
+    cdf = np.array([0.5 * (1 + math.erf(value / math.sqrt(2))) for value in x])
+    d2 = np.sum(1 - cdf ** n - (1 - cdf) ** n) * step
+    lower, upper = cdf[:, None], cdf[None, :]
+    outside = 1 - (1 - lower) ** n - upper ** n + np.clip(upper - lower, 0, None) ** n
+    # trapezoidal rule: diagonal lies on the integration area border
+    second_moment = (2 * np.sum(np.triu(outside, k=1)) + np.trace(outside)) * step ** 2
+    return float(d2), float(math.sqrt(max(second_moment - d2 ** 2, 0)))
+
+
+def get_control_chart(product_id: int, dimension: str, date_from: Optional[datetime.date] = None,
+                      date_to: Optional[datetime.date] = None) -> dict:
+    """
+    Build X-bar & R control chart of product dimension reading subgroup rollups only.
+    Orders are subgroups of different sizes, so process sigma is estimated as mean of R / d2(n)
+    and control limits are computed for each subgroup.
+    :param product_id:  product sap id
+    """
+    subgroups = MeasurementSubgroup.objects.filter(product_id=product_id, dimension=dimension)
+    if date_from is not None:
+        subgroups = subgroups.filter(date_of_production__gte=date_from)
+    if date_to is not None:
+        subgroups = subgroups.filter(date_of_production__lte=date_to)
+    rows = list(subgroups.order_by('date_of_production', 'order_id').values_list(
+        'order_id', 'date_of_production', 'n', 'sum', 'min', 'max'))
+    if not rows:
+        return {'center_line': None, 'r_bar': None, 'sigma': None, 'subgroups': []}
+    order_ids, dates, n, sums, minimums, maximums = zip(*rows)
+    n, sums = np.array(n), np.array(sums)
+    means, ranges = sums / n, np.array(maximums) - np.array(minimums)
+    d2, d3 = np.array([get_range_constants(size) for size in n.tolist()]).T
+    sigma = np.mean(ranges / d2)
+    center_line = sums.sum() / n.sum()
+    x_bar_limits = np.column_stack((center_line - 3 * sigma / np.sqrt(n), center_line + 3 * sigma / np.sqrt(n)))
+    r_limits = np.column_stack((np.clip(d2 - 3 * d3, 0, None) * sigma, d2 * sigma, (d2 + 3 * d3) * sigma))
+    out_of_control = ((means < x_bar_limits[:, 0]) | (means > x_bar_limits[:, 1]) |
+                      (ranges < r_limits[:, 0]) | (ranges > r_limits[:, 2]))
+    columns = {'order_id': order_ids, 'date_of_production': dates, 'n': n.tolist(), 'mean': means.tolist(),
+               'range': ranges.tolist(), 'x_bar_lcl': x_bar_limits[:, 0].tolist(),
+               'x_bar_ucl': x_bar_limits[:, 1].tolist(), 'r_lcl': r_limits[:, 0].tolist(),
+               'r_center': r_limits[:, 1].tolist(), 'r_ucl': r_limits[:, 2].tolist(),
+               'out_of_control': out_of_control.tolist()}
+    return {'center_line': float(center_line), 'r_bar': float(ranges.mean()), 'sigma': float(sigma),
+            'subgroups': [dict(zip(columns, point)) for point in zip(*columns.values())]}
@@ -70,7 +70,7 @@ class MeasurementReportPostDictProvider(PostDictProvider):
         self.post_dict = factory.build(dict, FACTORY_CLASS=MeasurementReportFactory)
 
     def get_post_data_as_dict(self):
-        for key in self.post_dict:
+        for key in list(self.post_dict):
             if key == 'order':
                 self.post_dict['order_sap_id'] = self.post_dict[key].order_sap_id
                 del self.post_dict[key]
@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import DatabaseError
+from django.forms import model_to_dict
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.orders.archive import archive_orders, get_report_measurements, write_segment
+from apps.orders.exports import iter_order_export_rows
+from apps.orders.models import Order, Measurement, MeasurementArchive
+from apps.orders.spc import get_reports_statistics
+from apps.orders.tests.factories import MeasurementFactory, MeasurementReportFactory, OrderFactory
+from apps.orders.verdicts import evaluate_verdicts
+from apps.users.tests import PASSWORD
+from apps.users.tests.factories import CxUserFactory
+
+
+class MeasurementArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.orders = [OrderFactory.create(status='Done', date_of_production=date)
+                      for date in ('2020-01-05', '2020-01-20', '2020-02-03')]
+        cls.open_order = OrderFactory.create(status='Open', date_of_production='2020-01-10')
+        for count, order in enumerate(cls.orders + [cls.open_order]):
+            report = MeasurementReportFactory.create(order=order)
+            MeasurementFactory.create_batch(size=count + 2, measurement_report=report, remarks=None, weight=None)
+        MeasurementFactory.create(measurement_report=cls.orders[0].measurement_report)
+        cls.user = CxUserFactory.create()
+
+    def setUp(self) -> None:
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root)
+        settings_override = self.settings(MEASUREMENTS_ARCHIVE_ROOT=archive_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.archive_root = archive_root
+        # test transaction is never committed, segments are published right away
+        on_commit_patch = mock.patch('apps.orders.archive.transaction.on_commit', side_effect=lambda func: func())
+        on_commit_patch.start()
+        self.addCleanup(on_commit_patch.stop)
+
+    def get_measurements(self, order):
+        return [model_to_dict(measurement) for measurement in get_report_measurements(
+            Order.objects.get(id=order.id).measurement_report)]
+
+    def test_archive_closed_orders(self):
+        """Act: archive all orders <> Exp: measurements of closed orders moved to monthly partitions
+        """
+        self.assertEqual(archive_orders(Order.objects.all()), (3, 10))
+        self.assertFalse(Measurement.objects.filter(measurement_report__order__status='Done').exists())
+        self.assertEqual(Measurement.objects.count(), 5)
+        self.assertEqual(sorted(os.listdir(self.archive_root)), ['2020-01', '2020-02'])
+        self.assertEqual(list(MeasurementArchive.objects.order_by('id').values_list('partition', 'offset', 'count')),
+                         [('2020-01', 0, 3), ('2020-01', 3, 3), ('2020-02', 0, 4)])
+        self.assertEqual(archive_orders(Order.objects.all()), (0, 0))
+
+    def test_measurement_inserted_while_archiving_kept(self):
+        """Act: insert measurement of archived report after rows are read <> Exp: only archived rows deleted
+        """
+        inserted = []
+
+        def write_and_insert(partition, columns):
+            inserted.append(MeasurementFactory.create(measurement_report=self.orders[2].measurement_report))
+            return write_segment(partition, columns)
+
+        with mock.patch('apps.orders.archive.write_segment', side_effect=write_and_insert):
+            self.assertEqual(archive_orders(Order.objects.filter(id=self.orders[2].id)), (1, 4))
+        self.assertEqual(list(Measurement.objects.filter(measurement_report__order=self.orders[2])), inserted)
+
+    def test_failed_archiving_discards_segment(self):
+        """Act: archive orders, pointers insert fails <> Exp: no segment left, measurements kept in database
+        """
+        with mock.patch('apps.orders.archive.MeasurementArchive.objects.bulk_create', side_effect=DatabaseError), \
+                mock.patch('apps.orders.archive.transaction.on_commit'), self.assertRaises(DatabaseError):
+            archive_orders(Order.objects.all())
+        self.assertEqual(os.listdir(os.path.join(self.archive_root, '2020-01')), [])
+        self.assertEqual(Measurement.objects.count(), 15)
+        self.assertEqual(archive_orders(Order.objects.all()), (3, 10))
+        self.assertEqual(os.listdir(os.path.join(self.archive_root, '2020-01')), ['000001'])
+
+    def test_unreadable_segment_reads_database(self):
+        """Act: read measurements of report with pointer to unpublished & short segment <> Exp: database rows
+        """
+        order = self.orders[1]
+        measurements = self.get_measurements(order)
+        report_ids = [order.measurement_report.id]
+        statistics = get_reports_statistics(report_ids)
+        pointer = MeasurementArchive.objects.create(measurement_report=order.measurement_report, partition='2020-01',
+                                                    segment=1, offset=0, count=len(measurements))
+        with self.assertLogs('apps.orders.archive', level='WARNING'):
+            self.assertEqual(self.get_measurements(order), measurements)
+            self.assertEqual(get_reports_statistics(report_ids), statistics)
+            archive_orders(Order.objects.filter(id=self.orders[0].id))
+            MeasurementArchive.objects.filter(id=pointer.id).update(count=len(measurements) + 10)
+            self.assertEqual(self.get_measurements(order), measurements)
+            self.assertEqual([row[-1] for row in iter_order_export_rows(Order.objects.filter(id=order.id))],
+                             [measurement['remarks'] for measurement in measurements])
+
+    def test_archived_report_not_edited(self):
+        """Act: post measurement report of archived, reopened order <> Exp: redirect, measurements not changed
+        """
+        archive_orders(Order.objects.all())
+        Order.objects.filter(id=self.orders[0].id).update(status='Open')
+        self.client.login(username=self.user.username, password=PASSWORD)
+        response = self.client.post(reverse('orders:measurement-report-update', args=(self.orders[0].id, )),
+                                    {'author': 'Author', 'measurements-TOTAL_FORMS': 0,
+                                     'measurements-INITIAL_FORMS': 0})
+        self.assertRedirects(response, reverse('orders:orders-list'))
+        self.assertEqual(MeasurementArchive.objects.get(measurement_report__order=self.orders[0]).count, 3)
+
+    def test_transparent_reads(self):
+        """Act: archive orders <> Exp: same measurements, statistics & export rows as before archiving
+        """
+        report_ids = [order.measurement_report.id for order in self.orders]
+        measurements = [self.get_measurements(order) for order in self.orders]
+        statistics = get_reports_statistics(report_ids)
+        export_rows = list(iter_order_export_rows(Order.objects.all()))
+        archive_orders(Order.objects.all())
+        self.assertEqual([self.get_measurements(order) for order in self.orders], measurements)
+        self.assertEqual(get_reports_statistics(report_ids), statistics)
+        self.assertEqual(list(iter_order_export_rows(Order.objects.all())), export_rows)
+
+    def test_archived_verdicts_kept(self):
+        """Act: evaluate verdicts of archived order <> Exp: verdict given before archiving kept
+        """
+        Order.objects.filter(id=self.orders[0].id).update(verdict='Pass', failing_pallets_count=0)
+        archive_orders(Order.objects.all())
+        evaluate_verdicts([self.orders[0].id])
+        self.assertEqual(Order.objects.get(id=self.orders[0].id).verdict, 'Pass')
+
+    def test_detail_view(self):
+        archive_orders(Order.objects.all())
+        self.client.login(username=self.user.username, password=PASSWORD)
+        response = self.client.get(reverse('orders:measurement-report-detail', args=(self.orders[2].id, )))
+        self.assertEqual(len(response.context['measurements']), 4)
+        self.assertContains(response, response.context['measurements'][0].remarks or '')
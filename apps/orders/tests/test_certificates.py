@@ -0,0 +1,113 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.orders.archive import archive_orders
+from apps.orders.certificates import get_certificate_data, get_certificate_filename, get_closed_orders
+from apps.orders.models import MeasurementReport, Order
+from apps.orders.spc import READING_POSITIONS
+from apps.orders.tests.factories import MeasurementFactory, MeasurementReportFactory, OrderFactory
+from apps.pdf_creator import render_pdf
+from apps.products.tests.factories import SpecificationFactory
+from apps.users.tests import PASSWORD
+from apps.users.tests.factories import CxUserFactory
+
+
+class CertificateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.specification = SpecificationFactory.create(internal_diameter_target=76.0,
+                                                        internal_diameter_tolerance_top=0.5,
+                                                        internal_diameter_tolerance_bottom=0.5)
+        cls.orders = [OrderFactory.create(product=cls.specification.product, status=status, date_of_production=date)
+                      for status, date in (('Done', '2020-01-05'), ('Done', '2020-01-20'), ('Done', '2020-02-03'),
+                                           ('Open', '2020-01-10'))]
+        readings = {f'internal_diameter_{position}': 76.1 for position in READING_POSITIONS}
+        for order in cls.orders:
+            report = MeasurementReportFactory.create(order=order)
+            MeasurementFactory.create_batch(size=2, measurement_report=report, **readings)
+        MeasurementFactory.create(measurement_report=cls.orders[0].measurement_report,
+                                  **{**readings, 'internal_diameter_target': 77.0})
+        cls.user = CxUserFactory.create()
+
+    def setUp(self) -> None:
+        for setting, path in (('PDF_CACHE_ROOT', tempfile.mkdtemp()), ('MEASUREMENTS_ARCHIVE_ROOT', tempfile.mkdtemp())):
+            self.addCleanup(shutil.rmtree, path)
+            settings_override = self.settings(**{setting: path})
+            settings_override.enable()
+            self.addCleanup(settings_override.disable)
+        self.client.login(username=self.user.username, password=PASSWORD)
+
+    def test_certificate_results(self):
+        """Act: get certificate data of closed order <> Exp: readings summary & pallets table with tolerance flags
+        """
+        _, context = get_certificate_data(get_closed_orders().get(id=self.orders[0].id))
+        internal_diameter = context['results'][0]
+        self.assertEqual((internal_diameter.lsl, internal_diameter.usl, internal_diameter.max), (75.5, 76.5, 77.0))
+        self.assertEqual(internal_diameter.failing_count, 1)
+        self.assertEqual(len(context['pallets']), 3)
+        column = [row.name for row in context['columns']].index('internal_diameter_target')
+        self.assertEqual([pallet[column] for pallet in context['pallets']], [(76.1, False), (76.1, False), (77.0, True)])
+
+    def test_certificate_key_of_archived_order(self):
+        """Act: archive closed order <> Exp: same certificate content key
+        """
+        key, _ = get_certificate_data(get_closed_orders().get(id=self.orders[0].id))
+        # test transaction is never committed, segment is published right away
+        with mock.patch('apps.orders.archive.transaction.on_commit', side_effect=lambda func: func()):
+            archive_orders(Order.objects.filter(id=self.orders[0].id))
+        self.assertEqual(get_certificate_data(get_closed_orders().get(id=self.orders[0].id))[0], key)
+
+    def test_certificate_key_of_changed_measurements(self):
+        """Act: change measurements of report <> Exp: new certificate content key
+        """
+        key, _ = get_certificate_data(get_closed_orders().get(id=self.orders[0].id))
+        MeasurementReport.touch_measurements([self.orders[0].id])
+        self.assertNotEqual(get_certificate_data(get_closed_orders().get(id=self.orders[0].id))[0], key)
+
+    def test_certificate_view(self):
+        """Act: get certificate of closed order twice & of open order <> Exp: pdf rendered once, open order not found
+        """
+        url = reverse('orders:order-certificate', args=(self.orders[0].id, ))
+        with mock.patch('apps.orders.views.render_pdf', side_effect=render_pdf) as render:
+            response = self.client.get(url)
+            self.assertTrue(response.content.startswith(b'%PDF'))
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertFalse([query for query in queries.captured_queries if 'orders_measurement"' in query['sql']])
+            self.assertEqual(self.client.get(url).content, response.content)
+        self.assertEqual(render.call_count, 1)
+        response = self.client.get(reverse('orders:order-certificate', args=(self.orders[3].id, )))
+        self.assertEqual(response.status_code, 404)
+
+    def test_certificates_view(self):
+        """Act: get certificates of orders produced in january <> Exp: ZIP of closed orders certificates
+        """
+        response = self.client.post(reverse('orders:order-certificates'),
+                                    {'date_of_production_after': '2020-01-01', 'date_of_production_before': '2020-01-31'})
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [get_certificate_filename(order) for order in self.orders[:2]])
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+        response = self.client.post(reverse('orders:order-certificates'),
+                                    {'date_of_production_after': '2021-01-01', 'date_of_production_before': '2021-01-31'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_generate_certificates_command(self):
+        """Act: generate certificates of all orders <> Exp: certificate file of each closed order
+        """
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        call_command('generate_certificates', '2020-01-01', '2020-12-31', output=output, processes=2,
+                     stdout=io.StringIO())
+        self.assertEqual(sorted(os.listdir(output)), sorted(get_certificate_filename(order)
+                                                            for order in self.orders[:3]))
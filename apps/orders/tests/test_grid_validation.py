@@ -0,0 +1,100 @@
+from django.test import TestCase
+
+from apps.orders.forms import MeasurementFormSet
+from apps.orders.spc import SPC_DIMENSIONS, READING_POSITIONS
+from apps.orders.tests.factories import MeasurementReportFactory, MeasurementFactory
+from apps.user_texts import FORMSET_MSG
+
+# cell values of different columns, each checked by batch & form by form validation
+CELL_VALUES = ['76.1', '0', '.5', '1e3', '1e-5', '1e16', '-1', '-0', 'nan', 'inf', 'x', '', ' ', '1_0', '007',
+               '2.0', '2.5', '99999999999999999999', '١٢', ]
+CELL_COLUMNS = ('pallet_number', 'internal_diameter_target', 'weight', 'remarks', )
+
+
+def get_grid_data(rows: list, initial_forms: int = 0) -> dict:
+    data = {'measurements-TOTAL_FORMS': str(len(rows)), 'measurements-INITIAL_FORMS': str(initial_forms),
+            'measurements-MIN_NUM_FORMS': '1', 'measurements-MAX_NUM_FORMS': '1000'}
+    for index, row in enumerate(rows):
+        values = {'pallet_number': str(index + 1), **{f'{dimension}_{position}': '76.1' for dimension in SPC_DIMENSIONS
+                                                      for position in READING_POSITIONS}, **row}
+        data.update({f'measurements-{index}-{name}': value for name, value in values.items()})
+    return data
+
+
+def validate(data: dict, batch_validation: bool, instance=None):
+    formset = MeasurementFormSet(data=data, instance=instance)
+    formset.batch_validation = batch_validation
+    return formset, formset.is_valid()
+
+
+class MeasurementGridTest(TestCase):
+    def test_cell_errors(self):
+        """Act: validate cells of numeric & text columns in batch and form by form
+        <> Exp: same validity & error messages of each cell
+        """
+        for column in CELL_COLUMNS:
+            data = get_grid_data([{column: value} for value in CELL_VALUES])
+            if column == 'pallet_number':
+                # pallet numbers are expected unique as submitted
+                data.update({f'measurements-{index}-remarks': str(index) for index in range(len(CELL_VALUES))})
+            formset, valid = validate(data, batch_validation=False)
+            batch_formset, batch_valid = validate(data, batch_validation=True)
+            self.assertEqual(batch_valid, valid, msg=column)
+            form_errors = {index: {name: list(messages) for name, messages in form.errors.items()}
+                           for index, form in enumerate(formset.forms) if form.errors}
+            self.assertEqual(batch_formset.grid.errors, form_errors, msg=column)
+
+    def test_valid_grid_not_building_forms(self):
+        """Act: validate valid grid <> Exp: measurements with values of form cleaning, no form built
+        """
+        data = get_grid_data([{'weight': '120', 'remarks': ' ok '}, {'internal_diameter_target': '1e3'},
+                              {'internal_diameter_target': '', 'DELETE': 'on'}, {}])
+        # unchanged extra row
+        data = {key: value for key, value in data.items() if not key.startswith('measurements-3-')}
+        formset, valid = validate(data, batch_validation=True)
+        self.assertTrue(valid)
+        self.assertNotIn('forms', formset.__dict__)
+        added, changed, kept_ids, _ = formset.get_changes()
+        self.assertEqual([(measurement.weight, measurement.remarks, measurement.internal_diameter_target)
+                          for measurement in added], [(120, 'ok', 76.1), (None, '', 1000.0)])
+        self.assertEqual((changed, kept_ids), ([], set()))
+
+    def test_pallet_numbers_uniqueness(self):
+        """Act: validate grid with repeated pallet number <> Exp: formset error on first form
+        """
+        formset, valid = validate(get_grid_data([{'pallet_number': '3'}, {'pallet_number': '3'}]),
+                                  batch_validation=True)
+        self.assertFalse(valid)
+        self.assertEqual(formset.forms[0].errors['pallet_number'], [FORMSET_MSG['pallet_number']])
+
+    def test_changes_of_existing_measurements(self):
+        """Act: validate grid of report measurements <> Exp: same changes in batch and form by form
+        """
+        measurement_report = MeasurementReportFactory.create()
+        measurements = MeasurementFactory.create_batch(3, measurement_report=measurement_report)
+        rows = [{'id': str(measurement.id), 'pallet_number': str(measurement.pallet_number),
+                 **{name: str(getattr(measurement, name)) for name in ('length_target', 'weight')}}
+                for measurement in measurements]
+        rows[0]['length_target'] = '99.5'
+        rows[1]['DELETE'] = 'on'
+        rows.append({'pallet_number': '999'})
+        data = get_grid_data(rows, initial_forms=3)
+        changes = []
+        for batch_validation in (False, True):
+            formset, valid = validate(data, batch_validation=batch_validation, instance=measurement_report)
+            self.assertTrue(valid)
+            added, changed, kept_ids, changed_fields = formset.get_changes()
+            changes.append(([measurement.pallet_number for measurement in added],
+                            [(measurement.id, measurement.length_target) for measurement in changed],
+                            kept_ids, changed_fields))
+        self.assertEqual(changes[0], changes[1])
+        self.assertIn('length_target', changes[1][3])
+
+    def test_measurement_id_of_other_report(self):
+        """Act: validate grid with id of other report measurement <> Exp: grid not supported, form by form validation
+        """
+        measurement_report, other_measurement = MeasurementReportFactory.create(), MeasurementFactory.create()
+        data = get_grid_data([{'id': str(other_measurement.id)}], initial_forms=1)
+        formset, valid = validate(data, batch_validation=True, instance=measurement_report)
+        self.assertIsNone(formset.grid)
+        self.assertEqual(valid, validate(data, batch_validation=False, instance=measurement_report)[1])
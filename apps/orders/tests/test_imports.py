@@ -0,0 +1,78 @@
+import datetime
+import io
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.clients.tests.factories import ClientFactory
+from apps.orders.imports import import_orders
+from apps.orders.models import Order
+from apps.orders.tests.factories import OrderFactory
+from apps.products.tests.factories import ProductFactory
+from apps.sap_extracts import read_extract_rows
+from apps.user_texts import ERROR_MSG, IMPORT_MSG
+
+
+class OrderImportTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client_sap_id = ClientFactory.create().client_sap_id
+        self.product_sap_id = ProductFactory.create().product_sap_id
+        self.existing_order = OrderFactory.create(order_sap_id=20000000)
+
+    def get_csv_rows(self, lines):
+        header = "order_sap_id,client_sap_id,product_sap_id,date_of_production,quantity,length\n"
+        return read_extract_rows(io.StringIO(header + '\n'.join(lines)), extract_format='csv')
+
+    def test_import_csv(self):
+        """Act: import valid & invalid rows in small chunks <> Exp: valid rows created, errors per row reported
+        """
+        c, p = self.client_sap_id, self.product_sap_id
+        rows = self.get_csv_rows([f"30000001,{c},{p},2020-05-01,10,12.5",
+                                  f"30000002,{c},{p},,,",
+                                  f"30000003,9999999,{p},2020-05-01,1,1",
+                                  f"20000000,{c},{p},2020-05-01,1,1",
+                                  f"30000004,{c},{p},2020-05-02,1,1",
+                                  f"30000004,{c},{p},2020-05-02,1,1",
+                                  f"123,{c},{p},not a date,x,1"])
+        result = import_orders(rows, chunk_size=2)
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.rejected, 4)
+        errors = dict(result.errors)
+        self.assertIn(ERROR_MSG['order']['client']['invalid_choice'], errors[4])
+        self.assertIn(ERROR_MSG['order']['order_sap_id']['unique'], errors[5])
+        self.assertEqual(len([row_number for row_number, _ in result.errors if row_number == 8]), 3)
+        self.assertEqual(errors[7], IMPORT_MSG['duplicated_row'])
+        order = Order.objects.get(order_sap_id=30000002)
+        self.assertEqual((order.date_of_production, order.quantity, order.status),
+                         (datetime.date.today(), None, 'Started'))
+
+    def test_import_updates_cached_bounds(self):
+        """Act: import order after production date bounds were cached <> Exp: bounds extended
+        """
+        Order.get_date_of_production('max')
+        import_orders(self.get_csv_rows([f"30000001,{self.client_sap_id},{self.product_sap_id},4200-01-01,1,1"]))
+        self.assertEqual(Order.get_date_of_production('max'), '4200-01-01')
+
+    def test_import_jsonl_command(self):
+        """Act: run import command for JSON lines file <> Exp: orders created, invalid line reported
+        """
+        content = f'{{"order_sap_id": 30000001, "client": {self.client_sap_id}, "product": {self.product_sap_id}}}' \
+                  f'\n\nnot json\n'
+        rows = read_extract_rows(io.StringIO(content), extract_format='jsonl')
+        self.assertEqual([row_number for row_number, _ in rows], [1, 3])
+        path = self.get_temp_file(content)
+        out = io.StringIO()
+        call_command('import_orders', path, stdout=out)
+        self.assertIn(f"row 3: {IMPORT_MSG['invalid_row']}", out.getvalue())
+        self.assertIn("Created 1 orders", out.getvalue())
+        self.assertTrue(Order.objects.filter(order_sap_id=30000001).exists())
+
+    def get_temp_file(self, content):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
@@ -0,0 +1,152 @@
+import json
+import time
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.constants import DEVICE_TOKEN_MAX_AGE
+from apps.orders.ingestion import MeasurementBuffer, issue_device_token, measurement_buffer
+from apps.orders.models import Measurement, MeasurementArchive, Order
+from apps.orders.spc import SPC_DIMENSIONS, READING_POSITIONS
+from apps.orders.tests.factories import OrderFactory, MeasurementReportFactory
+from apps.users.tests.factories import CxUserFactory
+
+
+def get_reading(pallet_number: int) -> dict:
+    return {'pallet_number': pallet_number, **{f'{dimension}_{position}': 76.1
+                                               for dimension in SPC_DIMENSIONS for position in READING_POSITIONS}}
+
+
+class MeasurementIngestViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.order = OrderFactory.create()
+        cls.user = CxUserFactory.create()
+        cls.token = issue_device_token(cls.user)
+
+    def setUp(self) -> None:
+        # buffered measurements are written by explicit flush only
+        patcher = mock.patch.object(measurement_buffer, 'interval', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(measurement_buffer.take)
+
+    def post(self, payload, token=None, order_sap_id=None):
+        return self.client.post(reverse('orders:measurement-ingest', args=(order_sap_id or self.order.order_sap_id, )),
+                                data=json.dumps(payload), content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Token {token or self.token}')
+
+    def test_batch_readings(self):
+        """Act: post readings batches of two stations <> Exp: report started by station, buffered batch insert
+        """
+        response = self.post({'station': 'line-1', 'readings': [get_reading(1), get_reading(2)]})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'accepted': 2, 'written': 0})
+        self.assertEqual(self.post({'reading': get_reading(3)}).status_code, 202)
+        self.assertFalse(Measurement.objects.exists())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(measurement_buffer.flush(), 3)
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if query['sql'].startswith('INSERT INTO "orders_measurement"')]), 1)
+        order = Order.objects.get(id=self.order.id)
+        self.assertEqual((order.status, order.measurement_report.author), ('Open', 'line-1'))
+        self.assertEqual(list(order.measurement_report.measurements.values_list('pallet_number', flat=True)),
+                         [1, 2, 3])
+        self.assertEqual(order.measurement_subgroups.get(dimension='length').n, 9)
+
+    def test_invalid_readings(self):
+        """Act: post invalid reading & duplicated pallets <> Exp: bad request with errors, nothing buffered
+        """
+        response = self.post({'readings': [get_reading(1), {**get_reading(2), 'length_target': 'x'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+        response = self.post({'readings': [get_reading(1), get_reading(1)]})
+        self.assertEqual(list(response.json()['errors']), ['pallet_number'])
+        for payload in ([get_reading(1)], {'readings': []}, {}):
+            self.assertEqual(self.post(payload).status_code, 400)
+        self.assertEqual(measurement_buffer.flush(), 0)
+
+    def test_pallet_numbers_clash(self):
+        """Act: post readings of pallets buffered & written to report <> Exp: bad request, nothing buffered
+        """
+        self.assertEqual(self.post({'readings': [get_reading(1), get_reading(2)]}).status_code, 202)
+        response = self.post({'readings': [get_reading(2), get_reading(3)]})
+        self.assertEqual((response.status_code, response.json()['pallet_numbers']), (400, [2]))
+        self.assertEqual(measurement_buffer.flush(), 2)
+        response = self.post({'reading': get_reading(1)})
+        self.assertEqual((response.status_code, list(response.json()['errors'])), (400, ['pallet_number']))
+        self.assertEqual(self.post({'reading': get_reading(3)}).status_code, 202)
+        self.assertEqual(measurement_buffer.flush(), 1)
+
+    def test_access(self):
+        """Act: post readings with invalid token, for unknown, closed & archived order <> Exp: rejected
+        """
+        self.assertEqual(self.post({'reading': get_reading(1)}, token='invalid').status_code, 401)
+        self.assertEqual(self.post({'reading': get_reading(1)}, order_sap_id=1).status_code, 404)
+        closed_order = MeasurementReportFactory.create(order=OrderFactory.create(status='Done')).order
+        self.assertEqual(self.post({'reading': get_reading(1)}, order_sap_id=closed_order.order_sap_id).status_code,
+                         409)
+        archived_report = MeasurementReportFactory.create(order=OrderFactory.create(status='Open'))
+        MeasurementArchive.objects.create(measurement_report=archived_report, partition='2020-01', segment=1,
+                                          offset=0, count=0)
+        self.assertEqual(self.post({'reading': get_reading(1)},
+                                   order_sap_id=archived_report.order.order_sap_id).status_code, 409)
+
+    def test_token_revocation(self):
+        """Act: post readings with expired token, of account without permission & deactivated account
+        <> Exp: rejected on first request after change
+        """
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + DEVICE_TOKEN_MAX_AGE + 1):
+            self.assertEqual(self.post({'reading': get_reading(1)}).status_code, 401)
+        type(self.user).objects.filter(pk=self.user.pk).update(is_superuser=False)
+        self.assertEqual(self.post({'reading': get_reading(1)}).status_code, 403)
+        type(self.user).objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.post({'reading': get_reading(1)}).status_code, 401)
+
+
+class MeasurementBufferTest(TestCase):
+    def test_write_when_full(self):
+        """Act: add measurements above buffer size <> Exp: buffer written at once
+        """
+        report = MeasurementReportFactory.create()
+        buffer = MeasurementBuffer(size=3, interval=None)
+        measurements = [Measurement(measurement_report=report, **get_reading(pallet)) for pallet in range(4)]
+        self.assertEqual(buffer.add(report.order_id, measurements[:2]), 0)
+        self.assertEqual(buffer.add(report.order_id, measurements[2:]), 4)
+        self.assertEqual(report.measurements.count(), 4)
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_write_orders_separately(self):
+        """Act: write buffer with measurements of closed, failing & open orders <> Exp: open order written
+        """
+        reports = MeasurementReportFactory.create_batch(size=3)
+        buffer = MeasurementBuffer(size=10, interval=None)
+        for report in reports:
+            buffer.add(report.order_id, [Measurement(measurement_report=report, **get_reading(1))])
+        Order.objects.filter(id=reports[0].order_id).update(status='Done')
+        failing_order_id = reports[1].order_id
+
+        def refresh_subgroups(order_ids):
+            if failing_order_id in order_ids:
+                raise DatabaseError
+
+        with mock.patch('apps.orders.ingestion.refresh_subgroups', side_effect=refresh_subgroups), \
+                self.assertLogs('apps.orders.ingestion', level='WARNING'):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual([report.measurements.count() for report in reports], [0, 0, 1])
+
+    def test_write_pallets_of_other_worker(self):
+        """Act: flush buffers of two workers with the same pallet of report <> Exp: pallet written once
+        """
+        report = MeasurementReportFactory.create()
+        buffers = [MeasurementBuffer(size=10, interval=None) for _ in range(2)]
+        for pallets, buffer in zip(([1, 2], [2, 3]), buffers):
+            buffer.add(report.order_id, [Measurement(measurement_report=report, **get_reading(pallet))
+                                         for pallet in pallets])
+        self.assertEqual(buffers[0].flush(), 2)
+        with self.assertLogs('apps.orders.ingestion', level='ERROR'):
+            self.assertEqual(buffers[1].flush(), 1)
+        self.assertEqual(sorted(report.measurements.values_list('pallet_number', flat=True)), [1, 2, 3])
@@ -0,0 +1,60 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.constants import STRFTIME_DATE
+from apps.orders.models import Order
+from apps.orders.tests.factories import OrderFactory
+
+
+class OrderDateOfProductionTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.orders = [OrderFactory.create(date_of_production=datetime.date(2020, 1, day)) for day in (10, 15, 20)]
+
+    def assert_bounds(self, date_min, date_max):
+        self.assertEqual(Order.get_date_of_production('min'), date_min.strftime(STRFTIME_DATE))
+        self.assertEqual(Order.get_date_of_production('max'), date_max.strftime(STRFTIME_DATE))
+
+    def test_bounds_are_cached(self):
+        """Act: get min & max date twice <> Exp: only first call hits db
+        """
+        with self.assertNumQueries(1):
+            self.assert_bounds(datetime.date(2020, 1, 10), datetime.date(2020, 1, 20))
+        with self.assertNumQueries(0):
+            self.assert_bounds(datetime.date(2020, 1, 10), datetime.date(2020, 1, 20))
+
+    def test_no_orders(self):
+        """Act: get min & max date of empty orders table <> Exp: current date
+        """
+        Order.objects.all().delete()
+        self.assert_bounds(datetime.date.today(), datetime.date.today())
+
+    def test_created_order_extends_bounds(self):
+        """Act: create orders out of cached bounds <> Exp: bounds extended without aggregation
+        """
+        Order.get_date_of_production('min')
+        OrderFactory.create(date_of_production=datetime.date(2019, 12, 31))
+        OrderFactory.create(date_of_production='2020-02-01')
+        with self.assertNumQueries(0):
+            self.assert_bounds(datetime.date(2019, 12, 31), datetime.date(2020, 2, 1))
+
+    def test_updated_bound_order(self):
+        """Act: move order holding max date before other orders <> Exp: bounds recalculated
+        """
+        Order.get_date_of_production('max')
+        order = Order.objects.get(pk=self.orders[-1].pk)
+        order.date_of_production = datetime.date(2020, 1, 1)
+        order.save()
+        self.assert_bounds(datetime.date(2020, 1, 1), datetime.date(2020, 1, 15))
+
+    def test_deleted_orders(self):
+        """Act: delete order within bounds, then order holding min date <> Exp: bounds recalculated only after latter
+        """
+        Order.get_date_of_production('max')
+        self.orders[1].delete()
+        with self.assertNumQueries(0):
+            self.assert_bounds(datetime.date(2020, 1, 10), datetime.date(2020, 1, 20))
+        self.orders[0].delete()
+        self.assert_bounds(datetime.date(2020, 1, 20), datetime.date(2020, 1, 20))
@@ -0,0 +1,143 @@
+import datetime
+
+import numpy as np
+from django.test import TestCase
+
+from apps.orders.models import MeasurementSubgroup
+from apps.orders.spc import get_reports_statistics, get_report_statistics, SPC_DIMENSIONS, READING_POSITIONS, \
+    refresh_subgroups, get_range_constants, get_control_chart, load_specification_limits
+from apps.orders.tests.factories import MeasurementFactory, MeasurementReportFactory, OrderFactory
+from apps.orders.verdicts import get_specification_limits
+from apps.products.tests.factories import SpecificationFactory
+
+
+class SpcStatisticsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        specification = SpecificationFactory.create(internal_diameter_target=76.0, internal_diameter_tolerance_top=0.5,
+                                                    internal_diameter_tolerance_bottom=0.3)
+        cls.report = MeasurementReportFactory.create(order=OrderFactory.create(product=specification.product))
+        cls.other_report = MeasurementReportFactory.create()
+        cls.empty_report = MeasurementReportFactory.create()
+        rng = np.random.RandomState(7)
+        for report, size in ((cls.report, 25), (cls.other_report, 3)):
+            for pallet_number in range(size):
+                readings = {f'{dimension}_{position}': float(value) for dimension, center in
+                            zip(SPC_DIMENSIONS, (76.0, 82.0, 1000.0)) for position, value in
+                            zip(READING_POSITIONS, rng.normal(center, 0.1, size=3))}
+                MeasurementFactory.create(measurement_report=report, pallet_number=pallet_number, **readings)
+
+    def get_readings(self, report, dimension):
+        return np.array([getattr(measurement, f'{dimension}_{position}')
+                         for measurement in report.measurements.all() for position in READING_POSITIONS])
+
+    def test_batch_statistics(self):
+        """Act: compute statistics of reports batch <> Exp: measurements, archive pointers & limits queries,
+        values equal to per report computation
+        """
+        with self.assertNumQueries(3):
+            statistics = get_reports_statistics([self.report.id, self.other_report.id, self.empty_report.id])
+        self.assertEqual(set(statistics), {self.report.id, self.other_report.id})
+        for report in (self.report, self.other_report):
+            for dimension in SPC_DIMENSIONS:
+                readings, result = self.get_readings(report, dimension), statistics[report.id][dimension]
+                self.assertEqual(result['n'], len(readings))
+                self.assertAlmostEqual(result['mean'], readings.mean())
+                self.assertAlmostEqual(result['std'], readings.std(ddof=1))
+                self.assertEqual((result['min'], result['max']), (readings.min(), readings.max()))
+
+    def test_capability_indices(self):
+        """Act: compute statistics of report with product specification <> Exp: Cp & Cpk within target -/+ tolerance
+        """
+        result = get_report_statistics(self.report.id)['internal_diameter']
+        readings = self.get_readings(self.report, 'internal_diameter')
+        std = readings.std(ddof=1)
+        self.assertEqual((result['lsl'], result['usl']), (75.7, 76.5))
+        self.assertAlmostEqual(result['cp'], 0.8 / (6 * std))
+        self.assertAlmostEqual(result['cpk'], min(76.5 - readings.mean(), readings.mean() - 75.7) / (3 * std))
+
+    def test_limits_same_as_verdicts(self):
+        """Act: load report specification limits <> Exp: same as verdict limits of SPC dimensions
+        """
+        specification = self.report.order.product.specification
+        np.testing.assert_array_equal(load_specification_limits([self.report.id])[self.report.id],
+                                      get_specification_limits(specification)[:len(SPC_DIMENSIONS)])
+
+    def test_missing_specification(self):
+        """Act: compute statistics of report without product specification <> Exp: no limits & indices
+        """
+        result = get_report_statistics(self.other_report.id)['length']
+        self.assertEqual([result[name] for name in ('lsl', 'usl', 'cp', 'cpk')], [None] * 4)
+        self.assertEqual(get_report_statistics(self.empty_report.id), {})
+
+
+class ControlChartTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        # stable orders share readings pattern, last order is shifted above process mean
+        pattern = np.random.RandomState(11).normal(0, 0.2, size=(5, len(READING_POSITIONS)))
+        cls.orders = OrderFactory.create_batch(size=8)
+        cls.product = cls.orders[0].product
+        for day, order in enumerate(cls.orders):
+            order.product, order.date_of_production = cls.product, f'2020-01-{day + 1:02}'
+            order.save()
+            center = 76.0 if order != cls.orders[-1] else 77.0
+            report = MeasurementReportFactory.create(order=order)
+            for pallet_number, values in enumerate(pattern):
+                MeasurementFactory.create(measurement_report=report, pallet_number=pallet_number, **{
+                    f'{dimension}_{position}': center + value for dimension in SPC_DIMENSIONS
+                    for position, value in zip(READING_POSITIONS, values)})
+        refresh_subgroups([order.id for order in cls.orders])
+
+    def test_subgroup_sums(self):
+        """Act: refresh order subgroups <> Exp: sums of order readings of each dimension
+        """
+        report = self.orders[0].measurement_report
+        for dimension in SPC_DIMENSIONS:
+            readings = np.array([getattr(measurement, f'{dimension}_{position}')
+                                 for measurement in report.measurements.all() for position in READING_POSITIONS])
+            subgroup = MeasurementSubgroup.objects.get(order=self.orders[0], dimension=dimension)
+            self.assertEqual(subgroup.n, 15)
+            self.assertAlmostEqual(subgroup.sum, readings.sum())
+            self.assertAlmostEqual(subgroup.sum_of_squares, (readings ** 2).sum())
+            self.assertEqual((subgroup.min, subgroup.max), (readings.min(), readings.max()))
+        self.assertEqual(refresh_subgroups([self.orders[0].id]), len(SPC_DIMENSIONS))
+        self.assertEqual(MeasurementSubgroup.objects.count(), len(self.orders) * len(SPC_DIMENSIONS))
+
+    def test_range_constants(self):
+        """Act: integrate range constants <> Exp: tabulated d2 & d3 values
+        """
+        for n, d2, d3 in ((2, 1.128, 0.853), (5, 2.326, 0.864), (10, 3.078, 0.797), (25, 3.931, 0.708)):
+            self.assertEqual(tuple(round(value, 3) for value in get_range_constants(n)), (d2, d3))
+
+    def test_control_chart(self):
+        """Act: build chart of product dimension <> Exp: single query, shifted order out of control
+        """
+        with self.assertNumQueries(1):
+            chart = get_control_chart(self.product.product_sap_id, 'length')
+        subgroups = MeasurementSubgroup.objects.filter(product=self.product, dimension='length')
+        self.assertEqual([point['order_id'] for point in chart['subgroups']], [order.id for order in self.orders])
+        self.assertAlmostEqual(chart['center_line'], sum(s.sum for s in subgroups) / sum(s.n for s in subgroups))
+        self.assertAlmostEqual(chart['r_bar'], np.mean([s.max - s.min for s in subgroups]))
+        self.assertEqual([point['out_of_control'] for point in chart['subgroups']], [False] * 7 + [True])
+        for point in chart['subgroups']:
+            self.assertLess(point['x_bar_lcl'], point['x_bar_ucl'])
+            self.assertLessEqual(point['r_lcl'], point['r_center'])
+
+    def test_control_chart_date_range(self):
+        """Act: build chart within production dates <> Exp: subgroups of orders produced within range only
+        """
+        chart = get_control_chart(self.product.product_sap_id, 'length', date_from=self.orders[1].date_of_production,
+                                  date_to=self.orders[2].date_of_production)
+        self.assertEqual([point['order_id'] for point in chart['subgroups']], [self.orders[1].id, self.orders[2].id])
+        self.assertEqual(get_control_chart(self.product.product_sap_id, 'length', date_from='2030-01-01')['subgroups'],
+                         [])
+
+    def test_order_change_updates_subgroups(self):
+        """Act: move order production date <> Exp: denormalized subgroup dates follow order
+        """
+        order = self.orders[0]
+        order.date_of_production = '2021-01-01'
+        order.save()
+        self.assertEqual(set(order.measurement_subgroups.values_list('date_of_production', flat=True)),
+                         {datetime.date(2021, 1, 1)})
@@ -0,0 +1,133 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.orders.filters import OrderFilter
+from apps.orders.models import Order
+from apps.orders.pivot import get_measurements_pivot
+from apps.orders.spc import SPC_DIMENSIONS, READING_POSITIONS
+from apps.orders.tests.factories import MeasurementFactory, MeasurementReportFactory, OrderFactory
+from apps.orders.verdicts import VERDICT_DIMENSIONS, evaluate_verdicts, get_specification_limits
+from apps.products.tests.factories import SpecificationFactory
+from apps.users.tests import PASSWORD
+from apps.users.tests.factories import CxUserFactory
+
+# target, tolerance bottom, tolerance top (flat crush resistance & moisture content in percent of target)
+SPECIFICATION = {'internal_diameter': (76.0, 0.3, 0.5), 'external_diameter': (82.0, 0.5, 0.5),
+                 'length': (1000.0, 2.0, 2.0), 'flat_crush_resistance': (300, 10, 10), 'moisture_content': (8, 25, 25), }
+
+
+def get_conforming_readings() -> dict:
+    readings = {f'{dimension}_{position}': SPECIFICATION[dimension][0]
+                for dimension in SPC_DIMENSIONS for position in READING_POSITIONS}
+    return {**readings, 'flat_crush_resistance_target': 300, 'moisture_content_target': 8}
+
+
+class VerdictsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.specification = SpecificationFactory.create(**{
+            f'{dimension}_{name}': value for dimension, values in SPECIFICATION.items()
+            for name, value in zip(('target', 'tolerance_bottom', 'tolerance_top'), values)})
+        cls.order = OrderFactory.create(product=cls.specification.product)
+        report = MeasurementReportFactory.create(order=cls.order)
+        cls.measurements = [
+            MeasurementFactory.create(measurement_report=report, **get_conforming_readings()),
+            # reading at tolerance limit & missing reading conform to specification
+            MeasurementFactory.create(measurement_report=report, **{
+                **get_conforming_readings(), 'internal_diameter_tolerance_bottom': 75.7, 'moisture_content_target': None}),
+            MeasurementFactory.create(measurement_report=report, **{
+                **get_conforming_readings(), 'internal_diameter_target': 76.6}),
+            MeasurementFactory.create(measurement_report=report, **{
+                **get_conforming_readings(), 'internal_diameter_target': 75.0, 'moisture_content_target': 11}),
+        ]
+        cls.order_without_specification = MeasurementReportFactory.create().order
+        MeasurementFactory.create(measurement_report=cls.order_without_specification.measurement_report)
+        evaluate_verdicts([cls.order.id, cls.order_without_specification.id])
+
+    def test_measurement_verdicts(self):
+        """Act: evaluate order measurements <> Exp: failing dimensions of each pallet
+        """
+        self.assertEqual([measurement.failing_dimensions for measurement in
+                          self.order.measurement_report.measurements.order_by('id')],
+                         ['', '', 'internal_diameter', 'internal_diameter,moisture_content'])
+
+    def test_order_verdict(self):
+        """Act: evaluate order measurements <> Exp: failing pallets & dimensions summary, no verdict without spec
+        """
+        order = Order.objects.get(id=self.order.id)
+        self.assertEqual((order.verdict, order.failing_pallets_count, order.failing_dimensions),
+                         ('Fail', 2, 'internal_diameter,moisture_content'))
+        order = Order.objects.get(id=self.order_without_specification.id)
+        self.assertEqual((order.verdict, order.failing_pallets_count, order.failing_dimensions), (None, None, ''))
+
+    def test_unchanged_verdicts_not_written(self):
+        """Act: evaluate already evaluated orders <> Exp: read queries only
+        """
+        with self.assertNumQueries(2):
+            self.assertEqual(evaluate_verdicts([self.order.id, self.order_without_specification.id]), 1)
+
+    def test_percent_tolerance_limits(self):
+        """Act: get limits of specification <> Exp: flat crush resistance & moisture content tolerances in percent
+        """
+        limits = dict(zip(VERDICT_DIMENSIONS, get_specification_limits(self.specification).tolist()))
+        self.assertEqual(limits['internal_diameter'], [75.7, 76.5])
+        self.assertEqual(limits['flat_crush_resistance'], [270, 330])
+        self.assertEqual(limits['moisture_content'], [6, 10])
+
+    def test_specification_change(self):
+        """Act: widen & remove product specification tolerance <> Exp: open orders re-evaluated,
+        closed ones by command only
+        """
+        closed_order = OrderFactory.create(product=self.specification.product, status='Done')
+        MeasurementFactory.create(measurement_report=MeasurementReportFactory.create(order=closed_order),
+                                  **{**get_conforming_readings(), 'internal_diameter_target': 76.6})
+        evaluate_verdicts([closed_order.id])
+        self.specification.internal_diameter_tolerance_bottom = 1.0
+        self.specification.internal_diameter_tolerance_top = 1.0
+        self.specification.moisture_content_tolerance_top = 40
+        self.specification.save()
+        self.assertEqual(Order.objects.get(id=self.order.id).verdict, 'Pass')
+        self.assertEqual(Order.objects.get(id=closed_order.id).verdict, 'Fail')
+        call_command('evaluate_verdicts', product=self.specification.product.product_sap_id, stdout=io.StringIO())
+        self.assertEqual(Order.objects.get(id=closed_order.id).verdict, 'Pass')
+        self.specification.delete()
+        self.assertIsNone(Order.objects.get(id=self.order.id).verdict)
+
+    def test_verdict_filter(self):
+        """Act: filter orders by verdict <> Exp: failing & passing orders
+        """
+        orders = Order.objects.all()
+        self.assertEqual(list(OrderFilter({'verdict': 'Fail'}, queryset=orders).qs), [self.order])
+        self.assertEqual(list(OrderFilter({'verdict': 'Pass'}, queryset=orders).qs), [])
+
+    def test_measurements_pivot(self):
+        """Act: pivot order measurements <> Exp: attribute rows with reading flags out of specification tolerance
+        """
+        measurements = list(self.order.measurement_report.measurements.order_by('id'))
+        pivot = {row.name: row for row in get_measurements_pivot(measurements, self.specification)}
+        self.assertEqual([value for value, _ in pivot['pallet_number'].cells],
+                         [measurement.pallet_number for measurement in measurements])
+        self.assertEqual([failing for _, failing in pivot['internal_diameter_target'].cells], [False, False, True, True])
+        self.assertEqual([failing for _, failing in pivot['internal_diameter_tolerance_bottom'].cells], [False] * 4)
+        self.assertEqual(pivot['moisture_content_target'].cells[1:], [(None, False), (8, False), (11, True)])
+        self.assertEqual([pivot[f'internal_diameter_{position}'].group_size for position in READING_POSITIONS],
+                         [3, 0, 0])
+        pivot = get_measurements_pivot(measurements)
+        self.assertFalse(any(failing for row in pivot for _, failing in row.cells))
+
+    def test_detail_pivot(self):
+        """Act: get measurement report detail <> Exp: cells out of tolerance marked, measurements fetched once
+        """
+        user = CxUserFactory.create()
+        self.client.login(username=user.username, password=PASSWORD)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('orders:measurement-report-detail', args=(self.order.id, )))
+        self.assertEqual(response.context['pivot'][0].cells[0][0], self.measurements[0].pallet_number)
+        self.assertContains(response, 'class="table-danger"', count=3)
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if 'FROM "orders_measurement"' in query['sql']]), 1)
@@ -1,15 +1,28 @@
+import csv
+import io
+import zipfile
 from math import ceil
+from unittest import mock
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.forms import model_to_dict
+from django.db import connection, DatabaseError
 from django.test import TestCase, Client as ViewClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from apps.clients.tests.factories import ClientFactory
+from apps.orders.exports import EXPORT_HEADER
+from apps.orders.management.commands.explain_order_list import get_list_queryset
 from apps.orders.forms import OrderForm, MeasurementReportForm, MeasurementFormSet
-from apps.orders.models import Order
+from apps.orders.models import Order, MeasurementReport, Measurement
+from apps.orders.spc import refresh_subgroups
+from apps.orders.views import OrderListView, OrderDetailView, MeasurementReportDetailView
 from apps.orders.tests.factories import OrderFactory, MeasurementFactory, MeasurementReportFactory, \
     MeasurementReportPostDictProvider, MeasurementsPostDictProvider, OrderPostDictProvider
 from apps.products.tests.factories import ProductFactory
 from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
-from apps.unittest_helpers import assert_response_post, assert_response_get
+from apps.unittest_helpers import assert_response_post, assert_response_get, assert_query_budget
 from apps.users.tests import PASSWORD
 from apps.users.tests.factories import CxUserFactory
 
@@ -42,6 +55,56 @@ class OrdersViewTest(TestCase):
         self.assertEqual(response.context['page_obj'].paginator.num_pages,
                          ceil(len(self.orders) / PAGINATION_OBJ_COUNT_PER_PAGE))
 
+    def test_list_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        assert_query_budget(test_case=self, url_name='orders:orders-list', view_class=OrderListView)
+
+    def test_explained_list_queryset(self):
+        """Act: build order list queryset explained by explain_order_list <> Exp: same SQL as list page query
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        with CaptureQueriesContext(connection) as queries:
+            self.view_client.get(reverse('orders:orders-list'), data={'ordering': 'client__client_name'})
+        explained_sql = str(get_list_queryset({}, 'client__client_name').query)
+        self.assertIn(explained_sql.replace('"', ''),
+                      [query['sql'].replace('"', '').split('  LIMIT')[0] for query in queries])
+
+    def test_import_post(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        content = f"order_sap_id,client,product\n30000001,{self.clients[0].client_sap_id}," \
+                  f"{self.products[0].product_sap_id}\n30000002,{self.clients[0].client_sap_id},1\n"
+        response = self.view_client.post(reverse('orders:orders-import'),
+                                         data={'file': SimpleUploadedFile('orders.csv', content.encode('utf-8'))},
+                                         follow=True)
+        self.assertRedirects(response, reverse('orders:orders-list'))
+        self.assertEqual(Order.objects.count(), len(self.orders) + 1)
+        self.assertEqual(len(list(response.context['messages'])), 3)
+
+    def test_import_post_invalid_format(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = self.view_client.post(reverse('orders:orders-import'),
+                                         data={'file': SimpleUploadedFile('orders.xls', b'data')})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'order_import.html')
+
+    def test_import_post_unreadable_file(self):
+        """Act: import file not encoded in UTF-8 & CSV with too long field <> Exp: form errors, no orders created
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        for content in ("order_sap_id,client\n3000000ł,1\n".encode('iso-8859-2'),
+                        f"order_sap_id,client\n{'1' * (csv.field_size_limit() + 1)},1\n".encode('utf-8')):
+            response = self.view_client.post(reverse('orders:orders-import'),
+                                             data={'file': SimpleUploadedFile('orders.csv', content)})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['form'].errors['file'])
+        self.assertEqual(Order.objects.count(), len(self.orders))
+
+    def test_detail_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = assert_query_budget(test_case=self, url_name='orders:order-detail',
+                                       view_class=OrderDetailView, id=self.orders[-1].id)
+        self.assertEqual(response.context['order'], self.orders[-1])
+
     def test_new_get(self):
         self.view_client.login(username=self.user.username, password=PASSWORD)
         response = assert_response_get(test_case=self, url_name='orders:order-new',
@@ -123,6 +186,98 @@ class MeasurementReportsViewTest(TestCase):
                              exp_status_code=302, data=self.form_data)
         self.assertEqual(self.order_new.measurement_report.measurements.count(), self.measurement_report_count)
 
+    def test_new_post_subgroups(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        assert_response_post(test_case=self, url_name='orders:measurement-report-new', id=self.order_new.id,
+                             exp_status_code=302, data=self.form_data)
+        self.assertEqual(list(self.order_new.measurement_subgroups.order_by('dimension').values_list('n', flat=True)),
+                         [3 * self.measurement_report_count] * 3)
+
+    def test_new_post_queries_independent_of_pallets_count(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        queries_counts = []
+        for measurements_count in (2, 40):
+            order = OrderFactory.create(client=self.order_new.client, product=self.product)
+            data = {**self.meas_report_data,
+                    **MeasurementsPostDictProvider(measurements_count=measurements_count).get_post_data_as_dict()}
+            with CaptureQueriesContext(connection) as queries:
+                assert_response_post(test_case=self, url_name='orders:measurement-report-new', id=order.id,
+                                     exp_status_code=302, data=data)
+            queries_counts.append(len(queries))
+            self.assertEqual(Measurement.objects.filter(measurement_report__order=order).count(), measurements_count)
+        self.assertEqual(queries_counts[0], queries_counts[1])
+
+    def test_new_post_atomic(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        with mock.patch.object(Measurement.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.view_client.post(reverse('orders:measurement-report-new', args=(self.order_new.id, )),
+                                      data=self.form_data)
+        self.assertFalse(MeasurementReport.objects.filter(order=self.order_new).exists())
+        self.assertEqual(Order.objects.get(pk=self.order_new.pk).status, 'Started')
+
+    def test_export_csv(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        # single order per keyset page walks page boundaries
+        with mock.patch('apps.orders.exports.EXPORT_ORDERS_PAGE_SIZE', 1):
+            response = self.view_client.get(reverse('orders:orders-export', args=('csv', )))
+            rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(len(rows), 1 + 1 + self.measurement_report_count)
+        self.assertEqual(rows[0], list(EXPORT_HEADER))
+        order_rows = [row for row in rows[1:] if row[0] == str(self.order_update.order_sap_id)]
+        self.assertEqual([row[10] for row in order_rows],
+                         [str(pallet_number) for pallet_number in self.measurement_report.measurements.order_by(
+                             'id').values_list('pallet_number', flat=True)])
+
+    def test_export_xlsx(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = self.view_client.get(reverse('orders:orders-export', args=('xlsx', )))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(sheet.count('<row>'), 1 + 1 + self.measurement_report_count)
+        self.assertIn(self.measurement_report.author, sheet)
+
+    def test_export_unknown_format(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = self.view_client.get(reverse('orders:orders-export', args=('pdf', )))
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = assert_query_budget(test_case=self, url_name='orders:measurement-report-detail',
+                                       view_class=MeasurementReportDetailView, id=self.order_update.id)
+        self.assertContains(response, self.measurement_report.author)
+
+    def test_statistics_json(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = self.view_client.get(reverse('orders:measurement-report-statistics', args=(self.order_update.id, )))
+        self.assertEqual(response.json()['statistics']['length']['n'], 3 * self.measurement_report_count)
+        response = self.view_client.get(reverse('orders:measurement-report-statistics', args=(self.order_new.id, )))
+        self.assertEqual(response.status_code, 404)
+
+    def test_control_chart_json(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        refresh_subgroups([self.order_update.id])
+        url = reverse('orders:product-control-chart', args=(self.product.id, 'length'))
+        response = self.view_client.get(url)
+        self.assertEqual([point['order_id'] for point in response.json()['subgroups']], [self.order_update.id])
+        response = self.view_client.get(url, data={'date_of_production_after': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.view_client.get(reverse('orders:product-control-chart', args=(self.product.id, 'weight')))
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_without_report(self):
+        """Act: get measurement report detail of closed order without report <> Exp: page without measurements
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        order = OrderFactory.create(status='Done')
+        response = self.view_client.get(reverse('orders:measurement-report-detail', args=(order.id, )))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['measurements'], [])
+        self.assertNotContains(response, reverse('orders:order-certificate', args=(order.id, )))
+
     def test_update_get(self):
         self.view_client.login(username=self.user.username, password=PASSWORD)
         response = assert_response_get(test_case=self, url_name='orders:measurement-report-update',
@@ -148,3 +303,143 @@ class MeasurementReportsViewTest(TestCase):
         self.assertEqual(updated_order.measurement_report, self.order_update.measurement_report)
         self.assertEqual(updated_order.measurement_report.measurements.count(),
                          updated_measurements_count)
+        self.assertEqual(updated_order.measurement_subgroups.get(dimension='length').n, 3 * updated_measurements_count)
+
+    def test_update_post_diff(self):
+        """Act: change one pallet & remove last one from formset <> Exp: single row updated, single delete
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        measurements = list(self.measurement_report.measurements.order_by('id'))
+        data = {**self.meas_report_data, 'author': self.measurement_report.author,
+                'date_of_control': self.measurement_report.date_of_control,
+                'measurements-TOTAL_FORMS': len(measurements) - 1, 'measurements-INITIAL_FORMS': len(measurements),
+                'measurements-MIN_NUM_FORMS': 1, 'measurements-MAX_NUM_FORMS': 1000}
+        for i, measurement in enumerate(measurements[:-1]):
+            data.update({f'measurements-{i}-{name}': value for name, value in model_to_dict(measurement).items()
+                         if value is not None})
+        data['measurements-1-weight'] = 999
+        with CaptureQueriesContext(connection) as queries:
+            assert_response_post(test_case=self, url_name='orders:measurement-report-update', exp_status_code=302,
+                                 data=data, id=self.order_update.id)
+        writes = [query['sql'] for query in queries.captured_queries
+                  if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) and 'orders_measurement"' in query['sql']]
+        self.assertEqual(len(writes), 2)
+        self.assertIn(f'"id" IN ({measurements[1].id})', writes[1])
+        self.measurement_report.refresh_from_db()
+        self.assertEqual(self.measurement_report.measurements_version, 1)
+        self.assertEqual(list(self.measurement_report.measurements.order_by('id').values_list('weight', flat=True)),
+                         [measurement.weight if i != 1 else 999 for i, measurement in enumerate(measurements[:-1])])
+
+    def test_update_post_swap_pallets(self):
+        """Act: swap pallet numbers of two measurements & reuse number of removed one <> Exp: report updated
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        measurements = list(self.measurement_report.measurements.order_by('id'))
+        data = {**self.meas_report_data, 'author': self.measurement_report.author,
+                'date_of_control': self.measurement_report.date_of_control,
+                'measurements-TOTAL_FORMS': len(measurements) - 1, 'measurements-INITIAL_FORMS': len(measurements),
+                'measurements-MIN_NUM_FORMS': 1, 'measurements-MAX_NUM_FORMS': 1000}
+        for i, measurement in enumerate(measurements[:-1]):
+            data.update({f'measurements-{i}-{name}': value for name, value in model_to_dict(measurement).items()
+                         if value is not None})
+        pallet_numbers = [measurement.pallet_number for measurement in measurements]
+        data['measurements-0-pallet_number'], data['measurements-1-pallet_number'] = pallet_numbers[1], pallet_numbers[0]
+        data['measurements-2-pallet_number'] = pallet_numbers[-1]
+        assert_response_post(test_case=self, url_name='orders:measurement-report-update', exp_status_code=302,
+                             data=data, id=self.order_update.id)
+        pallets = self.measurement_report.measurements.order_by('id').values_list('pallet_number', flat=True)
+        self.assertEqual(list(pallets), [pallet_numbers[1], pallet_numbers[0], pallet_numbers[-1], *pallet_numbers[3:-1]])
+
+    def test_update_get_grid(self):
+        """Act: get update form of report with more pallets than grid editing threshold
+        <> Exp: measurements sent as compact grid data instead of measurement forms
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        with mock.patch('apps.orders.views.MEASUREMENT_GRID_EDITING_THRESHOLD', self.measurement_report_count - 1):
+            response = self.view_client.get(reverse('orders:measurement-report-update', args=(self.order_update.id, )))
+        self.assertEqual(response.context['editing_mode'], 'grid')
+        grid_data = response.context['grid_data']
+        measurements = list(self.measurement_report.measurements.order_by('id'))
+        self.assertEqual(grid_data['ids'], [measurement.id for measurement in measurements])
+        self.assertEqual([row[0] for row in grid_data['rows']], [measurement.pallet_number for measurement in measurements])
+        self.assertContains(response, 'id="measurement-grid-data"')
+        self.assertNotContains(response, 'name="measurements-0-pallet_number"')
+        response = self.view_client.get(reverse('orders:measurement-report-update', args=(self.order_update.id, )),
+                                        data={'editing': 'forms'})
+        self.assertContains(response, 'name="measurements-0-pallet_number"')
+
+    def test_new_post_grid_invalid(self):
+        """Act: submit grid with invalid cell <> Exp: submitted values sent back to grid with cell error
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        data = {**self.form_data, 'editing': 'grid', 'measurements-2-length_target': 'x'}
+        response = assert_response_post(test_case=self, url_name='orders:measurement-report-new', id=self.order_new.id,
+                                        exp_status_code=200, data=data)
+        grid_data = response.context['grid_data']
+        self.assertEqual(len(grid_data['rows']), self.measurement_report_count)
+        self.assertIn('x', grid_data['rows'][2])
+        self.assertEqual(list(grid_data['errors']), [2])
+        self.assertIn('length_target', grid_data['errors'][2])
+        self.assertFalse(MeasurementReport.objects.filter(order=self.order_new).exists())
+
+    def test_update_post_grid_resubmitted(self):
+        """Act: submit grid with invalid new pallet, fix it & resubmit returned grid data as measurementGrid.js
+        <> Exp: existing pallets sent back as initial rows only, resubmitted report saved
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        measurements = list(self.measurement_report.measurements.order_by('id'))
+        data = {**self.meas_report_data, 'editing': 'grid', 'measurements-TOTAL_FORMS': len(measurements) + 1,
+                'measurements-INITIAL_FORMS': len(measurements), 'measurements-MIN_NUM_FORMS': 1,
+                'measurements-MAX_NUM_FORMS': 1000}
+        for i, measurement in enumerate(measurements):
+            data.update({f'measurements-{i}-{name}': value for name, value in model_to_dict(measurement).items()
+                         if value is not None})
+        data.update({f'measurements-{len(measurements)}-{name}': value for name, value
+                     in model_to_dict(measurements[0], exclude=['id', 'measurement_report']).items()
+                     if value is not None})
+        data.update({f'measurements-{len(measurements)}-pallet_number': 999,
+                     f'measurements-{len(measurements)}-length_target': 'x'})
+        response = assert_response_post(test_case=self, url_name='orders:measurement-report-update',
+                                        id=self.order_update.id, exp_status_code=200, data=data)
+        grid_data = response.context['grid_data']
+        self.assertEqual(grid_data['ids'], [str(measurement.id) for measurement in measurements])
+        self.assertContains(response, f'value="{len(measurements)}"')
+
+        # form data written by measurementGrid.js
+        columns = [column['name'] for column in grid_data['columns']]
+        data = {**self.meas_report_data, 'editing': 'grid', 'measurements-TOTAL_FORMS': len(grid_data['rows']),
+                'measurements-INITIAL_FORMS': len(grid_data['ids']), 'measurements-MIN_NUM_FORMS': 1,
+                'measurements-MAX_NUM_FORMS': 1000}
+        for index, row in enumerate(grid_data['rows']):
+            if index < len(grid_data['ids']):
+                data[f'measurements-{index}-id'] = grid_data['ids'][index]
+            data.update({f'measurements-{index}-{name}': '' if value is None else value
+                         for name, value in zip(columns, row)})
+        data[f'measurements-{len(measurements)}-length_target'] = '1000'
+        assert_response_post(test_case=self, url_name='orders:measurement-report-update', id=self.order_update.id,
+                             exp_status_code=302, data=data)
+        self.assertEqual(self.measurement_report.measurements.count(), len(measurements) + 1)
+
+    def test_new_post_grid_deleted_pallets(self):
+        """Act: submit grid with pallets marked as deleted <> Exp: deletion marks sent back to grid,
+        deleted pallets not validated & not saved
+        """
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        data = {**self.form_data, 'editing': 'grid', 'measurements-0-length_target': 'x',
+                'measurements-1-DELETE': 'on'}
+        response = assert_response_post(test_case=self, url_name='orders:measurement-report-new', id=self.order_new.id,
+                                        exp_status_code=200, data=data)
+        self.assertEqual(response.context['grid_data']['deleted'], [1])
+        self.assertEqual(response.context['grid_data']['deletionField'], 'DELETE')
+        data['measurements-0-DELETE'] = 'on'
+        assert_response_post(test_case=self, url_name='orders:measurement-report-new', id=self.order_new.id,
+                             exp_status_code=302, data=data)
+        self.assertEqual(Measurement.objects.filter(measurement_report__order=self.order_new).count(),
+                         self.measurement_report_count - 2)
+
+    def test_close_post(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        assert_response_post(test_case=self, url_name='orders:measurement-report-close', exp_status_code=302,
+                             data={}, id=self.order_update.id)
+        self.assertEqual(Order.objects.get(id=self.order_update.id).status, 'Done')
+        self.assertEqual(self.order_update.measurement_subgroups.count(), 3)
@@ -5,6 +5,9 @@ app_name = 'orders'
 
 urlpatterns = [
     path('', views.OrderListView.as_view(), name='orders-list'),
+    path('export/<str:export_format>', views.OrderExportView.as_view(), name='orders-export'),
+    path('import/', views.OrderImportView.as_view(), name='orders-import'),
+    path('ingest/<int:order_sap_id>', views.MeasurementIngestView.as_view(), name='measurement-ingest'),
     path('new/', views.OrderCreateView.as_view(), name='order-new'),
     path('detail/<int:pk>', views.OrderDetailView.as_view(), name='order-detail'),
     path('update/<int:pk>', views.OrderUpdateView.as_view(), name='order-update'),
@@ -12,6 +15,12 @@ urlpatterns = [
     path('measurement-report-new/<int:pk>', views.MeasurementReportCreateView.as_view(), name='measurement-report-new'),
     path('measurement-report-detail/<int:pk>', views.MeasurementReportDetailView.as_view(),
          name='measurement-report-detail'),
+    path('measurement-report-statistics/<int:pk>', views.MeasurementReportStatisticsView.as_view(),
+         name='measurement-report-statistics'),
+    path('certificate/<int:pk>', views.OrderCertificatePdfView.as_view(), name='order-certificate'),
+    path('certificates/', views.OrderCertificatesView.as_view(), name='order-certificates'),
+    path('control-chart/<int:pk>/<str:dimension>', views.ProductControlChartView.as_view(),
+         name='product-control-chart'),
     path('measurement-report-update/<int:pk>', views.MeasurementReportUpdateView.as_view(),
          name='measurement-report-update'),
     path('measurement-report-close/<int:pk>', views.MeasurementReportCloseView.as_view(),
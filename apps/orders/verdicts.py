@@ -0,0 +1,124 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import QuerySet
+
+from apps.constants import MEASUREMENTS_BATCH_SIZE, TOLERANCE_EPSILON, VERDICTS_CHUNK_SIZE
+from apps.orders.models import Measurement, Order
+from apps.orders.spc import SPC_DIMENSIONS, READING_POSITIONS, get_specification_columns, get_tolerance_limits
+from apps.paginators import invalidate_pagination_counts
+from apps.products.models import Specification
+
+# measurement columns checked against specification tolerance of each dimension
+VERDICT_DIMENSIONS = {**{dimension: [f'{dimension}_{position}' for position in READING_POSITIONS]
+                         for dimension in SPC_DIMENSIONS},
+                      'flat_crush_resistance': ['flat_crush_resistance_target'],
+                      'moisture_content': ['moisture_content_target'], }
+VERDICT_SUMMARY_FIELDS = ('verdict', 'failing_pallets_count', 'failing_dimensions', )
+
+
+def get_verdict_columns() -> List[str]:
+    return [column for columns in VERDICT_DIMENSIONS.values() for column in columns]
+
+
+def load_tolerance_limits(order_ids: List[int]) -> (Dict[int, np.ndarray], Dict[int, tuple]):
+    """
+    Read tolerance limits of orders products specification & current verdict summaries in one query.
+    Orders with archived measurements keep verdicts given before archiving, so they are skipped.
+    :return:    limits shaped (dimensions, 2) by order id (NaN without specification), summaries by order id
+    """
+    columns = get_specification_columns(VERDICT_DIMENSIONS, prefix='product__specification__')
+    limits, summaries = {}, {}
+    orders = Order.objects.filter(id__in=order_ids, measurement_report__archive__isnull=True)
+    for order_id, *values in orders.values_list('id', *VERDICT_SUMMARY_FIELDS, *columns):
+        summaries[order_id] = tuple(values[:len(VERDICT_SUMMARY_FIELDS)])
+        limits[order_id] = get_tolerance_limits(values[len(VERDICT_SUMMARY_FIELDS):], VERDICT_DIMENSIONS)
+    return limits, summaries
+
+
+def get_specification_limits(specification: Optional[Specification]) -> np.ndarray:
+    """Tolerance limits of product specification, NaN without specification."""
+    return get_tolerance_limits([getattr(specification, column) if specification else None
+                                 for column in get_specification_columns(VERDICT_DIMENSIONS)], VERDICT_DIMENSIONS)
+
+
+def find_failing_readings(readings: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    """
+    Check all readings against tolerance limits in one vectorized pass.
+    Missing readings (NaN) & missing limits never fail.
+    :param readings:    array shaped (rows, verdict columns)
+    :param limits:      limits of each row shaped (rows, dimensions, 2), single row limits are broadcast
+    :return:            boolean array shaped (rows, verdict columns)
+    """
+    column_dimensions = np.repeat(np.arange(len(VERDICT_DIMENSIONS)),
+                                  [len(columns) for columns in VERDICT_DIMENSIONS.values()])
+    lower, upper = limits[:, column_dimensions, 0], limits[:, column_dimensions, 1]
+    return (readings < lower - TOLERANCE_EPSILON) | (readings > upper + TOLERANCE_EPSILON)
+
+
+def find_failing_dimensions(readings: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    """
+    Check readings against tolerance limits (see find_failing_readings) & reduce them by dimension.
+    :return:            boolean array shaped (rows, dimensions)
+    """
+    starts = np.cumsum([0] + [len(columns) for columns in VERDICT_DIMENSIONS.values()])[:-1]
+    return np.logical_or.reduceat(find_failing_readings(readings, limits), starts, axis=1)
+
+
+def evaluate_verdicts(order_ids: Iterable[int]) -> int:
+    """
+    Check measurements of orders against product specification in a single batch pass and store
+    failing dimensions of each measurement & verdict summary of each order.
+    Only changed rows are written.
+    :return:    number of failing orders
+    """
+    order_ids = list(order_ids)
+    limits, summaries = load_tolerance_limits(order_ids)
+    rows = list(Measurement.objects.filter(measurement_report__order_id__in=order_ids).values_list(
+        'id', 'measurement_report__order_id', 'failing_dimensions', *get_verdict_columns()))
+    readings = np.array([[np.nan if value is None else value for value in row[3:]] for row in rows],
+                        dtype=float).reshape(len(rows), len(get_verdict_columns()))
+    row_limits = np.array([limits[row[1]] for row in rows]).reshape(len(rows), len(VERDICT_DIMENSIONS), 2)
+    failing = find_failing_dimensions(readings, row_limits)
+
+    dimensions = np.array(list(VERDICT_DIMENSIONS))
+    changed_measurements, failing_orders = [], {}
+    for (measurement_id, order_id, previous_dimensions, *_), row_failing in zip(rows, failing):
+        failing_dimensions = ','.join(dimensions[row_failing])
+        if failing_dimensions != previous_dimensions:
+            changed_measurements.append(Measurement(id=measurement_id, failing_dimensions=failing_dimensions))
+        order_failing = failing_orders.setdefault(order_id, [0, np.zeros(len(dimensions), dtype=bool)])
+        order_failing[0] += bool(row_failing.any())
+        order_failing[1] |= row_failing
+
+    changed_orders = []
+    for order_id, order_limits in limits.items():
+        if order_id not in failing_orders or np.isnan(order_limits).all():
+            summary = (None, None, '')
+        else:
+            pallets_count, order_dimensions = failing_orders[order_id]
+            summary = ('Fail' if pallets_count else 'Pass', pallets_count, ','.join(dimensions[order_dimensions]))
+        if summary != summaries[order_id]:
+            changed_orders.append(Order(id=order_id, **dict(zip(VERDICT_SUMMARY_FIELDS, summary))))
+
+    if changed_measurements or changed_orders:
+        with transaction.atomic():
+            Measurement.objects.bulk_update(changed_measurements, fields=['failing_dimensions'],
+                                            batch_size=MEASUREMENTS_BATCH_SIZE)
+            Order.objects.bulk_update(changed_orders, fields=list(VERDICT_SUMMARY_FIELDS),
+                                      batch_size=MEASUREMENTS_BATCH_SIZE)
+    if changed_orders:
+        # verdict filter counts are cached by order list, bulk update sends no signals
+        invalidate_pagination_counts(Order)
+    return sum(bool(pallets_count) for pallets_count, _ in failing_orders.values())
+
+
+def evaluate_orders_verdicts(orders: QuerySet, chunk_size: int = VERDICTS_CHUNK_SIZE) -> (int, int):
+    """Evaluate verdicts of orders queryset with measurement report in chunks.
+    :return:    number of evaluated & failing orders
+    """
+    order_ids = list(orders.filter(measurement_report__isnull=False).order_by('id').values_list('id', flat=True))
+    failing_count = sum(evaluate_verdicts(order_ids[index:index + chunk_size])
+                        for index in range(0, len(order_ids), chunk_size))
+    return len(order_ids), failing_count
@@ -1,54 +1,95 @@
+import csv
+import datetime
+import io
+import json
+from typing import Optional
+
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse, JsonResponse
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
-from django.views.generic import CreateView, UpdateView, DeleteView, DetailView, ListView, FormView
-
-from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
-from apps.user_texts import VIEW_MSG
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import CreateView, UpdateView, DeleteView, DetailView, ListView, FormView, View
+
+from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE, EXPORT_FORMATS, IMPORT_ERRORS_SHOWN_COUNT, \
+    MEASUREMENTS_BATCH_SIZE, INGEST_MAX_READINGS, MEASUREMENT_EDITING_MODES, MEASUREMENT_GRID_EDITING_THRESHOLD
+from apps.paginators import ListPaginationMixin
+from apps.pdf_cache import get_pdf_response
+from apps.pdf_creator import render_pdf
+from apps.products.models import Product, Specification
+from apps.sap_extracts import read_extract_rows, get_extract_format
+from apps.streaming import stream_csv, stream_xlsx, stream_zip, with_errors_member
+from apps.user_texts import VIEW_MSG, EXPORT_HEADERS, LABELS, INGEST_MSG, FORMSET_MSG, ZIP_MSG, \
+    IMPORT_MSG
+from .archive import get_closed_order_ids, get_report_measurements
+from .certificates import CERTIFICATE_TEMPLATE, get_certificate_context, get_certificate_filename, \
+    get_certificate_key, get_closed_orders, get_order_specification, iter_certificates
+from .exports import iter_order_export_rows, EXPORT_HEADER
 from .filters import OrderFilter
-from .forms import OrderForm, MeasurementFormSet, MeasurementReportForm, DateFilteringForm
-from .models import Order, MeasurementReport
-from apps.view_helpers import add_error_messages, update_ordering, update_filter_params
-
-
-class OrderListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+from .forms import OrderForm, MeasurementFormSet, MeasurementReportForm, DateFilteringForm, OrderImportForm, \
+    ControlChartForm
+from .grid_editing import get_grid_data
+from .imports import import_orders
+from .ingestion import clean_readings, get_device_user, get_ingestion_report, measurement_buffer, PalletNumberClash
+from .models import Order, MeasurementReport, Measurement
+from .pivot import get_measurements_pivot
+from .spc import get_report_statistics, get_measurements_statistics, refresh_subgroups, get_control_chart, \
+    SPC_DIMENSIONS
+from .verdicts import evaluate_verdicts, get_specification_limits
+from apps.view_helpers import add_error_messages, FilterStateMixin
+
+
+class OrderListView(LoginRequiredMixin, PermissionRequiredMixin, FilterStateMixin, ListPaginationMixin, ListView):
     """List orders, provide order filtering and sorting"""
     model = Order
+    queryset = Order.objects.select_related('client', 'product').only(
+        'id', 'order_sap_id', 'date_of_production', 'status', 'verdict',
+        'client__client_name', 'product__product_sap_id', 'product__description')
     template_name = 'orders_list.html'
     login_url = 'users:user-login'
     permission_required = ('orders.view_order', )
     paginate_by = PAGINATION_OBJ_COUNT_PER_PAGE
     ordering = ('id', )
-
-    def get_queryset(self):
-        """Update session for request GET parameters.
-        Filter & sort orders by parameters values stored in session.
-        """
-        self.request.session = update_filter_params(params=self.request.GET,
-                                                    session=self.request.session,
-                                                    filter_class=OrderFilter)
-        order_filter = OrderFilter(self.request.session, queryset=self.model.objects.all())
-        qs = order_filter.qs.order_by(self.get_ordering())
-        return qs
+    filterset_class = OrderFilter
+    query_budget = 4
 
     def get_context_data(self, **kwargs):
         """Update context for data required by date filter."""
         context = super().get_context_data(**kwargs)
         date_filtering_form = DateFilteringForm(initial={
-            'date_of_production_after': self.request.session.get('date_of_production_after'),
-            'date_of_production_before': self.request.session.get('date_of_production_before'), })
+            'date_of_production_after': self.get_filter_state().get('date_of_production_after'),
+            'date_of_production_before': self.get_filter_state().get('date_of_production_before'), })
         context['date_filtering_form'] = date_filtering_form
         return context
 
-    def get_ordering(self):
-        """Update session for ordering parameter from request.
-        Return ordering value stored in session or id as a default.
-        """
-        self.request.session = update_ordering(params=self.request.GET,
-                                               session=self.request.session)
-        return self.request.session.get('ordering', 'id')
+
+class OrderExportView(LoginRequiredMixin, PermissionRequiredMixin, FilterStateMixin, View):
+    """Stream orders filtered like order list, joined with their measurements, as CSV or XLSX file."""
+    queryset = OrderListView.queryset
+    login_url = 'users:user-login'
+    permission_required = ('orders.view_order', 'orders.view_measurementreport', )
+    filterset_class = OrderFilter
+    content_types = {'csv': 'text/csv; charset=utf-8',
+                     'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', }
+
+    def get(self, request, *args, **kwargs):
+        export_format = kwargs['export_format']
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        rows = iter_order_export_rows(self.get_queryset(), ordering=self.get_ordering())
+        if export_format == 'csv':
+            content = stream_csv(EXPORT_HEADER, rows)
+        else:
+            content = stream_xlsx(EXPORT_HEADER, rows, sheet_name=EXPORT_HEADERS['sheet_name'])
+        response = StreamingHttpResponse(content, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="orders_{datetime.date.today():%Y%m%d}.{export_format}"'
+        return response
 
 
 class OrderCreateView(SuccessMessageMixin, LoginRequiredMixin,
@@ -69,12 +110,97 @@ class OrderCreateView(SuccessMessageMixin, LoginRequiredMixin,
         return super().form_invalid(form)
 
 
+class OrderImportView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """Import orders from uploaded SAP orders export file, report rejected rows."""
+    form_class = OrderImportForm
+    template_name = 'order_import.html'
+    login_url = 'users:user-login'
+    permission_required = ('orders.add_order', )
+    success_url = reverse_lazy('orders:orders-list')
+
+    def form_valid(self, form):
+        file = form.cleaned_data['file']
+        rows = read_extract_rows(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''),
+                                 extract_format=get_extract_format(file.name))
+        try:
+            result = import_orders(rows)
+        except (UnicodeDecodeError, csv.Error) as error:
+            form.add_error('file', IMPORT_MSG['unreadable'].format(error=error))
+            return self.form_invalid(form)
+        messages.success(self.request, VIEW_MSG['order_import']['success'].format(created=result.created))
+        if result.errors:
+            messages.error(self.request, VIEW_MSG['order_import']['error'].format(rejected=result.rejected))
+            for row_number, message in result.errors[:IMPORT_ERRORS_SHOWN_COUNT]:
+                messages.error(self.request, VIEW_MSG['order_import']['row_error'].format(row_number=row_number,
+                                                                                          message=message))
+            if len(result.errors) > IMPORT_ERRORS_SHOWN_COUNT:
+                messages.error(self.request, VIEW_MSG['order_import']['more_errors'].format(
+                    count=len(result.errors) - IMPORT_ERRORS_SHOWN_COUNT))
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        add_error_messages(request=self.request, forms=[form, ])
+        return super().form_invalid(form)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MeasurementIngestView(View):
+    """Accept pallet readings of order posted by gauge devices as JSON: single reading
+    ({"reading": {...}}) or batch ({"readings": [...]}) with optional station name.
+    Devices authenticate with device token (Authorization: Token <token>). Readings are validated
+    like measurement report form & buffered, so many requests share batched inserts.
+    """
+    permission_required = 'orders.add_measurement'
+
+    @staticmethod
+    def error(message: str, status: int, **kwargs) -> JsonResponse:
+        return JsonResponse({'error': message, **kwargs}, status=status)
+
+    def post(self, request, *args, **kwargs):
+        scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+        user = get_device_user(token) if scheme == 'Token' else None
+        if user is None:
+            return self.error(INGEST_MSG['unauthorized'], status=401)
+        if not user.has_perm(self.permission_required):
+            raise PermissionDenied
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return self.error(INGEST_MSG['invalid_json'], status=400)
+        if not isinstance(payload, dict):
+            return self.error(INGEST_MSG['invalid_json'], status=400)
+        readings = payload.get('readings', [payload['reading']] if 'reading' in payload else [])
+        if not isinstance(readings, list) or not readings:
+            return self.error(INGEST_MSG['no_readings'], status=400)
+        if len(readings) > INGEST_MAX_READINGS:
+            return self.error(INGEST_MSG['too_many_readings'].format(count=INGEST_MAX_READINGS), status=400)
+
+        order = get_object_or_404(Order, order_sap_id=self.kwargs.get('order_sap_id'))
+        if get_closed_order_ids([order.id]):
+            return self.error(INGEST_MSG['order_closed'], status=409)
+        measurements, errors = clean_readings(readings)
+        if errors:
+            return self.error(INGEST_MSG['invalid_readings'], status=400, errors=errors)
+        measurement_report = get_ingestion_report(order, station=str(payload.get('station') or user.username))
+        for measurement in measurements:
+            measurement.measurement_report = measurement_report
+        try:
+            written = measurement_buffer.add(order.id, measurements)
+        except PalletNumberClash as clash:
+            return self.error(INGEST_MSG['invalid_readings'], status=400,
+                              errors={'pallet_number': FORMSET_MSG['pallet_number']},
+                              pallet_numbers=clash.pallet_numbers)
+        return JsonResponse({'accepted': len(measurements), 'written': written}, status=202)
+
+
 class OrderDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     """Provide information about order."""
     model = Order
+    queryset = Order.objects.select_related('client', 'product')
     template_name = 'order_detail.html'
     login_url = 'users:user-login'
     permission_required = ('orders.view_order', )
+    query_budget = 3
 
 
 class OrderUpdateView(SuccessMessageMixin, LoginRequiredMixin,
@@ -108,8 +234,33 @@ class OrderDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+class MeasurementGridEditingMixin:
+    """Measurement report form views extension for editing measurements in virtualized grid:
+    measurements are sent as compact JSON and only visible pallets are rendered by measurementGrid.js.
+    Mode is chosen by editing request parameter, reports with many pallets are edited in grid by default.
+    Grid is submitted as measurement formset data, invalid submission is sent back to grid with cell errors.
+    """
+    submitted_formset = None
+
+    def get_editing_mode(self, measurement_report: Optional[MeasurementReport] = None) -> str:
+        mode = self.request.GET.get('editing', self.request.POST.get('editing'))
+        if mode in MEASUREMENT_EDITING_MODES:
+            return mode
+        if measurement_report is not None and \
+                measurement_report.measurements.count() > MEASUREMENT_GRID_EDITING_THRESHOLD:
+            return 'grid'
+        return 'forms'
+
+    def get_formset_context(self, formset, measurement_report: Optional[MeasurementReport] = None) -> dict:
+        editing_mode = self.get_editing_mode(measurement_report)
+        if editing_mode != 'grid':
+            return {'formset': formset, 'editing_mode': editing_mode}
+        formset = self.submitted_formset or formset
+        return {'formset': formset, 'editing_mode': editing_mode, 'grid_data': get_grid_data(formset)}
+
+
 class MeasurementReportCreateView(SuccessMessageMixin, LoginRequiredMixin,
-                                  PermissionRequiredMixin, CreateView):
+                                  PermissionRequiredMixin, MeasurementGridEditingMixin, CreateView):
     """Create a new measurement report with measurements in database
     using measurement report form & measurements formset.
     """
@@ -123,7 +274,7 @@ class MeasurementReportCreateView(SuccessMessageMixin, LoginRequiredMixin,
     def get_context_data(self, **kwargs):
         """Add to context formset & order reference for measurement report."""
         context = super().get_context_data(**kwargs)
-        context['formset'] = MeasurementFormSet()
+        context.update(self.get_formset_context(MeasurementFormSet()))
         context['order'] = get_object_or_404(Order, pk=self.kwargs.get('pk'))
         return context
 
@@ -131,6 +282,7 @@ class MeasurementReportCreateView(SuccessMessageMixin, LoginRequiredMixin,
         """Pack measurement report form and measurements formset into
         measurement report multiform.
         """
+        self.object = None
         multiform = {'form': self.get_form(), 'formset': MeasurementFormSet(data=request.POST)}
         if all(form.is_valid() for form in multiform.values()):
             return self.form_valid(multiform)
@@ -140,26 +292,32 @@ class MeasurementReportCreateView(SuccessMessageMixin, LoginRequiredMixin,
     def form_valid(self, multiform):
         """Retrieve order object, set its status as open, and
         set as reference for created measurement report with measurements.
+        Report is created atomically, measurements are written with batched insert
+        and summarized as order control chart subgroups & verdict against product specification.
         """
         order = get_object_or_404(Order, pk=self.kwargs.get('pk'))
-        order.status = 'Open'
-        order.save()
+        with transaction.atomic():
+            order.status = 'Open'
+            order.save()
 
-        measurement_report = multiform['form'].save(commit=False)
-        measurement_report.order = order
-        measurement_report.save()
+            measurement_report = multiform['form'].save(commit=False)
+            measurement_report.order = order
+            measurement_report.save()
 
-        for measurement_form in multiform['formset']:
-            measurement = measurement_form.save(commit=False)
-            measurement.measurement_report = measurement_report
-            measurement.save()
+            measurements, *_ = multiform['formset'].get_changes()
+            for measurement in measurements:
+                measurement.measurement_report = measurement_report
+            Measurement.objects.bulk_create(measurements, batch_size=MEASUREMENTS_BATCH_SIZE)
+            refresh_subgroups([order.id])
+            evaluate_verdicts([order.id])
 
         messages.success(self.request, self.success_message)
         return redirect(self.success_url)
 
     def form_invalid(self, multiform):
+        self.submitted_formset = multiform['formset']
         add_error_messages(request=self.request,
-                           forms=[multiform['form'], [form for form in multiform['formset']]],
+                           forms=[multiform['form'], *multiform['formset']],
                            base_msg=VIEW_MSG['measurement_report']['new_error'])
         return super().form_invalid(multiform['form'])
 
@@ -169,13 +327,112 @@ class MeasurementReportDetailView(LoginRequiredMixin, PermissionRequiredMixin, D
     measurement report and its measurements.
     """
     model = Order
+    queryset = Order.objects.select_related('client', 'product', 'product__specification', 'measurement_report',
+                                            'measurement_report__archive')
     template_name = 'measurement_report_detail.html'
     login_url = 'users:user-login'
     permission_required = ('orders.view_measurementreport', )
+    query_budget = 4
+
+    def get_context_data(self, **kwargs):
+        """Update context for measurements (kept in database or archive, fetched once) pivoted into rows
+        of attributes with tolerance flags, process capability statistics of measured dimensions
+        & labels of dimensions out of specification tolerance."""
+        context = super().get_context_data(**kwargs)
+        # orders imported with status may have no report yet, their page is rendered without measurements
+        context['has_report'] = hasattr(self.object, 'measurement_report')
+        context['measurements'] = get_report_measurements(self.object.measurement_report) \
+            if context['has_report'] else []
+        specification = get_order_specification(self.object)
+        context['pivot'] = get_measurements_pivot(context['measurements'], specification)
+        context['failing_dimensions'] = [LABELS['verdict'][dimension]
+                                         for dimension in self.object.failing_dimensions.split(',') if dimension]
+        # verdict dimensions limits start with SPC dimensions ones
+        limits = get_specification_limits(specification)[:len(SPC_DIMENSIONS)]
+        statistics = get_measurements_statistics(context['measurements'], limits)
+        context['statistics'] = [(dimension, LABELS['spc'][dimension], statistics[dimension])
+                                 for dimension in SPC_DIMENSIONS if dimension in statistics]
+        return context
+
+
+class MeasurementReportStatisticsView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Provide process capability statistics of order measurement report as JSON."""
+    login_url = 'users:user-login'
+    permission_required = ('orders.view_measurementreport', )
+
+    def get(self, request, *args, **kwargs):
+        report = get_object_or_404(MeasurementReport.objects.select_related('order'), order_id=self.kwargs.get('pk'))
+        return JsonResponse({'order_sap_id': report.order.order_sap_id,
+                             'statistics': get_report_statistics(report.id)})
+
+
+class OrderCertificatePdfView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Certificate of analysis PDF of closed order, served from content addressed PDF cache."""
+    login_url = 'users:user-login'
+    permission_required = ('orders.view_measurementreport', )
+
+    def get(self, request, *args, **kwargs):
+        """Certificate key is built from order data & measurements version only, measurements are read
+        & certificate context built when document is not cached.
+        """
+        order = get_object_or_404(get_closed_orders().prefetch_related(None), pk=self.kwargs.get('pk'))
+        response = get_pdf_response(request, get_certificate_key(order),
+                                    lambda: render_pdf(CERTIFICATE_TEMPLATE, get_certificate_context(order)))
+        response['Content-Disposition'] = f'inline; filename="{get_certificate_filename(order)}"'
+        return response
+
+
+class OrderCertificatesView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """Stream ZIP of certificates of analysis of all orders closed in date of production range.
+    Certificates missing in PDF cache are rendered in parallel, ones not rendered are listed in errors member.
+    """
+    form_class = DateFilteringForm
+    template_name = 'order_certificates.html'
+    login_url = 'users:user-login'
+    permission_required = ('orders.view_measurementreport', )
+
+    def form_valid(self, form):
+        date_range = (form.cleaned_data['date_of_production_after'], form.cleaned_data['date_of_production_before'])
+        orders = get_closed_orders().filter(date_of_production__range=date_range).order_by('date_of_production', 'id')
+        if not orders.exists():
+            messages.error(self.request, VIEW_MSG['certificates']['no_orders'])
+            return self.form_invalid(form)
+        members = with_errors_member(((get_certificate_filename(order), content)
+                                      for order, content in iter_certificates(orders)),
+                                     ZIP_MSG['errors_name'], ZIP_MSG['not_rendered'])
+        response = StreamingHttpResponse(stream_zip(members), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="swiadectwa_jakosci_{date_range[0]:%Y%m%d}_' \
+                                          f'{date_range[1]:%Y%m%d}.zip"'
+        return response
+
+    def form_invalid(self, form):
+        add_error_messages(request=self.request, forms=[form, ])
+        return super().form_invalid(form)
+
+
+class ProductControlChartView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Provide X-bar & R control chart of product dimension as JSON.
+    Chart is read from order subgroup rollups, optionally within production date range.
+    """
+    login_url = 'users:user-login'
+    permission_required = ('orders.view_measurementreport', )
+
+    def get(self, request, *args, **kwargs):
+        if self.kwargs.get('dimension') not in SPC_DIMENSIONS:
+            raise Http404
+        product = get_object_or_404(Product.objects.only('product_sap_id'), pk=self.kwargs.get('pk'))
+        form = ControlChartForm(data=request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        chart = get_control_chart(product.product_sap_id, self.kwargs.get('dimension'),
+                                  date_from=form.cleaned_data['date_of_production_after'],
+                                  date_to=form.cleaned_data['date_of_production_before'])
+        return JsonResponse({'product_sap_id': product.product_sap_id, 'dimension': self.kwargs.get('dimension'),
+                             **chart})
 
 
 class MeasurementReportUpdateView(SuccessMessageMixin, LoginRequiredMixin,
-                                  PermissionRequiredMixin, UpdateView):
+                                  PermissionRequiredMixin, MeasurementGridEditingMixin, UpdateView):
     """Update measurement report with measurements in database using
     measurement report form & measurements formset.
     """
@@ -196,23 +453,33 @@ class MeasurementReportUpdateView(SuccessMessageMixin, LoginRequiredMixin,
         Bind to form order referenced measurement report instance."""
         context = super().get_context_data(**kwargs)
         context['form'] = self.form_class(instance=self.object.measurement_report)
-        context['formset'] = MeasurementFormSet(instance=self.object.measurement_report,
-                                                queryset=self.object.measurement_report.measurements.all())
+        context.update(self.get_formset_context(
+            MeasurementFormSet(instance=self.object.measurement_report,
+                               queryset=self.object.measurement_report.measurements.all()),
+            measurement_report=self.object.measurement_report))
         context['order'] = self.object
         return context
 
+    def is_closed(self) -> bool:
+        """Check if measurement report of order is closed or archived, its measurements are not edited."""
+        if get_closed_order_ids([self.object.id]):
+            messages.error(self.request, message=VIEW_MSG['measurement_report']['close_edit_error'])
+            return True
+        return False
+
     def get(self, request, *args, **kwargs):
         """Check if measurement report of closed order is not served."""
-        if self.object.status == 'Done':
-            messages.error(request, message=VIEW_MSG['orders']['measurement_report'])
+        if self.is_closed():
             return redirect('orders:orders-list')
         else:
             return super().get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
         """Pack measurement report form and measurements formset into
-        measurement report multiform.
+        measurement report multiform. Measurements of closed order are not changed.
         """
+        if self.is_closed():
+            return redirect('orders:orders-list')
         form = MeasurementReportForm(data=request.POST, instance=self.object.measurement_report)
         formset = MeasurementFormSet(data=request.POST, instance=self.object.measurement_report)
         multiform = {'form': form, 'formset': formset}
@@ -222,27 +489,39 @@ class MeasurementReportUpdateView(SuccessMessageMixin, LoginRequiredMixin,
             return self.form_invalid(multiform)
 
     def form_valid(self, multiform):
-        """Update measurements in database for measurements formset.
-        Remove all extra measurements if are not present in formset.
+        """Update measurements in database for measurements formset as a diff:
+        changed measurements are updated with one batched update, new ones inserted with one batched insert,
+        measurements not present in formset (or marked as deleted) removed with single delete.
+        Order control chart subgroups & verdict are recomputed afterwards.
         """
-        measurement_report = multiform['form'].save()
-
-        measurements = []
-        for form in multiform['formset']:
-            measurement = form.save(commit=False)
-            measurement.instance = measurement_report
-            measurements.append(measurement)
-            measurement.save()
-        for measurement in measurement_report.measurements.all():
-            if measurement not in measurements:
-                measurement.delete()
+        formset = multiform['formset']
+        with transaction.atomic():
+            measurement_report = multiform['form'].save()
+
+            added, changed, kept_ids, changed_fields = formset.get_changes()
+            for measurement in added:
+                measurement.measurement_report = measurement_report
+            # removed before update & insert, so their pallet numbers can be reused;
+            # inserted rows ids are not known on every database backend
+            measurement_report.measurements.exclude(id__in=kept_ids).delete()
+            if 'pallet_number' in changed_fields:
+                # unique pallet numbers are checked row by row, swapped numbers are moved out of the way first
+                Measurement.objects.filter(id__in=[measurement.id for measurement in changed]) \
+                    .update(pallet_number=-F('id'))
+            if changed:
+                Measurement.objects.bulk_update(changed, fields=sorted(changed_fields),
+                                                batch_size=MEASUREMENTS_BATCH_SIZE)
+            Measurement.objects.bulk_create(added, batch_size=MEASUREMENTS_BATCH_SIZE)
+            MeasurementReport.touch_measurements([self.object.id])
+            refresh_subgroups([self.object.id])
+            evaluate_verdicts([self.object.id])
 
         messages.success(self.request, self.success_message)
         return redirect(self.success_url)
 
     def form_invalid(self, multiform):
-        add_error_messages(request=self.request, forms=[multiform['form'],
-                                                        [form for form in multiform['formset']]],
+        self.submitted_formset = multiform['formset']
+        add_error_messages(request=self.request, forms=[multiform['form'], *multiform['formset']],
                            base_msg=VIEW_MSG['measurement_report']['update_error'])
         return super().form_invalid(multiform['form'])
 
@@ -272,9 +551,13 @@ class MeasurementReportCloseView(SuccessMessageMixin, LoginRequiredMixin,
         return super().get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        """Closing measurement report is performed as set order status as done."""
+        """Closing measurement report is performed as set order status as done.
+        Control chart subgroups are refreshed with final measurements of order.
+        """
         order = get_object_or_404(self.model, pk=self.kwargs.get('pk'))
-        order.status = 'Done'
-        order.save()
+        with transaction.atomic():
+            order.status = 'Done'
+            order.save()
+            refresh_subgroups([order.id])
         messages.success(request, message=self.success_message)
         return redirect('orders:orders-list')
@@ -0,0 +1,294 @@
+import hashlib
+from typing import Any, Iterator, List, Optional, Type
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Model, Q, QuerySet
+from django.db.models.fields import Field
+from django.utils.functional import cached_property
+
+from apps.constants import PAGINATION_MODE_DEFAULT, PAGINATION_MODES, PAGINATION_COUNT_CACHE_TIMEOUT, \
+    APPROXIMATE_COUNT_THRESHOLD
+
+# models which objects counts depend on other models data (e.g. orders filtered by client name)
+COUNT_CACHE_DEPENDENT_MODELS = {'clients.client': ('orders.order', ),
+                                'products.product': ('orders.order', ), }
+
+
+class CursorSerializer:
+    """Signing serializer able to dump dates & decimals kept in cursors."""
+    def dumps(self, obj: Any) -> bytes:
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+    def loads(self, data: bytes) -> Any:
+        return signing.JSONSerializer().loads(data)
+
+
+class KeysetPage:
+    """Page of objects seeked by keyset paginator.
+    Mimics django Page interface used by templates.
+    """
+    def __init__(self, object_list: list, number: int, paginator: "KeysetPaginator",
+                 next_cursor: Optional[str] = None, previous_cursor: Optional[str] = None):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Keyset page {self.number}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate queryset by seeking on ordering column with id as a tiebreaker.
+    Each page costs the same query regardless of its depth and no COUNT(*) is performed.
+    Page position is passed between requests as an opaque signed cursor.
+    NULL values are expected to be sorted first in ascending order (MySQL & SQLite behaviour).
+    """
+    is_keyset = True
+    num_pages = None
+    salt = 'apps.paginators.KeysetPaginator'
+
+    def __init__(self, queryset: "QuerySet", per_page: int, ordering: str = 'id'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.field_name = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.field = self._resolve_field(queryset.model, self.field_name)
+
+    @staticmethod
+    def _resolve_field(model: "Model", lookup: str) -> "Field":
+        """Follow lookup path (e.g. client__client_name) to the model field."""
+        field = None
+        for part in lookup.split('__'):
+            field = model._meta.get_field(part)
+            if field.is_relation:
+                model = field.related_model
+        return field
+
+    def _get_value(self, obj: "Model") -> Any:
+        for part in self.field_name.split('__'):
+            obj = getattr(obj, part)
+            if obj is None:
+                break
+        return obj
+
+    def _order(self, descending: bool) -> "QuerySet":
+        prefix = '-' if descending else ''
+        if self.field_name in ('id', 'pk'):
+            return self.queryset.order_by(f'{prefix}id')
+        return self.queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}id')
+
+    def _seek(self, value: Any, pk: int, descending: bool) -> "Q":
+        """Build condition selecting rows placed after (value, pk) in scan direction."""
+        after = 'lt' if descending else 'gt'
+        if self.field_name in ('id', 'pk'):
+            return Q(**{f'id__{after}': pk})
+        if value is None:
+            nulls_tail = Q(**{f'{self.field_name}__isnull': True, f'id__{after}': pk})
+            return nulls_tail if descending else nulls_tail | Q(**{f'{self.field_name}__isnull': False})
+        # leading range on ordering column lets database seek its index instead of evaluating OR for each row
+        condition = Q(**{f'{self.field_name}__{after}e': value}) & (
+            Q(**{f'{self.field_name}__{after}': value}) | Q(**{f'id__{after}': pk}))
+        if descending and self.field.null:
+            condition |= Q(**{f'{self.field_name}__isnull': True})
+        return condition
+
+    def encode_cursor(self, obj: "Model", direction: str, number: int) -> str:
+        return signing.dumps({'o': self.ordering, 'v': self._get_value(obj), 'id': obj.pk,
+                              'd': direction, 'n': number},
+                             salt=self.salt, serializer=CursorSerializer, compress=True)
+
+    def decode_cursor(self, cursor: Optional[str]) -> Optional[dict]:
+        """Return cursor position or None for missing, tampered
+        or created for different ordering cursor.
+        """
+        if not cursor:
+            return None
+        try:
+            position = signing.loads(cursor, salt=self.salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            return None
+        if position.get('o') != self.ordering or position.get('d') not in ('next', 'previous'):
+            return None
+        if position['v'] is not None:
+            position['v'] = self.field.to_python(position['v'])
+        return position
+
+    def get_page_queryset(self, position: Optional[dict] = None) -> "QuerySet":
+        """Ordered queryset of page at decoded cursor position (first page for None),
+        with one extra row to find out if there is a page beyond requested one.
+        """
+        if position is None:
+            return self._order(self.descending)[:self.per_page + 1]
+        scan_descending = self.descending != (position['d'] == 'previous')
+        queryset = self._order(scan_descending).filter(self._seek(position['v'], position['id'], scan_descending))
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        position = self.decode_cursor(cursor)
+        if position is None:
+            backwards, number = False, 1
+        else:
+            backwards, number = position['d'] == 'previous', max(int(position['n']), 1)
+        rows: List["Model"] = list(self.get_page_queryset(position))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        return KeysetPage(
+            object_list=rows, number=number, paginator=self,
+            next_cursor=self.encode_cursor(rows[-1], 'next', number + 1) if has_next and rows else None,
+            previous_cursor=self.encode_cursor(rows[0], 'previous', number - 1) if has_previous and rows else None)
+
+    def pages(self) -> Iterator[KeysetPage]:
+        """Walk all pages forward, e.g. to process huge querysets in constant memory."""
+        page = self.page()
+        yield page
+        while page.has_next():
+            page = self.page(page.next_cursor)
+            yield page
+
+
+def get_count_cache_version_key(model_label: str) -> str:
+    return f"pagination_count_version:{model_label}"
+
+
+def get_count_cache_key(model: Type["Model"], params: dict) -> str:
+    """Build count cache key from model data version & normalized filter parameters."""
+    model_label = model._meta.label_lower
+    version = cache.get_or_set(get_count_cache_version_key(model_label), 1, timeout=None)
+    params_digest = hashlib.md5(repr(sorted(params.items())).encode('utf-8')).hexdigest()
+    return f"pagination_count:{model_label}:{version}:{params_digest}"
+
+
+def invalidate_pagination_counts(model: Type["Model"]) -> None:
+    """Invalidate cached counts of model and models depending on its data
+    by changing cache version, so stale keys simply expire.
+    """
+    model_label = model._meta.label_lower
+    for label in (model_label, ) + COUNT_CACHE_DEPENDENT_MODELS.get(model_label, ()):
+        try:
+            cache.incr(get_count_cache_version_key(label))
+        except ValueError:
+            cache.set(get_count_cache_version_key(label), 1, timeout=None)
+
+
+def get_approximate_count(model: Type["Model"]) -> Optional[int]:
+    """Read table rows estimate from MySQL statistics or None for other databases."""
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator caching objects count by model & normalized filter parameters.
+    Counts of unfiltered huge tables are taken from table statistics, filtered querysets are always counted.
+    Estimated count is replaced by exact one when requested page is past the estimate
+    or page is not full (estimate exceeds objects count).
+    """
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, cache_params=None):
+        super().__init__(object_list, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page)
+        self.cache_params = cache_params or {}
+        self.count_is_estimate = False
+
+    @cached_property
+    def count_cache_key(self) -> str:
+        return get_count_cache_key(self.object_list.model, self.cache_params)
+
+    @cached_property
+    def count(self):
+        cached = cache.get(self.count_cache_key)
+        if cached is not None:
+            count, self.count_is_estimate = cached
+            return count
+        count = None
+        if not any(self.cache_params.values()):
+            count = get_approximate_count(self.object_list.model)
+        self.count_is_estimate = count is not None and count >= APPROXIMATE_COUNT_THRESHOLD
+        if not self.count_is_estimate:
+            count = self.object_list.count()
+        cache.set(self.count_cache_key, (count, self.count_is_estimate), timeout=PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def use_exact_count(self) -> bool:
+        """
+        Replace estimated count (& pages number derived from it) by exact count, cached for other requests.
+        :return:    True if estimated count was replaced
+        """
+        if not self.count_is_estimate:
+            return False
+        self.count_is_estimate = False
+        self.__dict__['count'] = self.object_list.count()
+        self.__dict__.pop('num_pages', None)
+        cache.set(self.count_cache_key, (self.count, False), timeout=PAGINATION_COUNT_CACHE_TIMEOUT)
+        return True
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.use_exact_count():
+                raise
+        return super().validate_number(number)
+
+    def page(self, number):
+        page = super().page(number)
+        if self.count_is_estimate and len(page.object_list) < self.per_page and self.use_exact_count():
+            return super().page(number)
+        return page
+
+
+class ListPaginationMixin:
+    """List view extension providing cached counts for offset pagination
+    & opt-in keyset pagination mode. Mode is chosen by pagination request parameter
+    and remembered in session. Filter set used by view is expected in filterset attribute.
+    """
+    paginator_class = CachedCountPaginator
+    keyset_paginator_class = KeysetPaginator
+    filterset = None
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        cache_params = self.filterset.form.cleaned_data if self.filterset is not None else {}
+        return self.paginator_class(queryset, per_page, orphans=orphans,
+                                    allow_empty_first_page=allow_empty_first_page, cache_params=cache_params, **kwargs)
+
+    def get_pagination_mode(self) -> str:
+        mode = self.request.GET.get('pagination')
+        if mode in PAGINATION_MODES:
+            self.request.session['pagination'] = mode
+        return self.request.session.get('pagination', PAGINATION_MODE_DEFAULT)
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.get_pagination_mode() != 'keyset':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.keyset_paginator_class(queryset, page_size, ordering=self.get_ordering())
+        page = paginator.page(self.request.GET.get('cursor'))
+        return paginator, page, page.object_list, page.has_other_pages()
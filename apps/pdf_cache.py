@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import suppress
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseServerError
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from apps.constants import PDF_CACHE_SIZE_LIMIT
+
+PDF_SUFFIX = '.pdf'
+
+CachedPdf = namedtuple('CachedPdf', ['key', 'content', 'last_modified'])
+
+
+def get_template_version(template_name: str) -> str:
+    """Hash of template source, documents rendered by changed template get new keys."""
+    return hashlib.sha256(get_template(template_name).template.source.encode('UTF-8')).hexdigest()
+
+
+def get_model_values(instance) -> dict:
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+def get_pdf_key(template_name: str, content: dict) -> str:
+    """
+    Content address of PDF document: hash of all data rendered in document & template version.
+    Document of changed data or template is rendered again under new key, stale one is evicted in time.
+    """
+    payload = json.dumps([template_name, get_template_version(template_name), content],
+                         sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode('UTF-8')).hexdigest()
+
+
+def get_pdf_path(key: str) -> str:
+    return os.path.join(settings.PDF_CACHE_ROOT, f'{key}{PDF_SUFFIX}')
+
+
+def write_pdf(key: str, content: bytes) -> str:
+    """Write document to temporary file renamed at the end, so readers never see incomplete document."""
+    os.makedirs(settings.PDF_CACHE_ROOT, exist_ok=True)
+    path = get_pdf_path(key)
+    with tempfile.NamedTemporaryFile(dir=settings.PDF_CACHE_ROOT, suffix='.tmp', delete=False) as pdf_file:
+        pdf_file.write(content)
+    os.replace(pdf_file.name, path)
+    return path
+
+
+def evict_pdfs(size_limit: int = PDF_CACHE_SIZE_LIMIT, keep: Optional[str] = None) -> int:
+    """
+    Remove least recently used documents (access time set on each cache hit) until cache fits size limit.
+    :return:    removed documents count
+    """
+    entries = []
+    for entry in os.scandir(settings.PDF_CACHE_ROOT):
+        if entry.name.endswith(PDF_SUFFIX) and entry.path != keep:
+            with suppress(FileNotFoundError):
+                stat = entry.stat()
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+    size = sum(entry_size for _, entry_size, _ in entries)
+    if keep is not None:
+        with suppress(FileNotFoundError):
+            size += os.stat(keep).st_size
+    removed = 0
+    for _, entry_size, path in sorted(entries):
+        if size <= size_limit:
+            break
+        with suppress(FileNotFoundError):
+            os.remove(path)
+            removed += 1
+        size -= entry_size
+    return removed
+
+
+def read_pdf(key: str) -> Optional[CachedPdf]:
+    path = get_pdf_path(key)
+    try:
+        with open(path, 'rb') as pdf_file:
+            content = pdf_file.read()
+            last_modified = os.fstat(pdf_file.fileno()).st_mtime
+    except FileNotFoundError:
+        return None
+    with suppress(FileNotFoundError):
+        os.utime(path, (time.time(), last_modified))
+    return CachedPdf(key=key, content=content, last_modified=last_modified)
+
+
+def get_cached_pdf(key: str, render: Callable[[], Optional[bytes]]) -> Optional[CachedPdf]:
+    """
+    Cached document of key, rendered & stored in cache on miss.
+    :param render:  document rendering, None on rendering error
+    :return:        cached document, None if document was not rendered
+    """
+    cached_pdf = read_pdf(key)
+    if cached_pdf is not None:
+        return cached_pdf
+    content = render()
+    if content is None:
+        return None
+    path = write_pdf(key, content)
+    last_modified = os.stat(path).st_mtime
+    evict_pdfs(keep=path)
+    return CachedPdf(key=key, content=content, last_modified=last_modified)
+
+
+def get_pdf_response(request, key: str, render: Callable[[], Optional[bytes]]) -> HttpResponse:
+    """
+    Response of cached document with ETag (content key) & Last-Modified (rendering time) validators.
+    Document of same key has same content, so matching ETag is answered without reading cache.
+    """
+    etag = quote_etag(key)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        pdf = get_cached_pdf(key, render)
+        if pdf is None:
+            return HttpResponseServerError()
+        response = (get_conditional_response(request, etag=etag, last_modified=int(pdf.last_modified)) or
+                    HttpResponse(pdf.content, content_type='application/pdf'))
+        response['Last-Modified'] = http_date(pdf.last_modified)
+    response['ETag'] = etag
+    # content behind url may change, so document is revalidated on each use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
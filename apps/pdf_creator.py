@@ -1,17 +1,59 @@
+import functools
 from io import BytesIO
+from typing import Optional
+
+from django.conf import settings
 from django.http import HttpResponse
 from django.template.loader import get_template
+from django.utils.module_loading import import_string
+
+
+class PdfRenderer:
+    """HTML to PDF rendering engine. Engines are loaded on first rendering, so processes
+    not rendering documents do not pay for engine import.
+    """
+    def load(self) -> None:
+        """Load engine, rendering processes forked after loading inherit it."""
+
+    def render(self, html: str) -> Optional[bytes]:
+        """PDF document of HTML, None on rendering error."""
+        raise NotImplementedError
+
+
+class XhtmlToPdfRenderer(PdfRenderer):
+    """xhtml2pdf (pisa) engine, its import pulls in reportlab."""
+    pisa = None
+
+    def load(self) -> None:
+        if self.pisa is None:
+            from xhtml2pdf import pisa
+            self.pisa = pisa
 
-from xhtml2pdf import pisa
+    def render(self, html: str) -> Optional[bytes]:
+        self.load()
+        result = BytesIO()
+        pdf = self.pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result, encoding='UTF-8')
+        if not pdf.err:
+            return result.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def get_pdf_renderer() -> PdfRenderer:
+    """Rendering engine of PDF_RENDERER setting, shared by process."""
+    return import_string(settings.PDF_RENDERER)()
+
+
+def render_pdf(template, context_dict=None) -> Optional[bytes]:
+    """Render template to PDF document, None on rendering error."""
+    template = get_template(template)
+    html = template.render({} if context_dict is None else context_dict)
+    return get_pdf_renderer().render(html)
 
 
 def render_template_to_pdf(template, context_dict=None):
     """
 
     """
-    template = get_template(template)
-    html = template.render({} if context_dict is None else context_dict)
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result, encoding='UTF-8')
-    if not pdf.err:
-        return HttpResponse(result.getvalue(), content_type='application/pdf')
+    pdf = render_pdf(template, context_dict)
+    if pdf is not None:
+        return HttpResponse(pdf, content_type='application/pdf')
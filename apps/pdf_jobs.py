@@ -0,0 +1,208 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+from apps.constants import PDF_RENDER_POOL_SIZE, PDF_RENDER_RETRIES, PDF_RENDER_TIMEOUT
+from apps.pdf_cache import evict_pdfs, get_pdf_path, read_pdf, write_pdf
+from apps.pdf_creator import get_pdf_renderer, render_pdf
+
+logger = logging.getLogger(__name__)
+
+# job state is kept as marker files next to cached documents, so it is seen by all processes of host
+PENDING_SUFFIX = '.pending'
+FAILED_SUFFIX = '.failed'
+JOB_PENDING, JOB_DONE, JOB_FAILED = 'pending', 'done', 'failed'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_marker_path(key: str, suffix: str) -> str:
+    return os.path.join(settings.PDF_CACHE_ROOT, f'{key}{suffix}')
+
+
+def touch_marker(key: str, suffix: str) -> None:
+    os.makedirs(settings.PDF_CACHE_ROOT, exist_ok=True)
+    with open(get_marker_path(key, suffix), 'w'):
+        pass
+
+
+def remove_marker(key: str, suffix: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(get_marker_path(key, suffix))
+
+
+def get_job_status(key: str) -> Optional[str]:
+    """
+    Rendering job status of document key, pending job not finished in time of all its attempts
+    (e.g. process of pool was restarted) is considered lost.
+    :return:    job status, None if there is no job of document
+    """
+    if os.path.exists(get_pdf_path(key)):
+        return JOB_DONE
+    if os.path.exists(get_marker_path(key, FAILED_SUFFIX)):
+        return JOB_FAILED
+    with suppress(FileNotFoundError):
+        pending_time = time.time() - os.stat(get_marker_path(key, PENDING_SUFFIX)).st_mtime
+        # all attempts & time of waiting for free pool process
+        if pending_time < PDF_RENDER_TIMEOUT * (PDF_RENDER_RETRIES + 2):
+            return JOB_PENDING
+    return None
+
+
+def reset_connections() -> None:
+    """Drop database connections inherited by forked rendering process without closing them (closing would
+    end sessions of parent process), lazy queries of rendering context use own connections of process.
+    """
+    for connection in connections.all():
+        connection.connection = None
+
+
+def render_job(key: str, template_name: str, context: dict) -> None:
+    """Render document in pool process & store it in cache, exit code tells about rendering error."""
+    reset_connections()
+    content = render_pdf(template_name, context)
+    if content is None:
+        os._exit(1)
+    write_pdf(key, content)
+
+
+def render_document(document: Tuple[str, dict]) -> Optional[bytes]:
+    template_name, context = document
+    return render_pdf(template_name, context)
+
+
+def iter_rendered(documents: List[Tuple[str, dict]], processes: int) -> Iterator[Optional[bytes]]:
+    """
+    Render documents in parallel, results in documents order. Each document is waited for PDF_RENDER_TIMEOUT,
+    document not rendered in time gets None & its pool is stopped. Documents already rendered by other
+    processes are kept, the rest is rendered by new pool.
+    """
+    start = 0
+    while start < len(documents):
+        with multiprocessing.get_context('fork').Pool(min(processes, len(documents) - start),
+                                                      initializer=reset_connections) as pool:
+            results = [pool.apply_async(render_document, (document, )) for document in documents[start:]]
+            timed_out = False
+            for result in results:
+                if timed_out and not result.ready():
+                    break
+                try:
+                    content = result.get(None if timed_out else PDF_RENDER_TIMEOUT)
+                except multiprocessing.TimeoutError:
+                    logger.error("Document rendering not finished in %s s", PDF_RENDER_TIMEOUT)
+                    content, timed_out = None, True
+                except Exception:
+                    logger.exception("Document rendering failed")
+                    content = None
+                start += 1
+                yield content
+
+
+def render_pdfs(documents: Sequence[Tuple[str, str, dict]], processes: Optional[int] = None) \
+        -> Iterator[Optional[bytes]]:
+    """
+    Content of documents in their order, taken from cache or rendered in parallel by processes of all cores
+    & stored in cache. Rendering processes are stopped when iteration is not finished (e.g. closed response).
+    :param documents:   document key, template name & rendering context (pickled to rendering process)
+    :return:            documents content, None on rendering error or timeout
+    """
+    cached = [read_pdf(key) for key, _, _ in documents]
+    missing = [(template_name, context) for (_, template_name, context), pdf in zip(documents, cached) if pdf is None]
+    if not missing:
+        yield from (pdf.content for pdf in cached)
+        return
+    # engine is loaded once, not in each forked process
+    get_pdf_renderer().load()
+    rendered = iter_rendered(missing, processes or os.cpu_count() or 1)
+    try:
+        for (key, _, _), pdf in zip(documents, cached):
+            if pdf is not None:
+                yield pdf.content
+                continue
+            content = next(rendered)
+            if content is not None:
+                write_pdf(key, content)
+            yield content
+    finally:
+        rendered.close()
+    evict_pdfs()
+
+
+class PdfRenderPool:
+    """
+    Bounded pool rendering PDF documents to cache outside of request handling. Each attempt runs in own
+    forked process (rendering context with model instances is inherited, not pickled, database connections
+    are not), so it can be killed on timeout. Attempt failing to start (e.g. engine import error) is failed too.
+    Pool threads only supervise processes, pool size bounds concurrent rendering processes.
+
+    Process is forked from multithreaded server process, locks held by other threads at fork time stay
+    locked in it. Rendering process takes only locks re-initialized after fork (import & logging locks),
+    its own database connections and engine loaded before fork, cache & job state are plain files.
+    It ends with os._exit, so exit handlers of server process (e.g. measurements buffer flush) are not run.
+    Any other lock hanging the attempt is bounded by timeout, process is killed & attempt retried.
+    Spawned processes would need pickled context & their own Django setup per attempt.
+    """
+    def __init__(self, size: int = PDF_RENDER_POOL_SIZE, timeout: float = PDF_RENDER_TIMEOUT,
+                 retries: int = PDF_RENDER_RETRIES):
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='pdf-render')
+        self.timeout = timeout
+        self.retries = retries
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key: str, template_name: str, context: dict):
+        """Enqueue rendering job of document, job of document already rendered by pool is reused."""
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is None or job.done():
+                remove_marker(key, FAILED_SUFFIX)
+                touch_marker(key, PENDING_SUFFIX)
+                job = self.jobs[key] = self.executor.submit(self.run, key, template_name, context)
+            return job
+
+    def run(self, key: str, template_name: str, context: dict) -> bool:
+        try:
+            for _ in range(self.retries + 1):
+                try:
+                    rendered = self.render(key, template_name, context)
+                except Exception:
+                    logger.exception("Rendering of document %s not started", key)
+                    rendered = False
+                if rendered:
+                    evict_pdfs(keep=get_pdf_path(key))
+                    return True
+            touch_marker(key, FAILED_SUFFIX)
+            return False
+        finally:
+            remove_marker(key, PENDING_SUFFIX)
+            with self.lock:
+                self.jobs.pop(key, None)
+
+    def render(self, key: str, template_name: str, context: dict) -> bool:
+        get_pdf_renderer().load()
+        process = multiprocessing.get_context('fork').Process(target=render_job, args=(key, template_name, context),
+                                                              daemon=True)
+        process.start()
+        process.join(self.timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        return process.exitcode == 0 and os.path.exists(get_pdf_path(key))
+
+
+def get_render_pool() -> PdfRenderPool:
+    """Render pool of process, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfRenderPool()
+        return _pool
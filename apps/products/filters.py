@@ -1,10 +1,13 @@
 import django_filters
 
+from apps.constants import PRODUCT_SAP_DIGITS
 from apps.products.models import Product
+from apps.filter_state import StatefulFilterSet
+from apps.sap_filters import SapIdPrefixFilter
 
 
-class ProductFilter(django_filters.FilterSet):
-    product_sap_id = django_filters.CharFilter(lookup_expr='icontains')
+class ProductFilter(StatefulFilterSet):
+    product_sap_id = SapIdPrefixFilter(digits=PRODUCT_SAP_DIGITS)
     index = django_filters.CharFilter(lookup_expr='icontains')
     description = django_filters.CharFilter(lookup_expr='icontains')
 
@@ -1,7 +1,11 @@
+import re
+
 from betterforms.multiform import MultiModelForm
 from bootstrap_datepicker_plus import DatePickerInput
 from django import forms
+from django.db.models import Q
 
+from apps.clients.models import Client
 from apps.form_styles import NUM_STYLE, INT_STYLE, BASIC_REQ_STYLE, BASIC_STYLE, BASIC_NO_HINTS_STYLE, SAP_STYLE
 from apps.products.models import Product, Specification
 from apps.user_texts import HINTS, LABELS, ERROR_MSG
@@ -86,3 +90,50 @@ class SpecificationIssueForm(forms.Form):
     date_of_issue = forms.DateField(widget=DatePickerInput(options={'showClear': False, 'locale': 'pl', },
                                     attrs={**BASIC_STYLE, },
                                     format='%Y-%m-%d'), label='Data wystawienia specyfikacji')
+
+
+class SpecificationBulkIssueForm(forms.Form):
+    """Issue specification to many clients: listed by SAP numbers and/or all clients
+    with production orders of product. Clients are provided in cleaned data.
+    """
+    validation_hints = {'client_sap_ids': HINTS['client']['client_sap_id'],
+                        'clients_with_orders': '',
+                        'date_of_issue': HINTS['order']['date_of_production'], }
+
+    client_sap_ids = forms.CharField(widget=forms.Textarea(attrs={**BASIC_STYLE, 'rows': 5, 'cols': 40}),
+                                     required=False, label='Numery SAP klientów (oddzielone spacją lub przecinkiem)')
+    clients_with_orders = forms.BooleanField(required=False,
+                                             label='Wszyscy klienci z zleceniami produkcyjnymi produktu')
+    date_of_issue = forms.DateField(widget=DatePickerInput(options={'showClear': False, 'locale': 'pl', },
+                                    attrs={**BASIC_STYLE, },
+                                    format='%Y-%m-%d'), label='Data wystawienia specyfikacji')
+
+    def __init__(self, *args, product=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.product = product
+
+    def clean_client_sap_ids(self):
+        values = [value for value in re.split(r'[\s,;]+', self.cleaned_data['client_sap_ids']) if value]
+        invalid_values = [value for value in values if not value.isdigit()]
+        if invalid_values:
+            raise forms.ValidationError(ERROR_MSG['specification_bulk_issue']['client_sap_ids']['invalid'].format(
+                values=', '.join(invalid_values)))
+        return list(dict.fromkeys(int(value) for value in values))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        client_sap_ids = cleaned_data.get('client_sap_ids')
+        if client_sap_ids is None:
+            return cleaned_data
+        clients_filter = Q(client_sap_id__in=client_sap_ids)
+        if cleaned_data.get('clients_with_orders'):
+            clients_filter |= Q(orders__product=self.product)
+        clients = list(Client.objects.filter(clients_filter).distinct().order_by('client_name', 'id'))
+        unknown_sap_ids = set(client_sap_ids).difference(client.client_sap_id for client in clients)
+        if unknown_sap_ids:
+            self.add_error('client_sap_ids', ERROR_MSG['specification_bulk_issue']['client_sap_ids']['unknown'].format(
+                values=', '.join(map(str, sorted(unknown_sap_ids)))))
+        elif not clients:
+            raise forms.ValidationError(ERROR_MSG['specification_bulk_issue']['clients']['required'])
+        cleaned_data['clients'] = clients
+        return cleaned_data
@@ -0,0 +1,10 @@
+from apps.master_data_sync import MasterDataSyncCommand
+from apps.products.models import Product
+
+
+class Command(MasterDataSyncCommand):
+    help = "Synchronize products with SAP materials extract " \
+           "(CSV or JSON lines with product_sap_id, index & description)."
+    model = Product
+    key_field = 'product_sap_id'
+    fields = ('index', 'description', )
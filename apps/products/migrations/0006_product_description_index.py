@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_specificationissued'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['description', 'id'], name='product_description_id_idx'),
+        ),
+    ]
@@ -16,6 +16,9 @@ class Product(models.Model):
     index = models.CharField(max_length=30, null=True, blank=True)
     description = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [models.Index(fields=['description', 'id'], name='product_description_id_idx'), ]
+
     def __str__(self):
         return self.description
 
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.products.models import Product
+from apps.paginators import invalidate_pagination_counts
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_counts(sender, **kwargs):
+    """Invalidate cached paginated list counts after product data change."""
+    invalidate_pagination_counts(sender)
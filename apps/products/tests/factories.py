@@ -1,7 +1,8 @@
 import factory
 
+from apps.clients.tests.factories import ClientFactory
 from apps.constants import PRODUCT_SAP_DIGITS, FLOAT_DEFAULT, INT_DEFAULT
-from apps.products.models import Product, Specification
+from apps.products.models import Product, Specification, SpecificationIssued
 
 
 class ProductFactory(factory.DjangoModelFactory):
@@ -51,3 +52,11 @@ class SpecificationFactory(factory.DjangoModelFactory):
     pallet_wrapped_with_stretch_film = 'N'
     cores_packed_in = 'Vertical'
     remarks = factory.Sequence(lambda n: f"test_remarks_{n}")
+
+
+class SpecificationIssuedFactory(SpecificationFactory):
+    class Meta:
+        model = SpecificationIssued
+
+    client = factory.SubFactory(ClientFactory)
+    date_of_issue = '4098-12-12'
@@ -0,0 +1,109 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.pdf_cache import evict_pdfs, get_cached_pdf, get_pdf_path
+from apps.pdf_creator import render_pdf
+from apps.products.models import Specification
+from apps.products.tests.factories import SpecificationFactory
+
+
+class SpecificationPdfCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.specification = SpecificationFactory.create()
+        cls.url = reverse('products:specification-pdf-render',
+                          kwargs={'pk': cls.specification.product_id, 'date': '2020-03-01', 'client_name': 'Client'})
+
+    def setUp(self) -> None:
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root)
+        settings_override = self.settings(PDF_CACHE_ROOT=cache_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.cache_root = cache_root
+
+    def get_pdf(self, **headers):
+        with mock.patch('apps.products.views.render_pdf', side_effect=render_pdf) as render:
+            response = self.client.get(self.url, **headers)
+        return response, render.call_count
+
+    def test_pdf_cached(self):
+        """Act: get specification pdf twice <> Exp: document rendered once, same content & validators
+        """
+        response, render_count = self.get_pdf()
+        self.assertEqual((response.status_code, render_count), (200, 1))
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        cached_response, render_count = self.get_pdf()
+        self.assertEqual((cached_response.content, render_count), (response.content, 0))
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+        self.assertEqual(cached_response['Last-Modified'], response['Last-Modified'])
+        self.assertEqual(len(os.listdir(self.cache_root)), 1)
+
+    def test_pdf_not_modified(self):
+        """Act: get specification pdf with validators of cached document <> Exp: not modified, no rendering
+        """
+        response, _ = self.get_pdf()
+        for headers in ({'HTTP_IF_NONE_MATCH': response['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}):
+            not_modified_response, render_count = self.get_pdf(**headers)
+            self.assertEqual((not_modified_response.status_code, render_count), (304, 0), msg=headers)
+
+    def test_pdf_rendered_on_specification_change(self):
+        """Act: change specification & get pdf with old ETag <> Exp: document rendered again with new ETag
+        """
+        response, _ = self.get_pdf()
+        Specification.objects.filter(pk=self.specification.pk).update(colour='Changed colour')
+        changed_response, render_count = self.get_pdf(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((changed_response.status_code, render_count), (200, 1))
+        self.assertNotEqual(changed_response['ETag'], response['ETag'])
+
+    def test_pdf_rendered_on_template_change(self):
+        """Act: change pdf template version <> Exp: document rendered again
+        """
+        self.get_pdf()
+        with mock.patch('apps.pdf_cache.get_template_version', return_value='changed'):
+            _, render_count = self.get_pdf()
+        self.assertEqual(render_count, 1)
+
+    def test_evict_least_recently_used(self):
+        """Act: evict cache over size limit <> Exp: least recently used documents removed
+        """
+        for key in ('a', 'b', 'c'):
+            get_cached_pdf(key, lambda: b'%PDF' * 25)
+        now = time.time()
+        for age, key in enumerate(('b', 'a', 'c')):
+            os.utime(get_pdf_path(key), (now - 100 * age, now))
+        self.assertEqual(evict_pdfs(size_limit=200), 1)
+        self.assertEqual(sorted(os.listdir(self.cache_root)), ['a.pdf', 'b.pdf'])
+        self.assertIsNotNone(get_cached_pdf('a', lambda: None))
+        self.assertIsNone(get_cached_pdf('c', lambda: None))
+
+
+class PdfRendererTest(SimpleTestCase):
+    @staticmethod
+    def benchmark_import_time(*lazy: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, os.path.join(settings.BASE_DIR, 'scripts', 'benchmark_import_time.py'),
+                               '--repeat', '1', '--lazy', *lazy], capture_output=True, text=True)
+
+    def test_pdf_engine_not_imported_on_boot(self):
+        """Act: boot fresh worker (setup & URLconf with all views) <> Exp: PDF engine not imported
+        """
+        result = self.benchmark_import_time('xhtml2pdf', 'reportlab')
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        self.assertIn("not imported during boot", result.stdout)
+
+    def test_eager_import_on_boot(self):
+        """Act: boot fresh worker expecting package imported by views not to be imported <> Exp: error status
+        """
+        result = self.benchmark_import_time('numpy')
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("numpy", result.stderr)
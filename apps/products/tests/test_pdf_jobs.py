@@ -0,0 +1,223 @@
+import atexit
+import functools
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.clients.tests.factories import ClientFactory
+from apps.orders.tests.factories import OrderFactory
+from apps.pdf_jobs import PdfRenderPool, render_pdfs
+from apps.products.models import SpecificationIssued
+from apps.products.tests.factories import SpecificationFactory
+from apps.user_texts import ZIP_MSG
+
+
+class SpecificationPdfJobTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.specification = SpecificationFactory.create()
+        cls.client_model = ClientFactory.create()
+        cls.url_kwargs = {'pk': cls.specification.product_id, 'date': '2020-03-01',
+                          'client_name': cls.client_model.client_name}
+
+    def setUp(self) -> None:
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root)
+        settings_override = self.settings(PDF_CACHE_ROOT=cache_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.pool = PdfRenderPool(size=1, timeout=10, retries=1)
+        pool_patch = mock.patch('apps.products.views.get_render_pool', return_value=self.pool)
+        pool_patch.start()
+        self.addCleanup(pool_patch.stop)
+
+    def wait_for_jobs(self):
+        self.pool.executor.shutdown(wait=True)
+
+    def get_job(self, **params):
+        return self.client.get(reverse('products:specification-pdf-job', kwargs=self.url_kwargs), params)
+
+    def test_issue_enqueues_pdf(self):
+        """Act: issue specification for client <> Exp: specification saved, redirect to job, pdf rendered in pool
+        """
+        response = self.client.post(reverse('products:specification-issue', kwargs={'pk': self.url_kwargs['pk']}),
+                                    {'client_sap_id': self.client_model.client_sap_id,
+                                     'date_of_issue': self.url_kwargs['date']})
+        self.assertRedirects(response, reverse('products:specification-pdf-job', kwargs=self.url_kwargs),
+                             fetch_redirect_response=False)
+        self.assertTrue(SpecificationIssued.objects.filter(client=self.client_model).exists())
+        self.wait_for_jobs()
+        response = self.get_job()
+        pdf_url = reverse('products:specification-pdf-render', kwargs=self.url_kwargs)
+        self.assertRedirects(response, pdf_url, fetch_redirect_response=False)
+        with mock.patch('apps.products.views.render_pdf') as render:
+            self.assertTrue(self.client.get(pdf_url).content.startswith(b'%PDF'))
+        self.assertFalse(render.called)
+
+    def test_job_pending(self):
+        """Act: get status of job not finished <> Exp: accepted, status page reloaded
+        """
+        with mock.patch('apps.pdf_jobs.render_pdf', side_effect=lambda *args: time.sleep(1)):
+            response = self.get_job()
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(self.get_job().status_code, 202)
+            self.assertTrue(response.context['pending'])
+            self.wait_for_jobs()
+
+    def test_job_timeout_retries(self):
+        """Act: render pdf slower than job timeout <> Exp: attempt killed & retried, job failed, retry on request
+        """
+        self.pool.timeout = 0.2
+        with mock.patch('apps.pdf_jobs.render_pdf', side_effect=lambda *args: time.sleep(10)), \
+                mock.patch.object(self.pool, 'render', wraps=self.pool.render) as render:
+            start = time.time()
+            self.get_job()
+            self.pool.executor.shutdown(wait=True)
+            self.assertLess(time.time() - start, 5)
+        self.assertEqual(render.call_count, 2)
+        response = self.get_job()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['pending'])
+
+        self.pool = PdfRenderPool(size=1)
+        with mock.patch('apps.products.views.get_render_pool', return_value=self.pool):
+            self.assertEqual(self.get_job(retry='').status_code, 202)
+            self.wait_for_jobs()
+        self.assertEqual(self.get_job().status_code, 302)
+
+    def test_fork_with_locks_held(self):
+        """Act: render pdf while other thread holds logging handler lock, server has exit handler
+        <> Exp: forked process logs & renders in time, exit handler not run by it
+        """
+        handler = logging.StreamHandler(io.StringIO())
+        render_logger = logging.getLogger('apps.pdf_jobs.fork_test')
+        render_logger.addHandler(handler)
+        self.addCleanup(render_logger.removeHandler, handler)
+        exit_marker = os.path.join(tempfile.mkdtemp(), 'exit')
+        self.addCleanup(shutil.rmtree, os.path.dirname(exit_marker))
+        exit_handler = functools.partial(open, exit_marker, 'w')
+        atexit.register(exit_handler)
+        self.addCleanup(atexit.unregister, exit_handler)
+        held, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with handler.lock:
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        held.wait()
+        try:
+            with mock.patch('apps.pdf_jobs.render_pdf',
+                            side_effect=lambda *args: render_logger.error("rendering") or b'%PDF'):
+                self.assertTrue(self.pool.render('fork-test', 'template.html', {}))
+        finally:
+            release.set()
+            thread.join()
+        self.assertFalse(os.path.exists(exit_marker))
+
+    def test_job_start_error(self):
+        """Act: render pdf with engine failing to load <> Exp: attempts logged, job failed, not enqueued again
+        """
+        with mock.patch('apps.pdf_jobs.get_pdf_renderer', side_effect=ImportError), \
+                self.assertLogs('apps.pdf_jobs') as logs:
+            self.get_job()
+            self.wait_for_jobs()
+        self.assertEqual(len(logs.records), 2)
+        response = self.get_job()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['pending'])
+
+
+class SpecificationBulkIssueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.specification = SpecificationFactory.create()
+        cls.product = cls.specification.product
+        cls.clients = ClientFactory.create_batch(size=3)
+        cls.order_clients = [OrderFactory.create(product=cls.product).client for _ in range(2)]
+        cls.url = reverse('products:specification-bulk-issue', kwargs={'pk': cls.product.pk})
+
+    def setUp(self) -> None:
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root)
+        settings_override = self.settings(PDF_CACHE_ROOT=cache_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def post(self, client_sap_ids: str, clients_with_orders: bool = False):
+        data = {'client_sap_ids': client_sap_ids, 'date_of_issue': '2020-03-01'}
+        if clients_with_orders:
+            data['clients_with_orders'] = 'on'
+        return self.client.post(self.url, data)
+
+    def test_bulk_issue(self):
+        """Act: issue specification to listed clients & clients with orders <> Exp: issued specifications saved,
+        ZIP of their pdfs streamed
+        """
+        clients = self.clients[:2] + self.order_clients
+        response = self.post(f'{self.clients[0].client_sap_id}, {self.clients[1].client_sap_id}\n'
+                             f'{self.order_clients[0].client_sap_id}', clients_with_orders=True)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(sorted(archive.namelist()),
+                         sorted(f'specyfikacja_{self.product.product_sap_id}_{client.client_sap_id}.pdf'
+                                for client in clients))
+        self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in archive.namelist()))
+        issued_client_ids = SpecificationIssued.objects.filter(product=self.product).values_list('client_id', flat=True)
+        self.assertEqual(set(issued_client_ids), {client.client_sap_id for client in clients})
+
+        # documents of issued specifications are cached
+        with mock.patch('apps.pdf_jobs.multiprocessing.get_context') as get_context:
+            response = self.post(str(self.clients[0].client_sap_id))
+            self.assertEqual(len(zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))).namelist()), 1)
+        self.assertFalse(get_context.called)
+
+    def test_bulk_issue_not_rendered(self):
+        """Act: issue specification to clients, document of one rendered with error <> Exp: ZIP of rendered pdfs
+        & errors member listing missing one
+        """
+        failing_client = self.clients[1]
+        with mock.patch('apps.pdf_jobs.render_pdf', side_effect=lambda template, context: None
+                        if context['client_name'] == failing_client.client_name else b'%PDF'), \
+                self.assertLogs('apps.products.views'):
+            response = self.post(' '.join(str(client.client_sap_id) for client in self.clients))
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        missing_name = f'specyfikacja_{self.product.product_sap_id}_{failing_client.client_sap_id}.pdf'
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertNotIn(missing_name, archive.namelist())
+        self.assertIn(missing_name, archive.read(ZIP_MSG['errors_name']).decode('utf-8'))
+
+    def test_render_timeout(self):
+        """Act: render documents, one slower than timeout <> Exp: documents rendered in time kept, hanging one
+        given up
+        """
+        documents = [(f'key-{number}', 'template.html', {'number': number}) for number in range(4)]
+        with mock.patch('apps.pdf_jobs.PDF_RENDER_TIMEOUT', 0.5), \
+                mock.patch('apps.pdf_jobs.render_pdf', side_effect=lambda template, context: time.sleep(10)
+                           if context['number'] == 1 else f'%PDF-{context["number"]}'.encode()), \
+                self.assertLogs('apps.pdf_jobs'):
+            start = time.time()
+            contents = list(render_pdfs(documents, processes=2))
+            self.assertLess(time.time() - start, 5)
+        self.assertEqual(contents, [b'%PDF-0', None, b'%PDF-2', b'%PDF-3'])
+
+    def test_bulk_issue_invalid(self):
+        """Act: issue specification to unknown, invalid & no clients <> Exp: form errors, nothing issued
+        """
+        for client_sap_ids in (f'{self.clients[0].client_sap_id} 1234567', 'abc', ''):
+            response = self.post(client_sap_ids)
+            self.assertEqual(response.status_code, 200, msg=client_sap_ids)
+            self.assertTrue(response.context['form'].errors, msg=client_sap_ids)
+        self.assertFalse(SpecificationIssued.objects.exists())
@@ -5,8 +5,9 @@ from django.test import TestCase, Client as ViewClient
 from apps.products.forms import ProductSpecificationMultiForm
 from apps.products.models import Product, Specification
 from apps.products.tests.factories import ProductFactory, SpecificationFactory
+from apps.products.views import ProductListView, ProductDetailView
 from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
-from apps.unittest_helpers import assert_response_post, assert_response_get
+from apps.unittest_helpers import assert_response_post, assert_response_get, assert_query_budget
 from apps.users.tests import PASSWORD
 from apps.users.tests.factories import CxUserFactory
 
@@ -38,6 +39,16 @@ class ProductsViewTest(TestCase):
         self.assertEqual(response.context['page_obj'].paginator.num_pages,
                          ceil(len(self.products) / PAGINATION_OBJ_COUNT_PER_PAGE))
 
+    def test_list_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        assert_query_budget(test_case=self, url_name='products:products-list', view_class=ProductListView)
+
+    def test_detail_query_budget(self):
+        self.view_client.login(username=self.user.username, password=PASSWORD)
+        response = assert_query_budget(test_case=self, url_name='products:product-detail',
+                                       view_class=ProductDetailView, id=self.product_to_be_updated.id)
+        self.assertContains(response, self.product_to_be_updated.specification.remarks)
+
     def test_new_get(self):
         self.view_client.login(username=self.user.username, password=PASSWORD)
         response = assert_response_get(test_case=self, url_name='products:product-new',
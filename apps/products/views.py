@@ -1,50 +1,43 @@
+import logging
+
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import UpdateView, CreateView, DetailView, DeleteView, ListView, FormView
-from django.views.generic.base import View
+from django.views.generic.base import TemplateResponseMixin, View
 from django.views.generic.detail import SingleObjectMixin
 
 from apps.clients.models import Client
-from apps.pdf_creator import render_template_to_pdf
+from apps.pdf_cache import get_model_values, get_pdf_key, get_pdf_response
+from apps.pdf_creator import render_pdf
+from apps.pdf_jobs import JOB_DONE, JOB_FAILED, JOB_PENDING, get_job_status, get_render_pool, render_pdfs
 from apps.products.filters import ProductFilter
-from apps.products.forms import ProductForm, SpecificationForm, ProductSpecificationMultiForm, SpecificationIssueForm
+from apps.products.forms import ProductForm, SpecificationForm, ProductSpecificationMultiForm, SpecificationIssueForm, \
+    SpecificationBulkIssueForm
 from apps.products.models import Product, SpecificationIssued
-from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE
-from apps.user_texts import VIEW_MSG
-from apps.view_helpers import add_error_messages, update_filter_params, update_ordering
+from apps.constants import PAGINATION_OBJ_COUNT_PER_PAGE, STRFTIME_DATE
+from apps.paginators import ListPaginationMixin
+from apps.streaming import stream_zip, with_errors_member
+from apps.user_texts import VIEW_MSG, ZIP_MSG
+from apps.view_helpers import add_error_messages, FilterStateMixin
+
+logger = logging.getLogger(__name__)
 
 
-class ProductListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class ProductListView(LoginRequiredMixin, PermissionRequiredMixin, FilterStateMixin, ListPaginationMixin, ListView):
     """List products, provide product filtering and sorting."""
     model = Product
+    queryset = Product.objects.only('id', 'product_sap_id', 'index', 'description')
     template_name = 'products_list.html'
     login_url = 'users:user-login'
     permission_required = ('products.view_product', )
     paginate_by = PAGINATION_OBJ_COUNT_PER_PAGE
     ordering = ('id', )
-
-    def get_queryset(self):
-        """Update session for request GET parameters.
-        Filter & sort products by parameters values stored in session.
-        """
-        self.request.session = update_filter_params(params=self.request.GET,
-                                                    session=self.request.session,
-                                                    filter_class=ProductFilter)
-        product_filter = ProductFilter(self.request.session, queryset=self.model.objects.all())
-        qs = product_filter.qs.order_by(self.get_ordering())
-        return qs
-
-    def get_ordering(self):
-        """Update session for ordering parameter from request.
-        Return ordering value stored in session or id as a default.
-        """
-        self.request.session = update_ordering(params=self.request.GET,
-                                               session=self.request.session)
-        return self.request.session.get('ordering', 'id')
+    filterset_class = ProductFilter
+    query_budget = 4
 
 
 class ProductCreateView(SuccessMessageMixin, LoginRequiredMixin,
@@ -86,9 +79,11 @@ class ProductCreateView(SuccessMessageMixin, LoginRequiredMixin,
 class ProductDetailView(DetailView):
     """Provide information about product with specification."""
     model = Product
+    queryset = Product.objects.select_related('specification')
     template_name = 'product_detail.html'
     login_url = 'users:user-login'
     permission_required = ('products.view_product', )
+    query_budget = 3
 
 
 class ProductUpdateView(SuccessMessageMixin, LoginRequiredMixin,
@@ -145,29 +140,77 @@ class ProductDeleteView(SuccessMessageMixin, LoginRequiredMixin,
         return super().delete(request, *args, **kwargs)
 
 
-class SpecificationPdfRenderView(SingleObjectMixin, View):
+class SpecificationPdfMixin:
+    """Specification PDF of product (view object) for client, identified by its content key."""
+    pdf_template_name = 'specification_to_pdf.html'
+
+    def get_pdf_context_data(self, client_name, date):
+        return {'product': self.object, 'client_name': client_name, 'date': date}
+
+    def get_pdf_key(self, client_name, date):
+        return get_pdf_key(self.pdf_template_name, {'product': get_model_values(self.object),
+                                                    'specification': get_model_values(self.object.specification),
+                                                    'client_name': client_name, 'date': date})
+
+    def get_issued_specification(self, client, date_of_issue):
+        """Copy of current product specification issued for client."""
+        specification_ss = SpecificationIssued(client=client,
+                                               product=self.object,
+                                               date_of_issue=date_of_issue)
+        for field in self.object.specification._meta.get_fields():
+            field_value = getattr(self.object.specification, field.name)
+            setattr(specification_ss, field.name, field_value)
+        return specification_ss
+
+    def enqueue_pdf(self, client_name, date):
+        """Render document in background pool of processes."""
+        get_render_pool().submit(self.get_pdf_key(client_name, date), self.pdf_template_name,
+                                 self.get_pdf_context_data(client_name, date))
+
+
+class SpecificationPdfRenderView(SpecificationPdfMixin, SingleObjectMixin, View):
+    """Render specification PDF for client, documents are served from content addressed disk cache
+    with ETag (content hash) & Last-Modified (rendering time) validators.
+    """
     model = Product
 
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(self.model, pk=self.kwargs.get('pk'))
         return super().dispatch(request, *args, **kwargs)
 
-    def get_context_data(self, **kwargs):
-        client_name = self.kwargs.get('client_name')
-        issue_date = self.kwargs.get('date')
-        context = super().get_context_data(**kwargs)
-        context['client_name'] = client_name
-        context['date'] = issue_date
-        return context
-
     def get(self, request, *args, **kwargs):
-        data = self.get_context_data()
-        pdf = render_template_to_pdf('specification_to_pdf.html', data)
-        response = HttpResponse(pdf, content_type='application/pdf')
-        return response
+        client_name, issue_date = self.kwargs.get('client_name'), self.kwargs.get('date')
+        return get_pdf_response(request, self.get_pdf_key(client_name, issue_date),
+                                lambda: render_pdf(self.pdf_template_name,
+                                                   self.get_pdf_context_data(client_name, issue_date)))
 
 
-class SpecificationIssueView(SingleObjectMixin, FormView):
+class SpecificationPdfJobView(SpecificationPdfMixin, SingleObjectMixin, TemplateResponseMixin, View):
+    """Status of background specification PDF rendering, redirect to document when it is rendered.
+    Lost job is enqueued again, failed job on user request (retry parameter).
+    """
+    model = Product
+    template_name = 'specification_pdf_job.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.object = get_object_or_404(self.model, pk=self.kwargs.get('pk'))
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        client_name, issue_date = self.kwargs.get('client_name'), self.kwargs.get('date')
+        status = get_job_status(self.get_pdf_key(client_name, issue_date))
+        if status == JOB_DONE:
+            return redirect('products:specification-pdf-render', **self.kwargs)
+        if status is None or (status == JOB_FAILED and 'retry' in request.GET):
+            self.enqueue_pdf(client_name, issue_date)
+            status = JOB_PENDING
+        pending = status == JOB_PENDING
+        context = self.get_context_data(client_name=client_name, date=issue_date, pending=pending,
+                                        status_message=VIEW_MSG['specification']['pdf_pending' if pending else 'pdf_error'])
+        return self.render_to_response(context, status=202 if status == JOB_PENDING else 200)
+
+
+class SpecificationIssueView(SpecificationPdfMixin, SingleObjectMixin, FormView):
     model = Product
     form_class = SpecificationIssueForm
     template_name = 'specification_issue_form.html'
@@ -190,16 +233,11 @@ class SpecificationIssueView(SingleObjectMixin, FormView):
         client_sap_id = form['client_sap_id'].value()
 
         client = Client.objects.get(client_sap_id=client_sap_id)
-        specification_ss = SpecificationIssued(client=client,
-                                               product=self.object,
-                                               date_of_issue=date_of_issue)
-        for field in self.object.specification._meta.get_fields():
-            field_value = getattr(self.object.specification, field.name)
-            setattr(specification_ss, field.name, field_value)
-
+        specification_ss = self.get_issued_specification(client, date_of_issue)
         specification_ss.save()
+        self.enqueue_pdf(client.client_name, date_of_issue)
 
-        return HttpResponseRedirect(reverse_lazy('products:specification-pdf-render',
+        return HttpResponseRedirect(reverse_lazy('products:specification-pdf-job',
                                                  kwargs={'pk': self.object.pk,
                                                          'date': date_of_issue,
                                                          'client_name': client.client_name}))
@@ -208,3 +246,46 @@ class SpecificationIssueView(SingleObjectMixin, FormView):
         add_error_messages(request=self.request, forms=[form, ],
                            base_msg=VIEW_MSG['specification']['issue_error'])
         return super().form_invalid(form)
+
+
+class SpecificationBulkIssueView(SpecificationPdfMixin, SingleObjectMixin, FormView):
+    """Issue specification to many clients at once & stream ZIP of their specification PDFs.
+    Issued specifications are inserted in one batch, documents missing in cache are rendered in parallel.
+    """
+    model = Product
+    form_class = SpecificationBulkIssueForm
+    template_name = 'specification_bulk_issue_form.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.object = get_object_or_404(self.model, pk=self.kwargs.get('pk'))
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'product': self.object}
+
+    def iter_pdf_members(self, clients, date_of_issue):
+        """Specification PDF of each client, documents not rendered are listed in errors member of ZIP."""
+        documents = [(self.get_pdf_key(client.client_name, date_of_issue), self.pdf_template_name,
+                      self.get_pdf_context_data(client.client_name, date_of_issue)) for client in clients]
+        for client, content in zip(clients, render_pdfs(documents)):
+            if content is None:
+                logger.error("Specification PDF of product %s for client %s not rendered",
+                             self.object.product_sap_id, client.client_sap_id)
+            yield f'specyfikacja_{self.object.product_sap_id}_{client.client_sap_id}.pdf', content
+
+    def form_valid(self, form):
+        date_of_issue = form.cleaned_data['date_of_issue'].strftime(STRFTIME_DATE)
+        clients = form.cleaned_data['clients']
+        SpecificationIssued.objects.bulk_create([self.get_issued_specification(client, date_of_issue)
+                                                 for client in clients])
+        members = with_errors_member(self.iter_pdf_members(clients, date_of_issue),
+                                     ZIP_MSG['errors_name'], ZIP_MSG['not_rendered'])
+        response = StreamingHttpResponse(stream_zip(members), content_type='application/zip')
+        response['Content-Disposition'] = \
+            f'attachment; filename="specyfikacje_{self.object.product_sap_id}_{date_of_issue}.zip"'
+        return response
+
+    def form_invalid(self, form):
+        add_error_messages(request=self.request, forms=[form, ],
+                           base_msg=VIEW_MSG['specification']['bulk_issue_error'])
+        return super().form_invalid(form)
@@ -0,0 +1,30 @@
+import csv
+import json
+import os
+from typing import Any, Iterator, Optional, TextIO, Tuple
+
+EXTRACT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.json': 'jsonl', '.ndjson': 'jsonl', }
+
+
+def get_extract_format(file_name: str) -> Optional[str]:
+    return EXTRACT_FORMATS.get(os.path.splitext(file_name)[1].lower())
+
+
+def read_extract_rows(file: "TextIO", extract_format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield rows of SAP extract file with their line numbers.
+    Lines which are not valid JSON are yielded as None rows.
+    :param file:            text file with CSV header or JSON object per line
+    :param extract_format:  csv or jsonl
+    """
+    if extract_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
@@ -0,0 +1,44 @@
+import re
+from typing import Tuple
+
+import django_filters
+from django.core.validators import EMPTY_VALUES
+
+from apps.constants import SAP_ID_SUBSTRING_SEARCH_MARK
+
+SAP_ID_PREFIX_REGEX = re.compile(r'^[0-9]+$')
+
+
+def get_sap_id_prefix_range(prefix: str, digits: int) -> Tuple[int, int]:
+    """
+    Translate typed prefix of fixed width SAP id into inclusive numeric range.
+    :param prefix:  leading digits of SAP id, e.g. 123 for 7 digits id
+    :param digits:  SAP id width
+    :return:        range bounds, e.g. (1230000, 1239999)
+    """
+    scale = 10 ** (digits - len(prefix))
+    low = int(prefix) * scale
+    return low, low + scale - 1
+
+
+class SapIdPrefixFilter(django_filters.CharFilter):
+    """Filter integer SAP id column by typed prefix converted into numeric range,
+    so unique index on SAP id is used instead of casting each row to text.
+    Substring matching is kept as an explicit fallback for values starting with search mark (e.g. *345).
+    """
+    def __init__(self, *args, digits: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.digits = digits
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        value = value.strip()
+        if value.startswith(SAP_ID_SUBSTRING_SEARCH_MARK):
+            substring = value[len(SAP_ID_SUBSTRING_SEARCH_MARK):]
+            if not substring:
+                return qs
+            return self.get_method(qs)(**{f'{self.field_name}__icontains': substring})
+        if not SAP_ID_PREFIX_REGEX.match(value) or len(value) > self.digits:
+            return qs.none()
+        return self.get_method(qs)(**{f'{self.field_name}__range': get_sap_id_prefix_range(value, self.digits)})
@@ -0,0 +1,138 @@
+import csv
+import io
+import itertools
+import zipfile
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+XLSX_CONTENT_TYPES = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' \
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">' \
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>' \
+    '<Default Extension="xml" ContentType="application/xml"/>' \
+    '<Override PartName="/xl/workbook.xml" ' \
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>' \
+    '<Override PartName="/xl/worksheets/sheet1.xml" ' \
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/></Types>'
+XLSX_RELS = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' \
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' \
+    '<Relationship Id="rId1" Target="xl/workbook.xml" ' \
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/></Relationships>'
+XLSX_WORKBOOK = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' \
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" ' \
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">' \
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+XLSX_WORKBOOK_RELS = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' \
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' \
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" ' \
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/></Relationships>'
+XLSX_SHEET_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' \
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+
+STREAM_BLOCK_ROWS = 500
+
+
+class StreamBuffer(io.RawIOBase):
+    """Write only, not seekable file collecting bytes written since last pop."""
+    def __init__(self):
+        super().__init__()
+        self._data = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._data.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pop(self) -> bytes:
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+def iter_blocks(iterable: Iterable, size: int = STREAM_BLOCK_ROWS) -> Iterator[list]:
+    iterator = iter(iterable)
+    block = list(itertools.islice(iterator, size))
+    while block:
+        yield block
+        block = list(itertools.islice(iterator, size))
+
+
+def stream_zip(members: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    Yield ZIP archive bytes as members content is produced. Members are written with
+    data descriptors, so neither archive nor its members are kept in memory.
+    :param members:     pairs of member name & member content chunks
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in members:
+            with archive.open(name, mode='w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = buffer.pop()
+                    if data:
+                        yield data
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def with_errors_member(members: Iterable[Tuple[str, Optional[bytes]]], errors_name: str,
+                       errors_header: str) -> Iterator[Tuple[str, Iterable[bytes]]]:
+    """
+    Members of ZIP archive (see stream_zip) with content produced in one piece. Members without content
+    are not written, their names are listed in errors text member at the end of archive instead.
+    :param errors_header:   first line of errors member, formatted with count of missing members
+    """
+    missing = []
+    for name, content in members:
+        if content is None:
+            missing.append(name)
+            continue
+        yield name, [content]
+    if missing:
+        yield errors_name, ['\r\n'.join([errors_header.format(count=len(missing)), *missing, '']).encode('utf-8')]
+
+
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Yield UTF-8 CSV (with BOM recognized by spreadsheets) in blocks of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for block in iter_blocks(rows):
+        writer.writerows(block)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def get_xlsx_cell(value) -> str:
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def stream_xlsx_sheet(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    yield XLSX_SHEET_HEAD.encode('utf-8')
+    for block in iter_blocks(itertools.chain([header], rows)):
+        yield ''.join(f"<row>{''.join(get_xlsx_cell(value) for value in row)}</row>" for row in block).encode('utf-8')
+    yield XLSX_SHEET_TAIL.encode('utf-8')
+
+
+def stream_xlsx(header: Sequence[str], rows: Iterable[Sequence], sheet_name: str = 'Sheet1') -> Iterator[bytes]:
+    """Yield single sheet XLSX workbook with inline strings, built on streamed ZIP archive."""
+    return stream_zip([('[Content_Types].xml', [XLSX_CONTENT_TYPES.encode('utf-8')]),
+                       ('_rels/.rels', [XLSX_RELS.encode('utf-8')]),
+                       ('xl/workbook.xml', [XLSX_WORKBOOK.format(sheet_name=escape(sheet_name)).encode('utf-8')]),
+                       ('xl/_rels/workbook.xml.rels', [XLSX_WORKBOOK_RELS.encode('utf-8')]),
+                       ('xl/worksheets/sheet1.xml', stream_xlsx_sheet(header, rows))])
@@ -1,4 +1,4 @@
-from typing import Hashable
+from typing import Hashable, Optional
 
 from apps.constants import PAGINATION_LINKS_MAX_COUNT
 
@@ -11,14 +11,17 @@ def get_item_filter(dictionary: dict, key: Hashable) -> str:
         pass
 
 
-def get_pages_range_filter(current_page_num: int, pages_count: int) -> range:
+def get_pages_range_filter(current_page_num: int, pages_count: Optional[int]) -> range:
     """
     Provide max link amount of active pages for paginator.
+    Keyset paginator does not count pages, so only current page link is provided.
     :param current_page_num:    currently displayed page pagination index
-    :param pages_count:         total pages number consistent with objects count in db
+    :param pages_count:         total pages number consistent with objects count in db or None if unknown
     :return pages_range:        pages links range
     """
-    if pages_count <= PAGINATION_LINKS_MAX_COUNT:
+    if pages_count is None:
+        pages_range = range(current_page_num, current_page_num + 1)
+    elif pages_count <= PAGINATION_LINKS_MAX_COUNT:
         pages_range = range(1, pages_count + 1)
     else:
         if current_page_num <= (PAGINATION_LINKS_MAX_COUNT // 2):
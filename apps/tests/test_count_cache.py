@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.orders.models import Order
+from apps.orders.tests.factories import OrderFactory
+from apps.paginators import CachedCountPaginator
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.orders = OrderFactory.create_batch(size=3)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_count(self, model, params=None):
+        return CachedCountPaginator(model.objects.all(), 10, cache_params=params).count
+
+    def test_count_is_cached_per_filter_params(self):
+        self.assertEqual(self.get_count(Order), 3)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get_count(Order), 3)
+        self.assertEqual(len(context), 0)
+        with CaptureQueriesContext(connection) as context:
+            self.get_count(Order, {'status': 'Open'})
+        self.assertEqual(len(context), 1)
+
+    def test_save_and_delete_invalidate_count(self):
+        self.assertEqual(self.get_count(Order), 3)
+        OrderFactory.create()
+        self.assertEqual(self.get_count(Order), 4)
+        self.orders[0].delete()
+        self.assertEqual(self.get_count(Order), 3)
+
+    def test_related_model_change_invalidates_dependent_counts(self):
+        def get_renamed_client_orders_count():
+            return CachedCountPaginator(Order.objects.filter(client__client_name='renamed'), 10,
+                                        cache_params={'client_name': 'renamed'}).count
+
+        self.assertEqual(get_renamed_client_orders_count(), 0)
+        client = self.orders[0].client
+        client.client_name = 'renamed'
+        client.save()
+        self.assertEqual(get_renamed_client_orders_count(), 1)
+
+    def test_estimated_count_replaced_past_estimate(self):
+        """Act: get page past estimated count & page of estimate above objects count <> Exp: exact count used,
+        cached for next paginators
+        """
+        with mock.patch('apps.paginators.APPROXIMATE_COUNT_THRESHOLD', 1), \
+                mock.patch('apps.paginators.get_approximate_count', return_value=1):
+            paginator = CachedCountPaginator(Order.objects.order_by('id'), 1)
+            self.assertEqual(paginator.num_pages, 1)
+            self.assertEqual(list(paginator.page(3)), [self.orders[2]])
+            self.assertEqual((paginator.count, paginator.num_pages), (3, 3))
+            self.assertEqual(CachedCountPaginator(Order.objects.order_by('id'), 1).count, 3)
+
+        cache.clear()
+        with mock.patch('apps.paginators.APPROXIMATE_COUNT_THRESHOLD', 1), \
+                mock.patch('apps.paginators.get_approximate_count', return_value=1000):
+            paginator = CachedCountPaginator(Order.objects.order_by('id'), 2)
+            self.assertEqual(paginator.num_pages, 500)
+            self.assertEqual(list(paginator.page(2)), [self.orders[2]])
+            self.assertEqual(paginator.num_pages, 2)
+            with self.assertRaises(EmptyPage):
+                CachedCountPaginator(Order.objects.order_by('id'), 2).page(3)
@@ -0,0 +1,45 @@
+from django.http import QueryDict
+from django.test import TestCase
+
+from apps.clients.filters import ClientFilter
+from apps.filter_state import encode_filter_state, decode_filter_state
+from apps.orders.filters import OrderFilter
+from apps.orders.models import Order
+from apps.orders.tests.factories import OrderFactory
+
+
+class FilterStateTest(TestCase):
+    def test_token_round_trip(self):
+        """Act: encode & decode filter state <> Exp: non empty values restored
+        """
+        token = encode_filter_state({'client_name': 'ACME', 'client_sap_id': '', 'ordering': '-client_name'})
+        self.assertEqual(decode_filter_state(token), {'client_name': 'ACME', 'ordering': '-client_name'})
+
+    def test_invalid_token(self):
+        """Act: decode missing or tampered token <> Exp: None
+        """
+        token = encode_filter_state({'client_name': 'ACME'})
+        for invalid_token in (None, '', 'tampered', token[:-1]):
+            self.assertIsNone(decode_filter_state(invalid_token))
+
+    def test_state_precedence(self):
+        """Act: resolve state from token, session & params <> Exp: params override token, session ignored
+        """
+        token = encode_filter_state({'client_name': 'ACME', 'ordering': 'client_name'})
+        session = {'client_name': 'legacy', 'client_sap_id': '100'}
+        params = QueryDict(f"state={token}&ordering=-id")
+        self.assertEqual(ClientFilter.get_state(params, session), {'client_name': 'ACME', 'ordering': '-id'})
+        self.assertEqual(ClientFilter.get_state(QueryDict('ordering=-id'), session),
+                         {'client_name': 'legacy', 'client_sap_id': '100', 'ordering': '-id'})
+
+    def test_clear_filters_state(self):
+        """Act: clear order filters <> Exp: state limited to date range from current date
+        """
+        OrderFactory.create()
+        token = encode_filter_state({'status': 'Open'})
+        order_filter = OrderFilter.from_state(QueryDict(f"state={token}&clear_filters=true"), {},
+                                              queryset=Order.objects.all())
+        self.assertEqual(order_filter.state, {'date_of_production_after': Order.get_date_of_production('today'),
+                                              'date_of_production_before': Order.get_date_of_production('max')})
+        self.assertEqual(decode_filter_state(order_filter.state_token), order_filter.state)
+        self.assertEqual(order_filter.qs.count(), 1)
@@ -0,0 +1,88 @@
+import io
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.clients.models import Client
+from apps.clients.tests.factories import ClientFactory
+from apps.master_data_sync import MasterDataSync
+from apps.paginators import get_count_cache_key
+from apps.products.models import Product
+from apps.products.tests.factories import ProductFactory
+from apps.user_texts import IMPORT_MSG
+
+
+class MasterDataSyncTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.clients = [ClientFactory.create(client_sap_id=1000000 + n, client_name=f"client {n}") for n in range(3)]
+        self.sync = MasterDataSync(Client, key_field='client_sap_id', fields=('client_name', ), batch_size=2)
+
+    def get_rows(self, records):
+        return list(enumerate(records, start=1))
+
+    def test_sync_changes(self):
+        """Act: sync extract with new, changed, unchanged, duplicated & invalid records
+        <> Exp: only new & changed records written, changes reported
+        """
+        result = self.sync.sync(self.get_rows([{'client_sap_id': '1000000', 'client_name': 'client 0'},
+                                               {'client_sap_id': 1000001, 'client_name': ' renamed '},
+                                               {'client_sap_id': '2000000', 'client_name': 'new client'},
+                                               {'client_sap_id': '2000000', 'client_name': 'duplicated'},
+                                               {'client_sap_id': '12', 'client_name': ''},
+                                               'not a record']))
+        self.assertEqual((result.created, result.updated, result.unchanged, result.missing),
+                         ([2000000], [1000001], 1, 1))
+        self.assertEqual(result.rejected, 3)
+        self.assertIn((4, IMPORT_MSG['duplicated_record']), result.errors)
+        self.assertEqual(len([row_number for row_number, _ in result.errors if row_number == 5]), 2)
+        self.assertEqual(Client.objects.get(client_sap_id=1000001).client_name, 'renamed')
+        self.assertEqual(Client.objects.get(client_sap_id=2000000).client_name, 'new client')
+        self.assertTrue(Client.objects.filter(client_sap_id=1000002).exists())
+
+    def test_sync_unchanged_extract(self):
+        """Act: sync extract equal to database <> Exp: no rows written
+        """
+        rows = self.get_rows([{'client_sap_id': client.client_sap_id, 'client_name': client.client_name}
+                              for client in self.clients])
+        with CaptureQueriesContext(connection) as queries:
+            result = self.sync.sync(rows)
+        self.assertEqual(result.unchanged, len(self.clients))
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))])
+
+    def test_sync_invalidates_counts(self):
+        """Act: sync new client after list count was cached <> Exp: cached count invalidated
+        """
+        key = get_count_cache_key(Client, {})
+        self.sync.sync(self.get_rows([{'client_sap_id': 2000000, 'client_name': 'new client'}]))
+        self.assertNotEqual(get_count_cache_key(Client, {}), key)
+
+
+class SyncProductsCommandTest(TestCase):
+    def setUp(self) -> None:
+        self.product = ProductFactory.create(product_sap_id=1000000, index='A1', description='product')
+        content = "product_sap_id,index,description\n1000000,A1,changed\n2000000,,new product\n"
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        self.path = file.name
+
+    def test_dry_run(self):
+        out = io.StringIO()
+        call_command('sync_products', self.path, '--dry-run', stdout=out)
+        self.assertIn("created 1, updated 1, unchanged 0", out.getvalue())
+        self.assertEqual(Product.objects.count(), 1)
+        self.assertEqual(Product.objects.get().description, 'product')
+
+    def test_sync(self):
+        out = io.StringIO()
+        call_command('sync_products', self.path, verbosity=2, stdout=out)
+        self.assertIn("updated: 1000000", out.getvalue())
+        self.assertEqual(Product.objects.get(product_sap_id=1000000).description, 'changed')
+        self.assertIsNone(Product.objects.get(product_sap_id=2000000).index)
@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from apps.clients.models import Client
+from apps.clients.tests.factories import ClientFactory
+from apps.orders.models import Order
+from apps.orders.tests.factories import OrderFactory
+from apps.paginators import KeysetPaginator
+from apps.template_filters import get_pages_range_filter
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.per_page = 4
+        # duplicated names force id tiebreaker usage
+        cls.clients = [ClientFactory.create(client_name=f"client_{n % 3}") for n in range(11)]
+        cls.orders = OrderFactory.create_batch(size=5) + OrderFactory.create_batch(size=4, order_sap_id=None)
+
+    def walk_forward(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_forward_pages_match_offset_ordering(self):
+        for ordering in ('client_name', '-client_name', 'id', '-client_sap_id'):
+            paginator = KeysetPaginator(Client.objects.all(), self.per_page, ordering=ordering)
+            pages = self.walk_forward(paginator)
+            expected = list(Client.objects.order_by(ordering, f"{'-' if ordering.startswith('-') else ''}id"))
+            self.assertEqual([obj for page in pages for obj in page], expected, msg=f"Ordering: {ordering}")
+            self.assertEqual([page.number for page in pages], list(range(1, len(pages) + 1)))
+
+    def test_backward_pages_match_forward_pages(self):
+        paginator = KeysetPaginator(Client.objects.all(), self.per_page, ordering='client_name')
+        pages = self.walk_forward(paginator)
+        page = pages[-1]
+        while page.has_previous():
+            previous_page = paginator.page(page.previous_cursor)
+            self.assertEqual(list(previous_page), list(pages[previous_page.number - 1]))
+            page = previous_page
+        self.assertEqual(page.number, 1)
+
+    def test_nullable_ordering_column(self):
+        for ordering in ('order_sap_id', '-order_sap_id'):
+            paginator = KeysetPaginator(Order.objects.all(), self.per_page, ordering=ordering)
+            seen = [obj for page in self.walk_forward(paginator) for obj in page]
+            self.assertEqual(len(seen), len(self.orders), msg=f"Ordering: {ordering}")
+            self.assertEqual(set(seen), set(self.orders), msg=f"Ordering: {ordering}")
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(Client.objects.all(), self.per_page, ordering='client_name')
+        first_page = paginator.page()
+        other_ordering_cursor = KeysetPaginator(Client.objects.all(), self.per_page,
+                                                ordering='id').page().next_cursor
+        for cursor in ('tampered', first_page.next_cursor + 'x', other_ordering_cursor):
+            page = paginator.page(cursor)
+            self.assertEqual(page.number, 1)
+            self.assertEqual(list(page), list(first_page))
+
+    def test_pages_range_for_unknown_pages_count(self):
+        self.assertEqual(get_pages_range_filter(7, None), range(7, 8))
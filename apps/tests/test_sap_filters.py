@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from apps.clients.filters import ClientFilter
+from apps.clients.models import Client
+from apps.clients.tests.factories import ClientFactory
+from apps.orders.filters import OrderFilter
+from apps.orders.models import Order
+from apps.orders.tests.factories import OrderFactory
+from apps.products.tests.factories import ProductFactory
+from apps.sap_filters import get_sap_id_prefix_range
+
+
+class SapIdPrefixFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.clients = [ClientFactory.create(client_sap_id=sap_id) for sap_id in (1234567, 1239999, 1240000, 9912345)]
+        cls.order = OrderFactory.create(order_sap_id=12345678, product=ProductFactory.create(product_sap_id=7654321))
+
+    def filter_clients(self, value):
+        return set(ClientFilter({'client_sap_id': value}, queryset=Client.objects.all()).qs
+                   .values_list('client_sap_id', flat=True))
+
+    def test_prefix_range(self):
+        self.assertEqual(get_sap_id_prefix_range('123', 7), (1230000, 1239999))
+        self.assertEqual(get_sap_id_prefix_range('1234567', 7), (1234567, 1234567))
+
+    def test_prefix_search(self):
+        self.assertEqual(self.filter_clients('123'), {1234567, 1239999})
+        self.assertEqual(self.filter_clients('124'), {1240000})
+        self.assertEqual(self.filter_clients('1234567'), {1234567})
+        self.assertEqual(self.filter_clients(''), set(Client.objects.values_list('client_sap_id', flat=True)))
+
+    def test_prefix_search_invalid_values(self):
+        for value in ['12345678', 'test', '12a', '-1']:
+            self.assertEqual(self.filter_clients(value), set(), msg=f"Value: {value}")
+
+    def test_substring_fallback(self):
+        self.assertEqual(self.filter_clients('*2345'), {1234567, 9912345})
+        self.assertEqual(self.filter_clients('*'), set(Client.objects.values_list('client_sap_id', flat=True)))
+
+    def test_order_filter_sap_ids(self):
+        for data in [{'order_sap_id': '1234'}, {'product_sap_id': '765'}, {'order_sap_id': '*4567'}]:
+            order_filter = OrderFilter(data, queryset=Order.objects.all())
+            self.assertEqual(list(order_filter.qs), [self.order], msg=f"Data: {data}")
+        order_filter = OrderFilter({'product_sap_id': '764'}, queryset=Order.objects.all())
+        self.assertFalse(order_filter.qs.exists())
@@ -0,0 +1,30 @@
+import io
+import zipfile
+
+from django.test import SimpleTestCase
+
+from apps.streaming import stream_zip, stream_csv, iter_blocks
+
+
+class StreamingTest(SimpleTestCase):
+    def test_zip_members_streamed(self):
+        """Act: stream archive with lazily produced member <> Exp: valid archive yielded in many chunks
+        """
+        content = (f"line {n}\n".encode('utf-8') * 1000 for n in range(50))
+        chunks = list(stream_zip([('first.txt', [b'first']), ('second.txt', content)]))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertGreater(len(chunks), 3)
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read('first.txt'), b'first')
+        self.assertEqual(archive.read('second.txt').count(b'line 49\n'), 1000)
+
+    def test_csv_blocks(self):
+        """Act: stream csv of rows exceeding single block <> Exp: header & all rows written
+        """
+        rows = ([n, f"name;{n}"] for n in range(1200))
+        data = b''.join(stream_csv(['id', 'name'], rows)).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(data), 1201)
+        self.assertEqual(data[-1], '1199,name;1199')
+
+    def test_iter_blocks(self):
+        self.assertEqual(list(iter_blocks(range(5), size=2)), [[0, 1], [2, 3], [4]])
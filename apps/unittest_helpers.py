@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 
@@ -19,3 +21,15 @@ def assert_response_post(test_case, url_name, exp_status_code, data, id=None):
         response = test_case.view_client.post(reverse(url_name), data=data)
     test_case.assertEqual(response.status_code, exp_status_code)
     return response
+
+
+def assert_query_budget(test_case, url_name, view_class, id=None):
+    """Render view and check that executed queries count (session & auth included)
+    does not exceed query budget declared by view class.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = assert_response_get(test_case=test_case, url_name=url_name, exp_status_code=200, id=id)
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    test_case.assertLessEqual(len(context), view_class.query_budget,
+                              msg=f"{view_class.__name__} exceeded query budget:\n{queries}")
+    return response
@@ -13,6 +13,11 @@ VIEW_MSG = {'client': {'new_success': "Utworzono nowego klienta",
                         'delete_success': "Produkt został usunięty", },
             'specification': {'issue_error': "Nie wystawiono specyfikacji dla klienta. "
                                              "Wystąpiły nastęþujące błędy formularza:",
+                              'pdf_pending': "Trwa generowanie pliku PDF specyfikacji. "
+                                             "Plik zostanie pobrany automatycznie.",
+                              'pdf_error': "Nie udało się wygenerować pliku PDF specyfikacji.",
+                              'bulk_issue_error': "Nie wystawiono specyfikacji dla klientów. "
+                                                  "Wystąpiły następujące błędy formularza:",
                               },
             'order': {'new_success': "Utworzono nowe zlecenie produkcyjne",
                       'new_error': "Nie utworzono nowego zlecenia produkcyjnego. "
@@ -21,6 +26,13 @@ VIEW_MSG = {'client': {'new_success': "Utworzono nowego klienta",
                       'update_error': "Nie zaktualizowano danych zlecenia produkcyjnego. "
                                       "Wystąpiły następujące błędy formularza:",
                       'delete_success': "Zlecenie produkcyjne zostało usunięte", },
+            'order_import': {'success': "Zaimportowano zlecenia produkcyjne: {created}",
+                             'error': "Odrzucono wiersze pliku: {rejected}. Wystąpiły następujące błędy:",
+                             'row_error': "Wiersz {row_number}: {message}",
+                             'more_errors': "... oraz {count} kolejnych błędów",
+                             },
+            'certificates': {'no_orders': "Brak zamkniętych zleceń produkcyjnych z raportem pomiarowym "
+                                          "w podanym zakresie dat produkcji.", },
             'measurement_report': {'new_success': "Dodano raport pomiarowy",
                                    'new_error': "Raport pomiarowy nie został dodany. "
                                                 "Wystąpiły następujące błędy formularza:",
@@ -95,8 +107,11 @@ LABELS = {'client': {'client_sap_id': "Numer SAP klienta",
                     'external_diameter_reference': "Średnica zewnętrzna",
                     'length': "Długość",
                     'quantity': "Ilość", },
+          'order_import': {'file': "Plik eksportu zleceń SAP (CSV lub JSON lines)", },
           'measurement_report': {'author': "Kontrolował",
                                  'date_of_control': "Data kontroli", },
+          'measurement_grid': {'delete': "Usuń paletę",
+                               'restore': "Przywróć paletę", },
           'measurement': {'pallet_number': "Paleta nr",
                           'internal_diameter_tolerance_top': "Góra",
                           'internal_diameter_target': "Środek",
@@ -112,6 +127,17 @@ LABELS = {'client': {'client_sap_id': "Numer SAP klienta",
                           'weight': "Waga",
                           'remarks': 'Uwagi, klejenie, pakowanie',
                           },
+          'measurement_groups': {'internal_diameter': "Kontrola średnicy wewnętrznej",
+                                 'external_diameter': "Kontrola średnicy zewnętrznej",
+                                 'length': "Kontrola długości", },
+          'verdict': {'internal_diameter': "Średnica wewnętrzna",
+                      'external_diameter': "Średnica zewnętrzna",
+                      'length': "Długość",
+                      'flat_crush_resistance': "Odporność na zgniatanie",
+                      'moisture_content': "Wilgotność", },
+          'spc': {'internal_diameter': "Średnica wewnętrzna",
+                  'external_diameter': "Średnica zewnętrzna",
+                  'length': "Długość", },
           'user': {'password': "Hasło",
                    'old_password': "Stare hasło",
                    'new_password': "Nowe hasło",
@@ -128,12 +154,67 @@ ERROR_MSG = {'client': {'client_sap_id': {'unique': "Klient o podanym numerze SA
                                    'inactive': "Użytkownik o podanym loginie jest nieaktywny.",
                                    },
                       'password': {'required': "To pole jest wymagane"}, },
+             'specification_bulk_issue': {'client_sap_ids': {'invalid': "Nieprawidłowe numery SAP klientów: {values}",
+                                                             'unknown': "Klienci o podanych numerach SAP nie istnieją "
+                                                                        "w bazie danych: {values}", },
+                                          'clients': {'required': "Podaj numery SAP klientów lub wybierz klientów "
+                                                                  "z zleceniami produkcyjnymi produktu.", }, },
              }
 
 MODEL_MSG = {'boolean_choices': ["Tak", "Nie", ],
              'cores_packed_in': ["w pozycji pionowej", "w pozycji poziomej", "na kartonach", ],
              'order_status_choices': ["Otwarty", "W trakcie", "Zakończony", ],
+             'order_verdict_choices': ["Zgodny", "Niezgodny", ],
              'password': "Wymagane. Musi się skladac z dokladnie 5 liter.",
              }
 
+EXPORT_HEADERS = {'order': {'order_sap_id': "Nr partii",
+                            'client__client_sap_id': "Nr sap klienta",
+                            'client__client_name': "Nazwa klienta",
+                            'product__product_sap_id': "Kod produktu",
+                            'product__index': "Indeks produktu",
+                            'product__description': "Opis produktu",
+                            'date_of_production': "Data produkcji",
+                            'status': "Status",
+                            'measurement_report__author': "Kontrolował",
+                            'measurement_report__date_of_control': "Data kontroli",
+                            'pallet_number': "Paleta nr",
+                            'internal_diameter_tolerance_top': "Średnica wewnętrzna - góra",
+                            'internal_diameter_target': "Średnica wewnętrzna - środek",
+                            'internal_diameter_tolerance_bottom': "Średnica wewnętrzna - dół",
+                            'external_diameter_tolerance_top': "Średnica zewnętrzna - góra",
+                            'external_diameter_target': "Średnica zewnętrzna - środek",
+                            'external_diameter_tolerance_bottom': "Średnica zewnętrzna - dół",
+                            'length_tolerance_top': "Długość - góra",
+                            'length_target': "Długość - środek",
+                            'length_tolerance_bottom': "Długość - dół",
+                            'flat_crush_resistance_target': "Kontrola wytrzymałości",
+                            'moisture_content_target': "Wilgotność",
+                            'weight': "Waga",
+                            'remarks': "Uwagi, klejenie, pakowanie", },
+                  'sheet_name': "Zlecenia produkcyjne",
+                  }
+
+IMPORT_MSG = {'invalid_row': "Nieprawidłowy format wiersza",
+              'required': "To pole jest wymagane",
+              'duplicated_row': "Nr partii powtarza się w importowanym pliku.",
+              'duplicated_record': "Numer SAP powtarza się w importowanym pliku.",
+              'chunk_error': "Wiersz nie został zapisany z powodu konfliktu danych, ponów import.",
+              'invalid_format': "Obsługiwane są pliki CSV oraz JSON lines (.csv, .jsonl, .json, .ndjson).",
+              'invalid_encoding': "Plik musi być zapisany w kodowaniu UTF-8.",
+              'unreadable': "Import przerwany, nie można odczytać pliku ({error}). "
+                            "Zlecenia z wcześniejszych wierszy mogły zostać zapisane.",
+              }
+
+INGEST_MSG = {'unauthorized': "Wymagane uwierzytelnienie urządzenia ważnym tokenem.",
+              'invalid_json': "Nieprawidłowy format danych, oczekiwano obiektu JSON.",
+              'no_readings': "Brak odczytów do zapisania.",
+              'too_many_readings': "Zbyt wiele odczytów w jednym żądaniu (maksymalnie {count}).",
+              'order_closed': "Raport pomiarowy zlecenia jest zamknięty.",
+              'invalid_readings': "Nieprawidłowe odczyty.",
+              }
+
 FORMSET_MSG = {'pallet_number': "Numery palet nie mogą się powtarzać w raporcie pomiarowym!"}
+
+ZIP_MSG = {'errors_name': "BLEDY.txt",
+           'not_rendered': "Nie wygenerowano dokumentów ({count}):", }
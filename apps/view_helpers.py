@@ -1,15 +1,18 @@
 import re
 from typing import Union, List, Type
+from urllib.parse import urlencode
 
 from betterforms.multiform import MultiForm
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.sessions.backends.base import SessionBase
 from django.forms import BaseForm
 from django.http import QueryDict, HttpRequest
 
 from apps.clients.filters import ClientFilter
+from apps.constants import FILTER_STATE_MODE_DEFAULT
+from apps.filter_state import FILTER_STATE_PARAM
 from apps.orders.filters import OrderFilter
-from apps.orders.models import Order
 from apps.products.filters import ProductFilter
 
 
@@ -48,9 +51,7 @@ def update_filter_params(params: "QueryDict", session: "SessionBase",
     if 'clear_filters' in params:
         for field_name in filter_class.get_fields():
             session[field_name] = ''
-        if filter_class == OrderFilter:
-            session['date_of_production_after'] = Order.get_date_of_production('today')
-            session['date_of_production_before'] = Order.get_date_of_production('max')
+        session.update(filter_class.get_initial_state())
     return session
 
 
@@ -68,3 +69,49 @@ def update_ordering(params: "QueryDict", session: "SessionBase") -> "SessionBase
     if 'clear_filters' in params:
         session['ordering'] = 'id'
     return session
+
+
+class FilterStateMixin:
+    """List view extension filtering & sorting objects by filter state.
+    State is kept in session by default. In token mode (FILTER_STATE_MODE setting) state
+    is passed between requests as signed token in links, so listing does not write session.
+    Filter set class used by view is expected in filterset_class attribute.
+    """
+    filterset_class = None
+    filterset = None
+
+    def is_token_mode(self) -> bool:
+        return getattr(settings, 'FILTER_STATE_MODE', FILTER_STATE_MODE_DEFAULT) == 'token'
+
+    def get_filterset(self, queryset):
+        if self.is_token_mode():
+            return self.filterset_class.from_state(params=self.request.GET, session=self.request.session,
+                                                   queryset=queryset)
+        self.request.session = update_filter_params(params=self.request.GET,
+                                                    session=self.request.session,
+                                                    filter_class=self.filterset_class)
+        self.request.session = update_ordering(params=self.request.GET,
+                                               session=self.request.session)
+        return self.filterset_class(self.request.session, queryset=queryset)
+
+    def get_filter_state(self) -> Union[dict, "SessionBase"]:
+        return self.filterset.state if self.is_token_mode() else self.request.session
+
+    def get_queryset(self):
+        self.filterset = self.get_filterset(self.queryset.all())
+        return self.filterset.qs.order_by(self.get_ordering())
+
+    def get_ordering(self):
+        """Return ordering value stored in filter state or id as a default."""
+        return self.get_filter_state().get('ordering', 'id')
+
+    def get_context_data(self, **kwargs):
+        """Update context for filter state used by filter inputs & links.
+        Filter state query is appended to links in token mode.
+        """
+        context = super().get_context_data(**kwargs)
+        token = self.filterset.state_token if self.is_token_mode() else ''
+        context['filter_state'] = self.get_filter_state()
+        context['filter_state_token'] = token
+        context['filter_state_query'] = f"&{urlencode({FILTER_STATE_PARAM: token})}" if token else ''
+        return context
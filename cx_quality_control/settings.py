@@ -118,6 +118,31 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# Keeps pagination counts, invalidated by model signals. Use shared cache backend (e.g. memcached)
+# when running multiple worker processes, so invalidation reaches all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# List views filter & ordering state storage: 'session' or 'token' (signed state token in links,
+# no session writes on listing)
+FILTER_STATE_MODE = 'session'
+
+# Columnar archive of closed orders measurements (monthly partitions of NumPy arrays),
+# has to be shared by all application hosts
+MEASUREMENTS_ARCHIVE_ROOT = os.path.join(BASE_DIR, 'measurements_archive')
+
+# Rendered PDF documents keyed by hash of their content & template, least recently used evicted
+# over PDF_CACHE_SIZE_LIMIT (apps/constants.py)
+PDF_CACHE_ROOT = os.path.join(BASE_DIR, 'pdf_cache')
+
+# HTML to PDF rendering engine (apps.pdf_creator.PdfRenderer), imported on first rendering
+PDF_RENDERER = 'apps.pdf_creator.XhtmlToPdfRenderer'
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # Password validation
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Measure worker boot (django.setup() & URLconf with all views) import time & memory in fresh
+interpreter with -X importtime, report slowest packages & check that lazily loaded packages
+(PDF engine) are not imported. Exits with error status when check fails, so it can be run by CI:
+
+    python scripts/benchmark_import_time.py --lazy xhtml2pdf reportlab
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from typing import Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# -X importtime line: self & cumulative time in microseconds, module indented by import nesting level
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+# run in fresh interpreter, django.setup() may already import URLconf (admin autodiscover, URL checks) so both
+# are measured as worker boot; wall times in ms, peak memory in kB & lazy packages imported during boot
+# (modules imported by settings module excluded) printed as JSON on last stdout line, boot imports
+# reported by -X importtime follow marker line on stderr
+BOOT_MARKER = 'worker boot'
+MEASURE_SCRIPT = """
+import importlib, json, resource, sys, time
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+before = set(sys.modules)
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+django.setup()
+setup = time.perf_counter()
+importlib.import_module({urlconf!r})
+end = time.perf_counter()
+print(json.dumps({{'setup': (setup - start) * 1000, 'urlconf': (end - setup) * 1000, 'boot': (end - start) * 1000,
+                  'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'lazy_imported': [package for package in {lazy!r} if package in sys.modules
+                                    and package not in before]}}))
+"""
+
+
+def parse_boot_imports(stderr: str) -> Counter:
+    """Self import time (ms) of modules imported during worker boot, summed by top level package."""
+    packages = Counter()
+    for line in stderr.split(BOOT_MARKER, 1)[-1].splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            self_time, _, _, module = match.groups()
+            packages[module.split('.')[0]] += int(self_time) / 1000
+    return packages
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def measure(urlconf: str, lazy: list) -> (dict, Counter):
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(path for path in sys.path if path)}
+    script = MEASURE_SCRIPT.format(urlconf=urlconf, lazy=lazy, marker=BOOT_MARKER)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                            env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise BenchmarkError(f"Worker boot failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.splitlines()[-1]), parse_boot_imports(result.stderr)
+
+
+def benchmark(repeat: int, top: int, lazy: list, max_ms: Optional[float] = None) -> None:
+    from django.conf import settings
+
+    urlconf = settings.ROOT_URLCONF
+    runs = [measure(urlconf, lazy) for _ in range(repeat)]
+    timings, packages = min(runs, key=lambda run: run[0]['boot'])
+    print(f"Worker boot: {timings['boot']:.1f} ms (django.setup(): {timings['setup']:.1f} ms, "
+          f"{urlconf} import: {timings['urlconf']:.1f} ms), "
+          f"max RSS: {timings['maxrss'] / 1024:.1f} MB (best of {repeat})")
+    print("Packages imported during boot (self import time, -X importtime):")
+    for package, import_time in packages.most_common(top):
+        print(f"  {package}: {import_time:.1f} ms")
+    if timings['lazy_imported']:
+        raise BenchmarkError(f"Lazily loaded packages imported during boot: {', '.join(timings['lazy_imported'])}")
+    if max_ms is not None and timings['boot'] > max_ms:
+        raise BenchmarkError(f"Worker boot {timings['boot']:.1f} ms exceeds {max_ms:.1f} ms")
+    print("Lazily loaded packages not imported during boot.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreter runs, best run is reported.")
+    parser.add_argument('--top', type=int, default=10, help="Slowest packages imported during boot shown.")
+    parser.add_argument('--lazy', nargs='*', default=['xhtml2pdf', 'reportlab'],
+                        help="Packages expected not to be imported during boot.")
+    parser.add_argument('--max-ms', type=float, help="Fail when worker boot takes longer.")
+    options = parser.parse_args()
+    sys.path.insert(0, PROJECT_ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cx_quality_control.settings')
+    try:
+        benchmark(options.repeat, options.top, options.lazy, options.max_ms)
+    except BenchmarkError as error:
+        sys.exit(str(error))
+
+
+if __name__ == '__main__':
+    main()
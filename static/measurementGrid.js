@@ -0,0 +1,232 @@
+// Virtualized measurement grid: report measurements are sent as compact JSON (measurement-grid-data)
+// and only pallets visible in scrolled grid are rendered. Edited values are kept in grid rows
+// and written as measurement formset data (management form counts & measurements-<index>-<field>) on submit.
+// Any pallet can be marked as deleted with button of its column, it is submitted with formset deletion field.
+(function () {
+    'use strict';
+    const COLUMN_WIDTH = 110;
+    const OVERSCAN_COLUMNS = 4;
+
+    let data = JSON.parse(document.getElementById('measurement-grid-data').textContent);
+    let grid = document.getElementById('measurement-grid');
+    let spacer = grid.querySelector('.measurement-grid-spacer');
+    let rows = data.rows.map(row => row.map(value => value === null ? '' : String(value)));
+    let ids = data.ids.slice();
+    let errors = data.errors;
+    let deleted = new Set(data.deleted);
+    let patterns = data.columns.map(column => column.attrs.pattern ? new RegExp(`^(?:${column.attrs.pattern})$`) : null);
+    let rendered = {first: 0, last: -1};
+
+    let view = document.createElement('div');
+    view.style.position = 'absolute';
+    view.style.top = '0';
+    view.style.whiteSpace = 'nowrap';
+    grid.appendChild(view);
+
+    if (rows.length < data.minNum) {
+        rows.push(emptyRow());
+    }
+
+    function emptyRow() {
+        return data.columns.map(() => '');
+    }
+
+    function cellError(row, column) {
+        let rowErrors = errors[row];
+        return rowErrors ? rowErrors[data.columns[column].name] : undefined;
+    }
+
+    function isCellValid(row, column) {
+        let value = rows[row][column];
+        let attrs = data.columns[column].attrs;
+        if (value === '') {
+            return !attrs.required;
+        }
+        return patterns[column] === null || patterns[column].test(value);
+    }
+
+    function renderCell(row, column) {
+        let spec = data.columns[column];
+        let group = document.createElement('div');
+        group.className = 'input-group input-group-sm';
+        let input = document.createElement('input');
+        input.type = 'text';
+        Object.keys(spec.attrs).forEach(name => input.setAttribute(name, spec.attrs[name]));
+        input.value = rows[row][column];
+        input.dataset.row = row;
+        input.dataset.column = column;
+        let error = cellError(row, column);
+        if (error) {
+            input.classList.add('is-invalid');
+            input.title = error.join(' ');
+        }
+        group.appendChild(input);
+        if (spec.unit) {
+            let append = document.createElement('div');
+            append.className = 'input-group-append';
+            let unit = document.createElement('span');
+            unit.className = 'input-group-text';
+            unit.textContent = spec.unit;
+            append.appendChild(unit);
+            group.appendChild(append);
+        }
+        return group;
+    }
+
+    function renderDeleteButton(row) {
+        let button = document.createElement('button');
+        button.type = 'button';
+        button.className = 'btn btn-sm btn-block mb-1 measurement-grid-delete ' +
+            (deleted.has(row) ? 'btn-secondary' : 'btn-outline-secondary');
+        button.textContent = deleted.has(row) ? data.labels.restore : data.labels.delete;
+        button.dataset.row = row;
+        return button;
+    }
+
+    function renderRow(row) {
+        let element = document.createElement('div');
+        element.className = 'pl-1 pr-1';
+        element.style.display = 'inline-block';
+        element.style.width = `${COLUMN_WIDTH}px`;
+        if (data.deletionField) {
+            element.appendChild(renderDeleteButton(row));
+        }
+        for (let column = 0; column < data.columns.length; column++) {
+            element.appendChild(renderCell(row, column));
+        }
+        if (deleted.has(row)) {
+            element.style.opacity = '0.5';
+            element.querySelectorAll('input').forEach(input => input.disabled = true);
+        }
+        return element;
+    }
+
+    function render(force) {
+        spacer.style.width = `${rows.length * COLUMN_WIDTH}px`;
+        let first = Math.max(Math.floor(grid.scrollLeft / COLUMN_WIDTH) - OVERSCAN_COLUMNS, 0);
+        let last = Math.min(Math.ceil((grid.scrollLeft + grid.clientWidth) / COLUMN_WIDTH) + OVERSCAN_COLUMNS,
+                            rows.length - 1);
+        if (!force && first === rendered.first && last === rendered.last) {
+            return;
+        }
+        let fragment = document.createDocumentFragment();
+        for (let row = first; row <= last; row++) {
+            fragment.appendChild(renderRow(row));
+        }
+        view.textContent = '';
+        view.appendChild(fragment);
+        view.style.left = `${first * COLUMN_WIDTH}px`;
+        rendered = {first: first, last: last};
+    }
+
+    function scrollToRow(row) {
+        grid.scrollLeft = Math.max(row * COLUMN_WIDTH - grid.clientWidth / 2, 0);
+        render(true);
+    }
+
+    function findInvalidRow() {
+        let palletNumbers = new Set();
+        for (let row = 0; row < rows.length; row++) {
+            // deleted pallets are not validated, but their numbers are kept unique as in formset
+            for (let column = 0; column < data.columns.length && !deleted.has(row); column++) {
+                if (!isCellValid(row, column)) {
+                    return row;
+                }
+            }
+            // pallet number is first grid column
+            if (palletNumbers.has(rows[row][0])) {
+                return row;
+            }
+            palletNumbers.add(rows[row][0]);
+        }
+        return -1;
+    }
+
+    function appendField(fragment, name, value) {
+        let input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = name;
+        input.value = value;
+        fragment.appendChild(input);
+    }
+
+    function writeFormsetData() {
+        let fragment = document.createDocumentFragment();
+        rows.forEach((row, index) => {
+            if (index < ids.length) {
+                appendField(fragment, `${data.prefix}-${index}-id`, ids[index]);
+            }
+            data.columns.forEach((column, position) => {
+                appendField(fragment, `${data.prefix}-${index}-${column.name}`, row[position]);
+            });
+            if (deleted.has(index)) {
+                appendField(fragment, `${data.prefix}-${index}-${data.deletionField}`, 'on');
+            }
+        });
+        let fields = document.getElementById('measurement-grid-fields');
+        fields.textContent = '';
+        fields.appendChild(fragment);
+        document.getElementById(`id_${data.prefix}-TOTAL_FORMS`).value = rows.length;
+        document.getElementById(`id_${data.prefix}-INITIAL_FORMS`).value = ids.length;
+    }
+
+    grid.addEventListener('scroll', () => window.requestAnimationFrame(() => render(false)));
+    window.addEventListener('resize', () => render(false));
+
+    grid.addEventListener('input', function (e) {
+        let row = Number(e.target.dataset.row);
+        let column = Number(e.target.dataset.column);
+        rows[row][column] = e.target.value;
+        if (errors[row]) {
+            delete errors[row][data.columns[column].name];
+        }
+        e.target.classList.remove('is-invalid');
+        e.target.removeAttribute('title');
+    });
+
+    grid.addEventListener('click', function (e) {
+        let button = e.target.closest('.measurement-grid-delete');
+        if (!button) {
+            return;
+        }
+        let row = Number(button.dataset.row);
+        if (deleted.has(row)) {
+            deleted.delete(row);
+        } else if (rows.length - deleted.size > Math.max(data.minNum, 1)) {
+            deleted.add(row);
+        }
+        render(true);
+    });
+
+    grid.closest('form').addEventListener('submit', function (e) {
+        let invalidRow = findInvalidRow();
+        if (invalidRow !== -1) {
+            e.preventDefault();
+            scrollToRow(invalidRow);
+            return;
+        }
+        writeFormsetData();
+    });
+
+    $(document).on('click', '.add-form-row', function (e) {
+        e.preventDefault();
+        if (rows.length < data.maxNum) {
+            rows.push(emptyRow());
+            scrollToRow(rows.length - 1);
+        }
+        return false;
+    });
+    $(document).on('click', '.remove-form-row', function (e) {
+        e.preventDefault();
+        if (rows.length - deleted.size > Math.max(data.minNum, 1) || deleted.has(rows.length - 1)) {
+            rows.pop();
+            ids.length = Math.min(ids.length, rows.length);
+            delete errors[rows.length];
+            deleted.delete(rows.length);
+            render(true);
+        }
+        return false;
+    });
+
+    render(true);
+})();